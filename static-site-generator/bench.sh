@@ -0,0 +1 @@
+PYTHONPATH=src python -m ssg bench "$@"
\ No newline at end of file
@@ -1 +1 @@
-python src/main.py
\ No newline at end of file
+PYTHONPATH=src python -m ssg build "$@"
\ No newline at end of file
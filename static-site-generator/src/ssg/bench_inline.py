@@ -0,0 +1,71 @@
+import argparse
+import timeit
+
+from .textnode import TextNode
+from .conversion import (
+    TEXT_TYPE_BOLD,
+    TEXT_TYPE_CODE,
+    TEXT_TYPE_ITALIC,
+    TEXT_TYPE_TEXT,
+    split_nodes_delimiter,
+    split_nodes_images,
+    split_nodes_links,
+    text_to_textnodes,
+)
+
+
+def chained_text_to_textnodes(text):
+    # The five-pass pipeline text_to_textnodes used before the single-pass scanner.
+    nodes = [TextNode(text, TEXT_TYPE_TEXT)]
+    nodes = split_nodes_delimiter(nodes, "**", TEXT_TYPE_BOLD)
+    nodes = split_nodes_delimiter(nodes, "*", TEXT_TYPE_ITALIC)
+    nodes = split_nodes_delimiter(nodes, "`", TEXT_TYPE_CODE)
+    nodes = split_nodes_images(nodes)
+    return split_nodes_links(nodes)
+
+
+def make_mixed_paragraph(links):
+    parts = []
+    for i in range(links):
+        parts.append(
+            f"Sentence {i} has **bold**, *italic*, `code` and a "
+            f"[link {i}](https://example.com/{i}) plus ![img {i}](/images/{i}.png). "
+        )
+    return "".join(parts)
+
+
+def make_link_paragraph(links):
+    # No emphasis to break the text up first, so every link is found by
+    # rescanning the remainder of one long text node.
+    return " ".join(f"see [link {i}](https://example.com/{i})" for i in range(links))
+
+
+CORPORA = {"mixed": make_mixed_paragraph, "links": make_link_paragraph}
+
+
+def time_call(func, text, repeat):
+    number = max(1, repeat)
+    return min(timeit.repeat(lambda: func(text), number=number, repeat=3)) / number
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inline tokenizers")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 2000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'corpus':>8} {'links':>8} {'chained (ms)':>14} {'single-pass (ms)':>18} {'speedup':>9}")
+    for name, make_paragraph in CORPORA.items():
+        for size in args.sizes:
+            text = make_paragraph(size)
+            assert chained_text_to_textnodes(text) == text_to_textnodes(text)
+            chained = time_call(chained_text_to_textnodes, text, args.repeat)
+            single = time_call(text_to_textnodes, text, args.repeat)
+            print(
+                f"{name:>8} {size:>8} {chained * 1000:>14.3f} "
+                f"{single * 1000:>18.3f} {chained / single:>8.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+import argparse
+import sys
+import time
+import tracemalloc
+
+from .textnode import TextNode
+from .htmlnode import LeafNode
+from .conversion import text_node_to_html_node, text_to_textnodes
+from .bench_inline import make_mixed_paragraph
+
+
+class DictTextNode:
+    # TextNode as it was before __slots__, with a per-instance __dict__.
+    def __init__(self, text, text_type, url=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+
+
+class DictLeafNode:
+    # LeafNode as it was before __slots__.
+    def __init__(self, value, tag=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = None
+        self.props = props
+
+
+def build_nodes(text_nodes, text_cls, leaf_cls):
+    nodes = []
+    for node in text_nodes:
+        copy = text_cls(node.text, node.text_type, node.url)
+        nodes.append(copy)
+        nodes.append(leaf_cls(copy.text, node.text_type))
+    return nodes
+
+
+def measure(text_nodes, text_cls, leaf_cls):
+    tracemalloc.start()
+    start = time.perf_counter()
+    nodes = build_nodes(text_nodes, text_cls, leaf_cls)
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del nodes
+    return current, peak, elapsed
+
+
+def instance_size(obj):
+    size = sys.getsizeof(obj)
+    if hasattr(obj, "__dict__"):
+        size += sys.getsizeof(obj.__dict__)
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare node memory use with and without __slots__")
+    parser.add_argument("--paragraphs", type=int, default=2000)
+    parser.add_argument("--links", type=int, default=20)
+    args = parser.parse_args()
+
+    text_nodes = []
+    for _ in range(args.paragraphs):
+        text_nodes.extend(text_to_textnodes(make_mixed_paragraph(args.links)))
+    # Render once so the benchmark covers the real conversion path too.
+    for node in text_nodes[:100]:
+        text_node_to_html_node(node)
+
+    print(f"{len(text_nodes) * 2} nodes from {args.paragraphs} paragraphs")
+    print(f"{'variant':>10} {'bytes/node':>11} {'retained (MB)':>14} {'peak (MB)':>10} {'time (ms)':>10}")
+
+    variants = {
+        "dict": (DictTextNode, DictLeafNode),
+        "slots": (TextNode, LeafNode),
+    }
+    results = {}
+    for name, (text_cls, leaf_cls) in variants.items():
+        current, peak, elapsed = measure(text_nodes, text_cls, leaf_cls)
+        per_node = (instance_size(text_cls("x", "text")) + instance_size(leaf_cls("x", "b"))) / 2
+        results[name] = current
+        print(
+            f"{name:>10} {per_node:>11.0f} {current / 2**20:>14.2f} "
+            f"{peak / 2**20:>10.2f} {elapsed * 1000:>10.1f}"
+        )
+
+    print(f"slots retain {1 - results['slots'] / results['dict']:.0%} less memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+import argparse
+import gzip
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from .search import SEARCH_DIR, SEARCH_META, SearchIndex, build_search_index
+
+SYLLABLES = [consonant + vowel for consonant in "bcdfghklmnprstvz" for vowel in "aeiou"] + ["st", "re", "x"]
+
+
+def make_vocabulary(rng, size):
+    vocabulary = set()
+    while len(vocabulary) < size:
+        vocabulary.add("".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))))
+    return sorted(vocabulary)
+
+
+def make_site(content_dir, pages, words_per_page, vocabulary, rng):
+    # Word frequencies follow a rough Zipf curve, as in real text.
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    for i in range(pages):
+        words = rng.choices(vocabulary, weights, k=words_per_page)
+        heading = " ".join(rng.choices(vocabulary, weights, k=3))
+        paragraphs = [" ".join(words[j:j + 60]) for j in range(0, len(words), 60)]
+        directory = os.path.join(content_dir, f"section{i % 20}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"page{i}.md"), "w") as f:
+            f.write(f"# {heading}\n\n" + "\n\n".join(paragraphs))
+
+
+def index_size(search_dir):
+    sizes = {}
+    for name in os.listdir(search_dir):
+        with open(os.path.join(search_dir, name), "rb") as f:
+            data = f.read()
+        sizes[name] = (len(data), len(gzip.compress(data)))
+    return sizes
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def time_queries(search_dir, queries, cold):
+    # Cold: a fresh index per query, so shard loading is included, as on a
+    # first search in the browser. Warm: the shards are already loaded.
+    index = SearchIndex(search_dir)
+    timings = []
+    for query in queries:
+        if cold:
+            index = SearchIndex(search_dir)
+        start = time.perf_counter()
+        index.search(query)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure search index size and query latency")
+    parser.add_argument("--pages", type=int, default=2000)
+    parser.add_argument("--words", type=int, default=300, help="Words per page")
+    parser.add_argument("--vocabulary", type=int, default=20000)
+    parser.add_argument("--queries", type=int, default=1000, help="Warm queries; a fifth as many run cold")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    vocabulary = make_vocabulary(rng, args.vocabulary)
+    with tempfile.TemporaryDirectory() as workdir:
+        content = os.path.join(workdir, "content")
+        public = os.path.join(workdir, "public")
+        cache = os.path.join(workdir, "search.json")
+        make_site(content, args.pages, args.words, vocabulary, rng)
+
+        start = time.perf_counter()
+        result = build_search_index(content, public, cache)
+        cold_build = time.perf_counter() - start
+
+        os.utime(os.path.join(content, "section0", "page0.md"), ns=(0, 0))
+        with open(os.path.join(content, "section1", "page1.md"), "a") as f:
+            f.write("\n\nan edit")
+        start = time.perf_counter()
+        incremental = build_search_index(content, public, cache)
+        incremental_build = time.perf_counter() - start
+
+        search_dir = os.path.join(public, SEARCH_DIR)
+        sizes = index_size(search_dir)
+        shard_sizes = [size for name, size in sizes.items() if name != SEARCH_META]
+        source_bytes = sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, files in os.walk(content) for name in files
+        )
+
+        queries = []
+        for _ in range(args.queries):
+            terms = rng.sample(vocabulary[:2000], rng.randint(1, 2))
+            # The last term is often still being typed.
+            if rng.random() < 0.5:
+                terms[-1] = terms[-1][:rng.randint(2, len(terms[-1]))]
+            queries.append(" ".join(terms))
+        cold = time_queries(search_dir, queries[:max(1, len(queries) // 5)], cold=True)
+        warm = time_queries(search_dir, queries, cold=False)
+
+    print(f"{result['pages']} pages, {result['shards']} shards")
+    print(f"build: cold {cold_build * 1000:.0f} ms, one page edited {incremental_build * 1000:.0f} ms "
+          f"({incremental['extracted']} extracted, {len(incremental['written'])} files rewritten)")
+    print(f"index: {sum(raw for raw, _ in sizes.values()) / 1024:.0f} KiB "
+          f"({sum(packed for _, packed in sizes.values()) / 1024:.0f} KiB gzipped) "
+          f"for {source_bytes / 1024:.0f} KiB of markdown")
+    print(f"meta: {sizes[SEARCH_META][0] / 1024:.1f} KiB ({sizes[SEARCH_META][1] / 1024:.1f} KiB gzipped)")
+    print(f"shard: median {statistics.median(packed for _, packed in shard_sizes) / 1024:.1f} KiB, "
+          f"max {max(packed for _, packed in shard_sizes) / 1024:.1f} KiB gzipped")
+    for name, timings in (("cold", cold), ("warm", warm)):
+        print(f"query {name}: p50 {statistics.median(timings) * 1000:.3f} ms, "
+              f"p99 {percentile(timings, 0.99) * 1000:.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
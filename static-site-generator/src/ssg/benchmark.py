@@ -0,0 +1,252 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+from .htmlnode import LeafNode, ParentNode
+from .conversion import (
+    block_to_block_types,
+    classify_block,
+    markdown_to_blocks,
+    markdown_to_html,
+    text_to_textnodes,
+)
+from .main import copies_directory_to_public
+from .parsecache import ParseCache
+from .templates import compile_string
+
+WORDS = (
+    "static site generator markdown block inline parser render template page "
+    "asset build cache index search link image code list quote heading"
+).split()
+
+
+def words(rng, count):
+    return " ".join(rng.choice(WORDS) for _ in range(count))
+
+
+def link_dense_paragraph(rng, links):
+    parts = []
+    for i in range(links):
+        parts.append(f"{words(rng, 3)} [{words(rng, 2)}](/pages/{i}.html)")
+        if i % 5 == 0:
+            parts.append(f"with **{words(rng, 2)}** and `{words(rng, 1)}`")
+        if i % 7 == 0:
+            parts.append(f"![{words(rng, 2)}](/images/{i}.png)")
+    return " ".join(parts)
+
+
+def deep_list(rng, items):
+    return "\n".join(f"{i + 1}. {words(rng, 6)} *{words(rng, 1)}*" for i in range(items))
+
+
+def code_fence(rng, lines):
+    body = "\n".join(
+        "" if i % 10 == 9 else f"    {words(rng, 4)} = {i} * 2 ** [{i}]" for i in range(lines)
+    )
+    return f"```\n{body}\n```"
+
+
+def small_page(rng, index):
+    return "\n\n".join([
+        f"# Page {index}",
+        f"{words(rng, 20)} [{words(rng, 1)}](/pages/{index + 1}.html)",
+        f"* {words(rng, 4)}\n* {words(rng, 4)}\n* {words(rng, 4)}",
+        f"> {words(rng, 12)}",
+    ])
+
+
+def make_corpus(scale=1, seed=0):
+    rng = random.Random(seed)
+    paragraph = link_dense_paragraph(rng, 500 * scale)
+    document = "\n\n".join(
+        ["# Large document"]
+        + [link_dense_paragraph(rng, 10) for _ in range(100 * scale)]
+        + [deep_list(rng, 200 * scale), code_fence(rng, 500 * scale)]
+        + [f"## Section {i}\n\n> {words(rng, 30)}" for i in range(50 * scale)]
+    )
+    pages = [small_page(rng, i) for i in range(500 * scale)]
+    return {"paragraph": paragraph, "document": document, "pages": pages}
+
+
+def deep_tree(depth, width):
+    node = LeafNode("leaf", "b")
+    for _ in range(depth):
+        node = ParentNode("div", [node] + [LeafNode("text", None) for _ in range(width)])
+    return node
+
+
+def wide_tree(items):
+    return ParentNode("ul", [ParentNode("li", [LeafNode(f"item {i}", "i")]) for i in range(items)])
+
+
+def make_static_tree(root, files, size):
+    data = os.urandom(size)
+    for i in range(files):
+        directory = os.path.join(root, f"dir{i % 20}")
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"file{i}.bin"), "wb") as f:
+            f.write(data)
+
+
+def build_cases(corpus, workdir, scale):
+    blocks = markdown_to_blocks(corpus["document"])
+    deep = deep_tree(2000, 2)
+    wide = wide_tree(20000 * scale)
+
+    static = os.path.join(workdir, "static")
+    public = os.path.join(workdir, "public")
+    make_static_tree(static, 500 * scale, 16 * 1024)
+
+    def copy_static():
+        with contextlib.redirect_stdout(io.StringIO()):
+            copies_directory_to_public(static, public)
+
+    def render_pages():
+        for page in corpus["pages"]:
+            markdown_to_html(page).to_html()
+
+    template = compile_string("<html><title>{{ Title }}</title><main>{{ Content }}</main></html>")
+    page_nodes = [markdown_to_html(page) for page in corpus["pages"]]
+
+    parse_cache = ParseCache()
+    for page in corpus["pages"]:
+        parse_cache.markdown_to_html(page)
+
+    def load_pages():
+        for page in corpus["pages"]:
+            parse_cache.markdown_to_html(page).to_html()
+
+    def wrap_pages():
+        for node in page_nodes:
+            template.render({"Title": "Page", "Content": node})
+
+    # Each case is (name, callable); the callable is timed as a whole.
+    return [
+        ("text_to_textnodes/link_dense", lambda: text_to_textnodes(corpus["paragraph"])),
+        ("markdown_to_blocks/document", lambda: markdown_to_blocks(corpus["document"])),
+        ("block_to_block_types/document", lambda: [block_to_block_types(b) for b in blocks]),
+        ("classify_block/document", lambda: [classify_block(b) for b in blocks]),
+        ("markdown_to_html/document", lambda: markdown_to_html(corpus["document"])),
+        ("markdown_to_html/small_pages", render_pages),
+        ("ParseCache.markdown_to_html/small_pages", load_pages),
+        ("Template.render/small_pages", wrap_pages),
+        ("ParentNode.to_html/deep", deep.to_html),
+        ("ParentNode.to_html/wide", wide.to_html),
+        ("copies_directory_to_public/static", copy_static),
+    ]
+
+
+def time_case(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {"min": min(timings), "median": statistics.median(timings), "runs": repeat}
+
+
+def run(scale=1, repeat=5, only=None, log=print):
+    corpus = make_corpus(scale)
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {}
+        for name, func in build_cases(corpus, workdir, scale):
+            if only and not any(pattern in name for pattern in only):
+                continue
+            results[name] = time_case(func, repeat)
+            log(f"{name:<40} min {results[name]['min'] * 1000:>10.3f} ms   "
+                f"median {results[name]['median'] * 1000:>10.3f} ms")
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+            "scale": scale,
+            "repeat": repeat,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, threshold):
+    # A case regresses when its median is more than `threshold` (a fraction)
+    # slower than the baseline's. Cases missing from either side are ignored.
+    regressions = []
+    for name, result in report["results"].items():
+        before = baseline.get("results", {}).get(name)
+        if before is None:
+            continue
+        ratio = result["median"] / before["median"]
+        if ratio > 1 + threshold:
+            regressions.append((name, before["median"], result["median"], ratio))
+    return regressions
+
+
+def main(argv=None, prog=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv[:1] == ["--load"]:
+        # The load tester has options of its own (--compare among them), so
+        # everything after --load goes to it unparsed.
+        from .loadtest import main as load_main
+
+        return load_main(argv[1:], prog=f"{prog or 'benchmark'} --load")
+
+    parser = argparse.ArgumentParser(prog=prog, description="Benchmark the conversion and rendering hot paths")
+    parser.add_argument("--scale", type=int, default=1, help="Corpus size multiplier")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per case")
+    parser.add_argument("--only", nargs="+", help="Only run cases whose name contains one of these")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Baseline JSON file to compare against")
+    parser.add_argument(
+        "--threshold", type=float, default=0.10,
+        help="Allowed slowdown against the baseline, as a fraction (default 0.10)",
+    )
+    parser.add_argument(
+        "--startup", action="store_true",
+        help="Instead, time a no-op `ssg build` as a fresh process and check it against --budget-ms",
+    )
+    parser.add_argument(
+        "--budget-ms", type=float, default=None,
+        help="Startup budget for --startup, in milliseconds (default 100)",
+    )
+    parser.add_argument(
+        "--load", action="store_true",
+        help="Instead, load-test the static file servers; must come first, see `--load --help`",
+    )
+    args = parser.parse_args(argv)
+    if args.load:
+        parser.error("--load must come before the load tester's options")
+
+    if args.startup:
+        from .startup import STARTUP_BUDGET_MS, check_startup
+
+        return check_startup(args.budget_ms or STARTUP_BUDGET_MS, args.repeat)
+
+    report = run(args.scale, args.repeat, args.only)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        for name, before, after, ratio in regressions:
+            print(f"REGRESSION {name}: {before * 1000:.3f} ms -> {after * 1000:.3f} ms ({ratio:.2f}x)")
+        if regressions:
+            return 1
+        print(f"No regressions beyond {args.threshold:.0%}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+import hashlib
+import json
+import os
+from collections import OrderedDict
+
+# Bump whenever a change to conversion.py changes the HTML a block renders
+# to, so fragments persisted by an older build are thrown away.
+CACHE_VERSION = 5
+
+
+def block_key(block):
+    return hashlib.blake2b(block.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class BlockCache:
+    def __init__(self, maxsize=10000, path=None):
+        self.maxsize = maxsize
+        self.path = path
+        self.entries = OrderedDict()
+        self.added = {}
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, block):
+        key = block_key(block)
+        html = self.entries.get(key)
+        if html is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return html
+
+    def put(self, block, html):
+        key = block_key(block)
+        self.set_entry(key, html)
+        self.added[key] = html
+
+    def set_entry(self, key, html):
+        self.entries[key] = html
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def take_added(self):
+        # Entries rendered since the last call. Worker processes send these
+        # back so the parent can merge them into the cache it persists.
+        added, self.added = self.added, {}
+        return added
+
+    def merge(self, entries):
+        for key, html in entries.items():
+            self.set_entry(key, html)
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get("version") != CACHE_VERSION:
+            return
+        for key, html in data.get("entries", []):
+            self.set_entry(key, html)
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        # Entries are written oldest first, so loading them back in order
+        # restores the LRU order.
+        data = {"version": CACHE_VERSION, "entries": list(self.entries.items())}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,55 @@
+import argparse
+import importlib
+import os
+import sys
+
+# command -> (module, summary). Commands are dispatched by hand rather than
+# with argparse subparsers, so only the chosen command's module is imported:
+# `ssg build` never loads the server, and `ssg serve` never loads the build.
+COMMANDS = {
+    "build": ("main", "Build the site into public/ (--watch to keep rebuilding)"),
+    "serve": ("server", "Serve a directory, or render the site on request with --lazy"),
+    "bench": ("benchmark", "Benchmark the hot paths, a no-op build's startup (--startup) or the servers (--load)"),
+}
+
+
+def terminal_width():
+    # shutil.get_terminal_size, without importing shutil.
+    try:
+        return int(os.environ["COLUMNS"])
+    except (KeyError, ValueError):
+        pass
+    try:
+        return os.get_terminal_size(sys.__stdout__.fileno()).columns
+    except (AttributeError, ValueError, OSError):
+        return 80
+
+
+class HelpFormatter(argparse.HelpFormatter):
+    # argparse's own formatter imports shutil, and with it bz2 and lzma, for
+    # the terminal width; it builds one on every add_argument call.
+    def __init__(self, prog, indent_increment=2, max_help_position=24, width=None):
+        super().__init__(prog, indent_increment, max_help_position, width or terminal_width() - 2)
+
+
+def usage():
+    lines = ["usage: ssg {" + ",".join(COMMANDS) + "} ...", "", "commands:"]
+    for command, (_, summary) in COMMANDS.items():
+        lines.append(f"  {command:<8}{summary}")
+    lines.append("")
+    lines.append("Run `ssg COMMAND --help` for a command's options.")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or argv[0] in ("-h", "--help"):
+        print(usage())
+        return 0 if argv else 2
+    command = argv[0]
+    if command not in COMMANDS:
+        print(usage(), file=sys.stderr)
+        print(f"\nssg: unknown command {command!r}", file=sys.stderr)
+        return 2
+    module = importlib.import_module(f".{COMMANDS[command][0]}", __package__)
+    return module.main(argv[1:], prog=f"ssg {command}")
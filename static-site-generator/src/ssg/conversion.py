@@ -0,0 +1,489 @@
+from .textnode import (
+    TextNode,
+    TEXT_TYPE_TEXT,
+    TEXT_TYPE_BOLD,
+    TEXT_TYPE_ITALIC,
+    TEXT_TYPE_CODE,
+    TEXT_TYPE_LINK,
+    TEXT_TYPE_IMAGE,
+)
+from .htmlnode import (
+    HTMLNode,
+    LeafNode,
+    ParentNode,
+    TAG_BOLD,
+    TAG_ITALIC,
+    TAG_CODE,
+    TAG_LINK,
+    TAG_IMAGE,
+    TAG_PARAGRAPH,
+    TAG_PRE,
+    TAG_QUOTE,
+    TAG_ORDERED_LIST,
+    TAG_UNORDERED_LIST,
+    TAG_LIST_ITEM,
+    TAG_DIV,
+    HEADING_TAGS,
+)
+import html
+import io
+import mmap
+import os
+import re
+import sys
+
+def escape_text(text):
+    # Leaf values are emitted verbatim, so markup characters in the source
+    # text are escaped once, here, when the leaf is built.
+    return html.escape(text, quote=False)
+
+
+def text_node_to_html_node(text_node):
+    if not isinstance(text_node, TextNode):
+        raise TypeError("Expected a TextNode instance")
+    
+    text_type = text_node.text_type
+
+    if text_type == TEXT_TYPE_TEXT:
+        return LeafNode(value=escape_text(text_node.text), tag=None)
+    
+    if text_type == TEXT_TYPE_BOLD:
+        if text_node.children:
+            return ParentNode(TAG_BOLD, [text_node_to_html_node(child) for child in text_node.children])
+        return LeafNode(value=escape_text(text_node.text), tag=TAG_BOLD)
+    
+    if text_type == TEXT_TYPE_ITALIC:
+        if text_node.children:
+            return ParentNode(TAG_ITALIC, [text_node_to_html_node(child) for child in text_node.children])
+        return LeafNode(value=escape_text(text_node.text), tag=TAG_ITALIC)
+    
+    if text_type == TEXT_TYPE_CODE:
+        return LeafNode(value=escape_text(text_node.text), tag=TAG_CODE)
+    
+    if text_type == TEXT_TYPE_LINK:
+        return LeafNode(value=escape_text(text_node.text), tag=TAG_LINK, props={"href": text_node.url})
+    
+    if text_type == TEXT_TYPE_IMAGE:
+        return LeafNode(value="", tag=TAG_IMAGE, props={"src": text_node.url, "alt": text_node.text})
+    
+    else:
+        raise ValueError(f"Unsupported text node type: {text_type}")
+
+
+def split_nodes_delimiter(old_nodes, delimiter, text_type):
+
+    new_nodes = []
+    
+    for node in old_nodes:
+
+        if node.text_type == TEXT_TYPE_TEXT:
+
+            if delimiter in node.text:
+
+                parts = node.text.split(delimiter)
+
+                for i, part in enumerate(parts):
+                    if i % 2 == 0:
+                        new_nodes.append(TextNode(part, TEXT_TYPE_TEXT))
+                    else:
+                        new_nodes.append(TextNode(part, text_type))
+
+            else:
+                new_nodes.append(node)
+        else:
+            new_nodes.append(node)
+    return new_nodes
+
+def extract_markdown_images(text):
+    return re.findall(r"!\[(.*?)\]\((.*?)\)", text)
+
+def extract_markdown_links(text):
+    return re.findall(r"\[(.*?)\]\((.*?)\)", text)
+
+def split_nodes_images(old_nodes):
+    new_nodes = []
+    for node in old_nodes:
+        if node.text_type == TEXT_TYPE_TEXT:
+            text = node.text
+            while True:
+                images = extract_markdown_images(text)
+                if not images:
+                    break
+                description, url = images[0]
+                parts = text.split(f"![{description}]({url})", 1)
+                if parts[0]:
+                    new_nodes.append(TextNode(parts[0], TEXT_TYPE_TEXT))
+                new_nodes.append(TextNode(description, TEXT_TYPE_IMAGE, url))
+                text = parts[1]
+            if text:
+                new_nodes.append(TextNode(text, TEXT_TYPE_TEXT))
+        else:
+            new_nodes.append(node)
+    return new_nodes
+
+def split_nodes_links(old_nodes):
+    new_nodes = []
+    for node in old_nodes:
+        if node.text_type == TEXT_TYPE_TEXT:
+            text = node.text
+            while True:
+                links = extract_markdown_links(text)
+                if not links:
+                    break
+                description, url = links[0]
+                parts = text.split(f"[{description}]({url})", 1)
+                if parts[0]:
+                    new_nodes.append(TextNode(parts[0], TEXT_TYPE_TEXT))
+                new_nodes.append(TextNode(description, TEXT_TYPE_LINK, url))
+                text = parts[1]
+            if text:
+                new_nodes.append(TextNode(text, TEXT_TYPE_TEXT))
+        else:
+            new_nodes.append(node)
+    return new_nodes
+
+
+IMAGE_RE = re.compile(r"!\[([^\[\]]*)\]\(([^()]*)\)")
+LINK_RE = re.compile(r"\[([^\[\]]*)\]\(([^()]*)\)")
+INLINE_START_RE = re.compile(r"[`*!\[]")
+INLINE_CLOSE_RE = re.compile(r"`[^`]*`|!?\[[^\[\]]*\]\([^()]*\)|\*\*|\*")
+
+
+def is_intraword(text, start, end):
+    # A run of asterisks between two letters or digits, as in "2*3", is
+    # neither an opener nor a closer.
+    return 0 < start and end < len(text) and text[start - 1].isalnum() and text[end].isalnum()
+
+
+def find_closing_delimiter(text, delimiter, start):
+    # Code spans and links are opaque and a "**" never closes a "*" (or the
+    # other way round), so emphasis nested inside another span stays inside
+    # it. Like an opener, a closer has to hug the text it wraps.
+    for match in INLINE_CLOSE_RE.finditer(text, start):
+        end = match.start()
+        if (
+            match.group() == delimiter
+            and end > start
+            and not text[end - 1].isspace()
+            and not is_intraword(text, end, match.end())
+        ):
+            return end
+    return -1
+
+
+def text_to_textnodes(text):
+    nodes = []
+    plain_start = 0
+    i = 0
+
+    while True:
+        match = INLINE_START_RE.search(text, i)
+        if match is None:
+            break
+        i = match.start()
+        char = text[i]
+
+        if char == "`":
+            end = text.find("`", i + 1)
+            if end == -1:
+                raise ValueError(f"Invalid markdown: unclosed '`' at position {i}")
+            node = TextNode(text[i + 1:end], TEXT_TYPE_CODE)
+            next_i = end + 1
+
+        elif char == "*":
+            if text.startswith("**", i):
+                delimiter, text_type = "**", TEXT_TYPE_BOLD
+            else:
+                delimiter, text_type = "*", TEXT_TYPE_ITALIC
+            content_start = i + len(delimiter)
+            if (
+                content_start >= len(text)
+                or text[content_start].isspace()
+                or is_intraword(text, i, content_start)
+            ):
+                # "2 * 3", "2*3" or a stray "* " is plain text, not an opener.
+                i = content_start
+                continue
+            end = find_closing_delimiter(text, delimiter, content_start)
+            if end == -1:
+                # Nothing closes it ("match *.md files"), so it was never an
+                # opener either.
+                i = content_start
+                continue
+            content = text[content_start:end]
+            children = None
+            # Most spans are plain words, which don't need a second pass.
+            if INLINE_START_RE.search(content):
+                children = text_to_textnodes(content)
+                if len(children) == 1 and children[0].text_type == TEXT_TYPE_TEXT:
+                    children = None
+            node = TextNode(content, text_type, children=children)
+            next_i = end + len(delimiter)
+
+        else:
+            if char == "!":
+                link = IMAGE_RE.match(text, i)
+                text_type = TEXT_TYPE_IMAGE
+            else:
+                link = LINK_RE.match(text, i)
+                text_type = TEXT_TYPE_LINK
+            if link is None:
+                i += 1
+                continue
+            node = TextNode(link.group(1), text_type, link.group(2))
+            next_i = link.end()
+
+        if plain_start < i:
+            nodes.append(TextNode(text[plain_start:i], TEXT_TYPE_TEXT))
+        nodes.append(node)
+        i = plain_start = next_i
+
+    if plain_start < len(text):
+        nodes.append(TextNode(text[plain_start:], TEXT_TYPE_TEXT))
+
+    return nodes
+
+
+def iter_blocks(lines):
+    # Blank lines separate blocks, except inside a ``` fence, where they are
+    # part of the code. Only the current block is ever held in memory.
+    block = []
+    in_fence = False
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+
+        if line.count("```") % 2:
+            in_fence = not in_fence
+        elif not in_fence and not line.strip():
+            if block:
+                text = "\n".join(block).strip()
+                if text:
+                    yield text
+                block = []
+            continue
+
+        block.append(line)
+
+    if block:
+        text = "\n".join(block).strip()
+        if text:
+            yield text
+
+
+def iter_lines(source):
+    if isinstance(source, str):
+        return io.StringIO(source)
+
+    if isinstance(source, mmap.mmap):
+        source.seek(0)
+        return (line.decode("utf-8") for line in iter(source.readline, b""))
+
+    if hasattr(source, "readline"):
+        if isinstance(source, io.TextIOBase):
+            return source
+        return (line.decode("utf-8") for line in source)
+
+    raise TypeError(
+        f"Expected markdown text, a file object, an mmap or a path, got {type(source).__name__}"
+    )
+
+
+def iter_markdown_blocks(source):
+    # A plain str is markdown text; a file path has to be an os.PathLike
+    # (e.g. pathlib.Path) so the two can't be confused.
+    if isinstance(source, os.PathLike):
+        with open(source, encoding="utf-8") as f:
+            yield from iter_blocks(f)
+        return
+
+    yield from iter_blocks(iter_lines(source))
+
+
+def markdown_to_blocks(markdown):
+    return list(iter_markdown_blocks(markdown))
+
+block_type_paragraph = sys.intern("paragraph")
+block_type_heading = sys.intern("heading")
+block_type_code = sys.intern("code")
+block_type_quote = sys.intern("blockquote")
+block_type_unordered_list = sys.intern("unordered list")
+block_type_ordered_list = sys.intern("ordered list")
+
+HEADING_RE = re.compile(r"(#{1,6}) ")
+ORDERED_ITEM_RE = re.compile(r"\d+\. ")
+UNORDERED_MARKERS = ("* ", "- ")
+
+def classify_block(block):
+    # One pass over the block, dispatched on its first character. Returns
+    # the block type and its content with the markdown prefixes stripped:
+    # one entry per item for lists and per line for quotes, a single entry
+    # for headings, code and paragraphs. The block_to_* functions take this
+    # pair so the lines aren't split and scanned a second time.
+    first = block[:1]
+
+    if first == "#":
+        match = HEADING_RE.match(block)
+        if match:
+            level = match.end() - 1
+            return HEADING_TAGS[level - 1], [block[level:].strip()]
+
+    elif first == "`":
+        if block.startswith("```") and block.endswith("```"):
+            return block_type_code, [block.strip("```").strip()]
+
+    elif first == ">":
+        lines = []
+        for line in block.split("\n"):
+            if not line.startswith(">"):
+                break
+            lines.append(line.lstrip("> ").rstrip())
+        else:
+            return block_type_quote, lines
+
+    elif first == "*" or first == "-":
+        items = []
+        for line in block.split("\n"):
+            if line[:2] not in UNORDERED_MARKERS:
+                break
+            items.append(line[2:].strip())
+        else:
+            return block_type_unordered_list, items
+
+    elif first.isdigit():
+        items = []
+        for line in block.split("\n"):
+            match = ORDERED_ITEM_RE.match(line)
+            if match is None:
+                break
+            items.append(line[match.end():].strip())
+        else:
+            return block_type_ordered_list, items
+
+    return block_type_paragraph, [block.strip()]
+
+def block_to_block_types(block):
+    return classify_block(block)[0]
+
+def block_to_heading(block, classified=None):
+    tag, lines = classified or classify_block(block)
+
+    return HTMLNode(tag=tag, value=lines[0])
+
+def block_to_code(block, classified=None):
+    _, lines = classified or classify_block(block)
+
+    code_node = HTMLNode(tag=TAG_CODE, value=lines[0])
+
+    return HTMLNode(tag=TAG_PRE, value=code_node)
+
+def block_to_ordered_list(block, classified=None):
+    _, line_items = classified or classify_block(block)
+
+    li_nodes = [HTMLNode(tag=TAG_LIST_ITEM, value=item) for item in line_items]
+
+    return HTMLNode(tag=TAG_ORDERED_LIST, value=li_nodes)
+
+def block_to_unordered_list(block, classified=None):
+    _, line_items = classified or classify_block(block)
+
+    li_nodes = [HTMLNode(tag=TAG_LIST_ITEM, value=item) for item in line_items]
+
+    return HTMLNode(tag=TAG_UNORDERED_LIST, value=li_nodes)
+
+def block_to_quote(block, classified=None):
+    _, cleaned_lines = classified or classify_block(block)
+
+    joined_lines = "\n".join(cleaned_lines)
+
+    return HTMLNode(tag=TAG_QUOTE, value=joined_lines)
+
+def block_to_paragraph(block, classified=None):
+    _, lines = classified or classify_block(block)
+    return HTMLNode(tag=TAG_PARAGRAPH, value=lines[0])
+
+BLOCK_BUILDERS = {
+    block_type_paragraph: block_to_paragraph,
+    block_type_code: block_to_code,
+    block_type_quote: block_to_quote,
+    block_type_unordered_list: block_to_unordered_list,
+    block_type_ordered_list: block_to_ordered_list,
+}
+BLOCK_BUILDERS.update((tag, block_to_heading) for tag in HEADING_TAGS)
+
+
+def text_to_children(text):
+    return [text_node_to_html_node(node) for node in text_to_textnodes(text)]
+
+
+SLUG_STRIP_RE = re.compile(r"[^\w\s-]")
+SLUG_SPACE_RE = re.compile(r"\s+")
+
+
+def plain_text(text_nodes):
+    return "".join(
+        plain_text(node.children) if node.children else node.text for node in text_nodes
+    )
+
+
+def heading_id(text_nodes):
+    # GitHub-style anchor: the heading's text in lower case, punctuation
+    # dropped and spaces turned into hyphens. Blocks render on their own (and
+    # are cached that way), so a repeated heading repeats its id.
+    text = SLUG_STRIP_RE.sub("", plain_text(text_nodes).lower())
+    return SLUG_SPACE_RE.sub("-", text.strip())
+
+
+def block_node_to_html_node(node):
+    # The block_to_* functions describe a block as an HTMLNode whose value is
+    # raw inline markdown, a nested block node, or a list of them. Turn that
+    # into renderable Leaf/ParentNodes, parsing the inline markdown on the way.
+    if node.tag == TAG_CODE:
+        return LeafNode(value=escape_text(node.value), tag=TAG_CODE)
+
+    value = node.value
+    props = None
+    if isinstance(value, HTMLNode):
+        children = [block_node_to_html_node(value)]
+    elif isinstance(value, list):
+        children = [block_node_to_html_node(child) for child in value]
+    elif node.tag in HEADING_TAGS:
+        # Headings get an id, so links to #their-text have a target.
+        text_nodes = text_to_textnodes(value)
+        children = [text_node_to_html_node(text_node) for text_node in text_nodes]
+        slug = heading_id(text_nodes)
+        if slug:
+            props = {"id": slug}
+    else:
+        children = text_to_children(value)
+
+    if not children:
+        return LeafNode(value="", tag=node.tag)
+    return ParentNode(node.tag, children, props)
+
+
+def block_to_html_node(block):
+    classified = classify_block(block)
+    node = BLOCK_BUILDERS[classified[0]](block, classified)
+    return block_node_to_html_node(node)
+
+
+def markdown_to_html(markdown, cache=None):
+    # markdown can be text, a file object, an mmap or a path; blocks are read
+    # lazily so only the output tree grows with the size of the document.
+    if cache is None:
+        html_nodes = [block_to_html_node(block) for block in iter_markdown_blocks(markdown)]
+    else:
+        html_nodes = []
+        for block in iter_markdown_blocks(markdown):
+            # A cached block comes back as its rendered fragment, which a
+            # tagless LeafNode emits verbatim.
+            html = cache.get(block)
+            if html is None:
+                html = block_to_html_node(block).to_html()
+                cache.put(block, html)
+            html_nodes.append(LeafNode(value=html))
+
+    if not html_nodes:
+        return LeafNode(value="", tag=TAG_DIV)
+    return ParentNode(TAG_DIV, html_nodes)
@@ -0,0 +1,154 @@
+import errno
+import os
+
+COPY_MODE_COPY = "copy"
+COPY_MODE_HARDLINK = "hardlink"
+COPY_MODE_REFLINK = "reflink"
+COPY_MODES = (COPY_MODE_COPY, COPY_MODE_HARDLINK, COPY_MODE_REFLINK)
+
+# ioctl request number for FICLONE on Linux (btrfs, xfs, ...).
+FICLONE = 0x40049409
+
+# errno values meaning "this fast path is not available here, try the next".
+FALLBACK_ERRNOS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP, errno.ENOTTY}
+
+
+def default_workers():
+    return min(32, (os.cpu_count() or 1) * 4)
+
+
+def scan_tree(root):
+    dirs = []
+    files = []
+    stack = [""]
+    while stack:
+        rel_dir = stack.pop()
+        with os.scandir(os.path.join(root, rel_dir)) as entries:
+            for entry in entries:
+                rel_path = os.path.join(rel_dir, entry.name)
+                if entry.is_dir():
+                    dirs.append(rel_path)
+                    stack.append(rel_path)
+                elif entry.is_file():
+                    files.append((rel_path, entry.stat()))
+    return dirs, files
+
+
+def make_dirs(dest, rel_dirs):
+    os.makedirs(dest, exist_ok=True)
+    for rel_dir in rel_dirs:
+        os.makedirs(os.path.join(dest, rel_dir), exist_ok=True)
+
+
+def copy_contents(src_fd, dst_fd, size):
+    if hasattr(os, "copy_file_range"):
+        try:
+            copied = 0
+            while copied < size:
+                sent = os.copy_file_range(src_fd, dst_fd, size - copied)
+                if sent == 0:
+                    break
+                copied += sent
+            return
+        except OSError as e:
+            if e.errno not in FALLBACK_ERRNOS:
+                raise
+            os.lseek(src_fd, 0, os.SEEK_SET)
+            os.lseek(dst_fd, 0, os.SEEK_SET)
+            os.ftruncate(dst_fd, 0)
+
+    if hasattr(os, "sendfile"):
+        try:
+            offset = 0
+            while offset < size:
+                sent = os.sendfile(dst_fd, src_fd, offset, size - offset)
+                if sent == 0:
+                    break
+                offset += sent
+            return
+        except OSError as e:
+            if e.errno not in FALLBACK_ERRNOS:
+                raise
+            os.lseek(dst_fd, 0, os.SEEK_SET)
+            os.ftruncate(dst_fd, 0)
+
+    # shutil pulls in the compression modules; only this fallback needs it.
+    import shutil
+
+    with os.fdopen(os.dup(src_fd), "rb") as src, os.fdopen(os.dup(dst_fd), "wb") as dst:
+        src.seek(0)
+        shutil.copyfileobj(src, dst)
+
+
+def reflink(src_fd, dst_fd):
+    try:
+        import fcntl
+    except ImportError:
+        return False
+    try:
+        fcntl.ioctl(dst_fd, FICLONE, src_fd)
+    except OSError as e:
+        if e.errno not in FALLBACK_ERRNOS:
+            raise
+        return False
+    return True
+
+
+def copy_file(source, dest, mode=COPY_MODE_COPY):
+    # Never write through an existing output: in hardlink mode it may share
+    # its inode with the source.
+    try:
+        os.unlink(dest)
+    except FileNotFoundError:
+        pass
+
+    if mode == COPY_MODE_HARDLINK:
+        try:
+            os.link(source, dest)
+            return os.stat(dest).st_size
+        except OSError as e:
+            if e.errno not in FALLBACK_ERRNOS | {errno.EPERM, errno.EMLINK}:
+                raise
+
+    src_fd = os.open(source, os.O_RDONLY)
+    try:
+        size = os.fstat(src_fd).st_size
+        dst_fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            if mode != COPY_MODE_REFLINK or not reflink(src_fd, dst_fd):
+                copy_contents(src_fd, dst_fd, size)
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    return size
+
+
+def run_parallel(func, items, workers=None):
+    items = list(items)
+    if not items:
+        return []
+    workers = workers or default_workers()
+    if workers == 1 or len(items) == 1:
+        return [func(item) for item in items]
+    # Imported here: concurrent.futures costs several ms of startup, which a
+    # no-op build shouldn't pay.
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=min(workers, len(items))) as executor:
+        return list(executor.map(func, items))
+
+
+def copy_tree(source, dest, mode=COPY_MODE_COPY, workers=None):
+    if mode not in COPY_MODES:
+        raise ValueError(f"Unknown copy mode: {mode}")
+
+    dirs, files = scan_tree(source)
+    make_dirs(dest, dirs)
+
+    def copy_one(item):
+        rel_path, _ = item
+        return copy_file(os.path.join(source, rel_path), os.path.join(dest, rel_path), mode)
+
+    sizes = run_parallel(copy_one, files, workers)
+    return {"files": len(files), "bytes": sum(sizes)}
@@ -0,0 +1,118 @@
+import json
+import os
+import posixpath
+from urllib.parse import urlsplit
+
+from .conversion import extract_markdown_links
+
+# Bump when the recorded fields change meaning, so graphs written by an
+# older build are discarded and the next build starts cold.
+DEPGRAPH_VERSION = 1
+
+
+def site_path(dest_path, dest_dir):
+    # Output paths are stored relative to the site root with "/" separators,
+    # the same form internal links resolve to. Paths joined onto dest_dir,
+    # which is nearly all of them, skip relpath and its two abspath calls.
+    prefix = os.path.join(dest_dir, "")
+    if dest_path.startswith(prefix):
+        rel_path = os.path.normpath(dest_path[len(prefix):])
+    else:
+        rel_path = os.path.relpath(dest_path, dest_dir)
+    return rel_path.replace(os.sep, "/")
+
+
+def resolve_link(url, page):
+    # Returns the site path a link from `page` points at, or None for
+    # external links, fragment-only links and links escaping the site.
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+    if parts.path.startswith("/"):
+        path = parts.path.lstrip("/")
+    else:
+        path = posixpath.join(posixpath.dirname(page), parts.path)
+    path = posixpath.normpath(path) if path else "."
+    if path == ".." or path.startswith("../"):
+        return None
+    if path == "." or parts.path.endswith("/"):
+        path = posixpath.join(path, "index.html") if path != "." else "index.html"
+    return path
+
+
+def internal_links(markdown, page):
+    # Images are included: they are outputs too, and a page is affected
+    # when one it references appears or disappears.
+    links = set()
+    for _, url in extract_markdown_links(markdown):
+        target = resolve_link(url.strip(), page)
+        if target is not None and target != page:
+            links.add(target)
+    return sorted(links)
+
+
+class DepGraph:
+    # For every page source: its output (a site path), the template and
+    # fragments it was rendered with and the site paths it links to.
+    def __init__(self, path=None, load=True):
+        self.path = path
+        self.pages = {}
+        if path and load:
+            self.load()
+
+    def __len__(self):
+        return len(self.pages)
+
+    def __contains__(self, source):
+        return os.path.normpath(source) in self.pages
+
+    def record(self, source, output, template, links=(), fragments=(), key=None):
+        # key is generate_pages' page key, None when the page was rendered
+        # without one (the watcher's rebuilds).
+        self.pages[os.path.normpath(source)] = {
+            "output": output,
+            "template": os.path.normpath(template),
+            "fragments": sorted(os.path.normpath(path) for path in fragments),
+            "links": sorted(links),
+            "key": key,
+        }
+
+    def remove(self, source):
+        return self.pages.pop(os.path.normpath(source), None)
+
+    def affected(self, changed, outputs=()):
+        # Sources to rebuild after `changed` files were edited and the
+        # `outputs` site paths were created or deleted. Rebuilding a page
+        # never creates or deletes an output, so pages reached through
+        # links don't affect anything further.
+        changed = {os.path.normpath(path) for path in changed}
+        outputs = set(outputs)
+        sources = set()
+        for source, entry in self.pages.items():
+            if (source in changed
+                    or entry["template"] in changed
+                    or not changed.isdisjoint(entry["fragments"])
+                    or not outputs.isdisjoint(entry["links"])):
+                sources.add(source)
+        return sources
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        if data.get("version") != DEPGRAPH_VERSION:
+            return
+        self.pages = data.get("pages", {})
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        data = {"version": DEPGRAPH_VERSION, "pages": self.pages}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, sort_keys=True)
+        os.replace(tmp_path, self.path)
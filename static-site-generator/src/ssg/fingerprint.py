@@ -0,0 +1,119 @@
+import json
+import os
+import posixpath
+import re
+
+from .copier import COPY_MODE_REFLINK, copy_file, run_parallel
+from .depgraph import resolve_link
+
+ASSET_MANIFEST = "asset-manifest.json"
+
+FINGERPRINT_EXTENSIONS = {
+    ".css", ".js", ".mjs", ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg",
+    ".ico", ".woff", ".woff2", ".ttf", ".otf", ".mp4", ".webm", ".mp3", ".pdf", ".wasm",
+}
+
+# Hex digits of the content hash kept in the file name.
+FINGERPRINT_LENGTH = 8
+
+# src="..."/href='...'/src=... as written by the template and by
+# HTMLNode.props_to_html, which leaves safe values unquoted.
+URL_ATTR_RE = re.compile(r"""(\s(?:src|href)=)(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+))""")
+
+
+def is_fingerprintable(rel_path):
+    # Decided by type alone: a source that happens to look fingerprinted,
+    # like report.20240101.pdf, still gets a real fingerprint.
+    return os.path.splitext(rel_path)[1].lower() in FINGERPRINT_EXTENSIONS
+
+
+def fingerprinted_name(rel_path, digest):
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}.{digest[:FINGERPRINT_LENGTH]}{ext}"
+
+
+def load_asset_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def fingerprint_assets(dest, hashes, workers=None):
+    # hashes maps paths relative to dest to their sha256, as recorded by
+    # the static copy's manifest, so nothing is hashed twice. Each asset
+    # gets a sibling named after its content; the original name is kept for
+    # anything that links to it directly.
+    manifest_path = os.path.join(dest, ASSET_MANIFEST)
+    old_assets = load_asset_manifest(manifest_path)
+    assets = {
+        rel_path.replace(os.sep, "/"): fingerprinted_name(rel_path, digest).replace(os.sep, "/")
+        for rel_path, digest in hashes.items()
+        if is_fingerprintable(rel_path)
+    }
+
+    # A fingerprinted name only ever holds one content, so an existing file
+    # is already up to date. Reflinks fall back to a copy; a hardlink would
+    # let an in-place edit of the source change an immutable URL's bytes.
+    pending = [
+        (path, name) for path, name in assets.items()
+        if not os.path.exists(os.path.join(dest, name))
+    ]
+    run_parallel(
+        lambda item: copy_file(os.path.join(dest, item[0]), os.path.join(dest, item[1]), COPY_MODE_REFLINK),
+        pending, workers,
+    )
+
+    current = set(assets.values())
+    removed = []
+    for name in sorted(set(old_assets.values()) - current):
+        path = os.path.join(dest, name)
+        if os.path.exists(path):
+            os.remove(path)
+        removed.append(name)
+
+    if assets != old_assets:
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(assets, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+
+    return {"assets": assets, "written": sorted(name for _, name in pending), "removed": removed}
+
+
+class AssetRewriter:
+    # Page transform for generate_pages: points src/href attributes at the
+    # fingerprinted names and reports every internal path the page
+    # references, template links included, for the dependency graph.
+    def __init__(self, assets):
+        self.assets = assets
+
+    def cache_key(self):
+        return "assets:" + json.dumps(self.assets, sort_keys=True)
+
+    def __call__(self, html, page):
+        references = set()
+
+        def replace(match):
+            prefix, double, single, bare = match.groups()
+            url = double if double is not None else single if single is not None else bare
+            target = resolve_link(url, page)
+            if target is None:
+                return match.group(0)
+            references.add(target)
+
+            name = self.assets.get(target)
+            if name is None:
+                return match.group(0)
+            # Swap only the last path segment, so relative URLs stay relative
+            # and any query or fragment is kept.
+            path_end = len(url.split("#", 1)[0].split("?", 1)[0])
+            new_url = url[:url.rfind("/", 0, path_end) + 1] + posixpath.basename(name) + url[path_end:]
+            if double is not None:
+                return f'{prefix}"{new_url}"'
+            if single is not None:
+                return f"{prefix}'{new_url}'"
+            return prefix + new_url
+
+        return URL_ATTR_RE.sub(replace, html), references
@@ -0,0 +1,116 @@
+import html
+import re
+import sys
+
+# Characters that can't appear in an unquoted attribute value.
+UNQUOTED_UNSAFE_RE = re.compile(r"[\s\"'=<>`]")
+
+TAG_BOLD = sys.intern("b")
+TAG_ITALIC = sys.intern("i")
+TAG_CODE = sys.intern("code")
+TAG_LINK = sys.intern("a")
+TAG_IMAGE = sys.intern("img")
+TAG_PARAGRAPH = sys.intern("p")
+TAG_PRE = sys.intern("pre")
+TAG_QUOTE = sys.intern("blockquote")
+TAG_ORDERED_LIST = sys.intern("ol")
+TAG_UNORDERED_LIST = sys.intern("ul")
+TAG_LIST_ITEM = sys.intern("li")
+TAG_DIV = sys.intern("div")
+HEADING_TAGS = tuple(sys.intern(f"h{level}") for level in range(1, 7))
+
+
+class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+    def to_html(self):
+        raise NotImplementedError
+
+    def iter_html(self):
+        yield self.to_html()
+
+    def write_html(self, fp):
+        for chunk in self.iter_html():
+            fp.write(chunk)
+    
+    def props_to_html(self):
+        string = " "
+        for key, value in self.props.items():
+            value = "" if value is None else str(value)
+            if not value or UNQUOTED_UNSAFE_RE.search(value):
+                value = '"' + html.escape(value) + '"'
+            string += f"{key}={value} "
+        return string 
+    
+    def __eq__(self, other):
+        if isinstance(other, HTMLNode):
+            return self.tag == other.tag and self.value == other.value
+        return False
+    
+    def __repr__(self):
+        return f"HTMLNode(tag={self.tag}, value={self.value})"
+    
+class LeafNode(HTMLNode):
+    __slots__ = ()
+
+    def __init__(self, value, tag=None, props=None):
+        if value is None:
+            raise ValueError("LeafNode requires a value")
+        super().__init__(tag=tag, value=value, children=None, props=props)
+        self.children = None
+
+    def to_html(self):
+        if self.tag == None:
+            return self.value
+        else:
+            props_str = self.props_to_html() if self.props else ""
+            return f"<{self.tag}{props_str}>{self.value}</{self.tag}>"
+
+
+class ParentNode(HTMLNode):
+    __slots__ = ()
+
+    def __init__(self, tag, children, props=None):
+        if not tag:
+            raise ValueError("ParentNode must have a tag")
+        
+        if not children:
+            raise ValueError("ParentNode must have children")
+        
+        super().__init__(tag=tag, value=None, children=children, props=props)
+
+    def validate(self):
+        if not self.tag:
+            raise ValueError("ParentNode must have a tag")
+        
+        if not self.children:
+            raise ValueError("ParentNode must have children")
+
+    def to_html(self):
+        return "".join(self.iter_html())
+
+    def iter_html(self):
+        # Walk the tree with an explicit stack so deep trees don't hit the
+        # recursion limit. Closing tags are pushed as plain strings and come
+        # back out once all of the node's children have been emitted.
+        stack = [self]
+        while stack:
+            node = stack.pop()
+
+            if isinstance(node, str):
+                yield node
+
+            elif isinstance(node, ParentNode):
+                node.validate()
+                props_str = node.props_to_html() if node.props else ""
+                yield f"<{node.tag}{props_str}>"
+                stack.append(f"</{node.tag}>")
+                stack.extend(reversed(node.children))
+
+            else:
+                yield node.to_html()
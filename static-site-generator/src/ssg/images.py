@@ -0,0 +1,234 @@
+import json
+import os
+import re
+import struct
+
+from .copier import COPY_MODE_REFLINK, copy_file
+from .depgraph import resolve_link
+from .fingerprint import URL_ATTR_RE
+
+# Pillow's Image module once pillow() has looked for it, None when it isn't
+# installed. Importing it takes tens of milliseconds, so sites without
+# images never do.
+Image = False
+
+IMAGE_MANIFEST = "image-manifest.json"
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".webp"}
+# Formats variants are encoded in; GIFs may be animated and are left alone.
+RESIZABLE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".webp"}
+
+# Widths of the responsive variants. Only those narrower than the original
+# are produced; the original is always the largest srcset candidate.
+VARIANT_WIDTHS = (320, 640, 960, 1280, 1920)
+
+IMG_TAG_RE = re.compile(r"<img\b[^>]*>")
+
+JPEG_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF,
+}
+
+
+def jpeg_size(f):
+    # Walks the segment headers after SOI until a start-of-frame segment,
+    # which holds the height and width.
+    f.seek(2)
+    while True:
+        if f.read(1) != b"\xff":
+            return None
+        byte = f.read(1)
+        while byte == b"\xff":
+            byte = f.read(1)
+        if not byte:
+            return None
+        marker = byte[0]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            continue
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if marker in JPEG_SOF_MARKERS:
+            data = f.read(5)
+            if len(data) < 5:
+                return None
+            height, width = struct.unpack(">HH", data[1:5])
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+
+
+def webp_size(header):
+    chunk = header[12:16]
+    if chunk == b"VP8 " and len(header) >= 30:
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and len(header) >= 25:
+        bits = int.from_bytes(header[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X" and len(header) >= 30:
+        return int.from_bytes(header[24:27], "little") + 1, int.from_bytes(header[27:30], "little") + 1
+    return None
+
+
+def image_size(path):
+    # Reads just enough of the file header to find the dimensions, so no
+    # imaging library is needed to give <img> tags a width and height.
+    with open(path, "rb") as f:
+        header = f.read(32)
+        if header.startswith(b"\x89PNG\r\n\x1a\n") and header[12:16] == b"IHDR":
+            return struct.unpack(">II", header[16:24])
+        if header[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", header[6:10])
+        if header.startswith(b"RIFF") and header[8:12] == b"WEBP":
+            return webp_size(header)
+        if header.startswith(b"\xff\xd8"):
+            return jpeg_size(f)
+    return None
+
+
+def variant_name(rel_path, digest, width):
+    # Variants are named after the source's content hash, so they get the
+    # same immutable caching as fingerprinted assets.
+    root, ext = os.path.splitext(rel_path)
+    return f"{root}-{width}w.{digest[:8]}{ext}"
+
+
+def pillow():
+    global Image
+    if Image is False:
+        try:
+            from PIL import Image
+        except ImportError:
+            Image = None
+    return Image
+
+
+def variant_widths(rel_path, width):
+    if pillow() is None or os.path.splitext(rel_path)[1].lower() not in RESIZABLE_EXTENSIONS:
+        return []
+    return [variant for variant in VARIANT_WIDTHS if variant < width]
+
+
+def encode_variant(source, cache_path, width):
+    Image = pillow()
+    with Image.open(source) as image:
+        height = max(1, round(image.height * width / image.width))
+        resized = image.resize((width, height), Image.LANCZOS)
+        options = {"optimize": True}
+        if image.format == "JPEG":
+            options["quality"] = 85
+        # The cache may be shared by shard builds running side by side.
+        tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+        resized.save(tmp_path, format=image.format, **options)
+    os.replace(tmp_path, cache_path)
+    return cache_path
+
+
+def load_image_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def process_images(dest, hashes, cache_dir, assets=None, workers=None):
+    # hashes maps paths relative to dest to their sha256, as recorded by the
+    # static copy's manifest. Encoded variants live in cache_dir under the
+    # source hash and width, so an image is only re-encoded when its bytes
+    # change; dest just gets a copy of what the cache already holds.
+    assets = assets or {}
+    images = {}
+    jobs = []
+    for rel_path, digest in sorted(hashes.items()):
+        if os.path.splitext(rel_path)[1].lower() not in IMAGE_EXTENSIONS:
+            continue
+        size = image_size(os.path.join(dest, rel_path))
+        if size is None:
+            continue
+        site_path = rel_path.replace(os.sep, "/")
+        width, height = size
+        srcset = []
+        for variant in variant_widths(rel_path, width):
+            name = variant_name(site_path, digest, variant)
+            cache_path = os.path.join(cache_dir, f"{digest[:16]}-{variant}{os.path.splitext(rel_path)[1]}")
+            jobs.append((os.path.join(dest, rel_path), cache_path, variant, os.path.join(dest, name)))
+            srcset.append((variant, name))
+        srcset.append((width, assets.get(site_path, site_path)))
+        images[site_path] = {"width": width, "height": height, "srcset": srcset}
+
+    missing = [job for job in jobs if not os.path.exists(job[1])]
+    if missing:
+        os.makedirs(cache_dir, exist_ok=True)
+        workers = min(workers or os.cpu_count() or 1, len(missing))
+        if workers == 1:
+            for source, cache_path, width, _ in missing:
+                encode_variant(source, cache_path, width)
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                list(executor.map(encode_variant, *zip(*[job[:3] for job in missing])))
+
+    written = []
+    for _, cache_path, _, variant_path in jobs:
+        if not os.path.exists(variant_path):
+            copy_file(cache_path, variant_path, COPY_MODE_REFLINK)
+            written.append(os.path.relpath(variant_path, dest))
+
+    manifest_path = os.path.join(dest, IMAGE_MANIFEST)
+    old_manifest = load_image_manifest(manifest_path)
+    variants = sorted(os.path.relpath(job[3], dest).replace(os.sep, "/") for job in jobs)
+    removed = sorted(set(old_manifest.get("variants", [])) - set(variants))
+    for name in removed:
+        path = os.path.join(dest, name)
+        if os.path.exists(path):
+            os.remove(path)
+
+    # Round-tripped through JSON so the comparison sees lists, not tuples.
+    manifest = json.loads(json.dumps({"images": images, "variants": variants}))
+    if manifest != old_manifest:
+        os.makedirs(dest, exist_ok=True)
+        tmp_path = manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, manifest_path)
+
+    return {"images": images, "encoded": len(missing), "written": sorted(written), "removed": removed}
+
+
+class ImageRewriter:
+    # Page transform for generate_pages: gives every <img> pointing at a
+    # known image its intrinsic width and height, so the browser reserves
+    # the space before it loads, and a srcset when variants exist. Runs
+    # before AssetRewriter, which then fingerprints the src.
+    def __init__(self, images):
+        self.images = images
+
+    def cache_key(self):
+        return "images:" + json.dumps(self.images, sort_keys=True)
+
+    def __call__(self, html, page):
+        references = set()
+
+        def annotate(match):
+            tag = match.group(0)
+            if " width=" in tag or " srcset=" in tag:
+                return tag
+            src = URL_ATTR_RE.search(tag)
+            if src is None or not src.group(1).endswith("src="):
+                return tag
+            url = next(group for group in src.groups()[1:] if group is not None)
+            target = resolve_link(url, page)
+            image = self.images.get(target)
+            if image is None:
+                return tag
+            references.add(target)
+
+            attrs = f' width={image["width"]} height={image["height"]}'
+            if len(image["srcset"]) > 1:
+                candidates = ", ".join(f"/{name} {width}w" for width, name in image["srcset"])
+                attrs += f' srcset="{candidates}"'
+            return "<img" + attrs + tag[4:]
+
+        return IMG_TAG_RE.sub(annotate, html), references
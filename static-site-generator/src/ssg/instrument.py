@@ -0,0 +1,212 @@
+import _thread
+import functools
+import heapq
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager, nullcontext
+
+# conversion.py functions wrapped while instrumentation is enabled. Times are
+# inclusive: markdown_to_html's total contains the text_to_textnodes calls
+# made on its behalf. iter_markdown_blocks is the block splitter the build
+# calls; as a generator, its time is the sum of its steps.
+CONVERSION_FUNCTIONS = (
+    "markdown_to_html",
+    "iter_markdown_blocks",
+    "classify_block",
+    "block_to_html_node",
+    "block_node_to_html_node",
+    "text_to_textnodes",
+    "text_node_to_html_node",
+)
+
+# code.co_flags bit set for generator functions (inspect.CO_GENERATOR,
+# without importing inspect).
+CO_GENERATOR = 0x20
+
+_recorder = None
+_patched = []
+
+
+class Recorder:
+    def __init__(self):
+        self.origin = time.perf_counter()
+        self.stages = {}
+        self.functions = {}
+        self.pages = []
+        self.events = []
+        # _thread rather than threading, which a build doesn't otherwise load.
+        self.lock = _thread.allocate_lock()
+
+    def timestamp_us(self, t):
+        return (t - self.origin) * 1e6
+
+    @contextmanager
+    def stage(self, name):
+        stats = self.stages.setdefault(
+            name, {"calls": 0, "seconds": 0.0, "bytes_read": 0, "bytes_written": 0}
+        )
+        start = time.perf_counter()
+        try:
+            yield stats
+        finally:
+            elapsed = time.perf_counter() - start
+            stats["calls"] += 1
+            stats["seconds"] += elapsed
+            self.events.append({
+                "name": name, "cat": "stage", "ph": "X",
+                "ts": self.timestamp_us(start), "dur": elapsed * 1e6,
+                "pid": os.getpid(), "tid": _thread.get_ident(),
+            })
+
+    def count_bytes(self, stage, read=0, written=0):
+        stats = self.stages.setdefault(
+            stage, {"calls": 0, "seconds": 0.0, "bytes_read": 0, "bytes_written": 0}
+        )
+        stats["bytes_read"] += read
+        stats["bytes_written"] += written
+
+    def record_call(self, name, elapsed):
+        with self.lock:
+            stats = self.functions.setdefault(name, {"calls": 0, "seconds": 0.0})
+            stats["calls"] += 1
+            stats["seconds"] += elapsed
+
+    def record_page(self, path, start, elapsed, bytes_read, bytes_written, pid=None):
+        # start is a time.perf_counter() value. On Linux that clock is
+        # CLOCK_MONOTONIC, so timestamps taken in pool workers line up.
+        self.pages.append((elapsed, path))
+        self.count_bytes("pages", bytes_read, bytes_written)
+        self.events.append({
+            "name": path, "cat": "page", "ph": "X",
+            "ts": self.timestamp_us(start), "dur": elapsed * 1e6,
+            "pid": os.getpid(), "tid": pid or os.getpid(),
+        })
+
+    def report(self, slowest=10):
+        return {
+            "stages": self.stages,
+            "functions": dict(sorted(
+                self.functions.items(), key=lambda item: item[1]["seconds"], reverse=True
+            )),
+            "pages": {
+                "count": len(self.pages),
+                "seconds": sum(elapsed for elapsed, _ in self.pages),
+                "slowest": [
+                    {"path": path, "seconds": elapsed}
+                    for elapsed, path in heapq.nlargest(slowest, self.pages)
+                ],
+            },
+        }
+
+    def chrome_trace(self):
+        return {"traceEvents": self.events, "displayTimeUnit": "ms"}
+
+
+def enabled():
+    return _recorder is not None
+
+
+def recorder():
+    return _recorder
+
+
+def stage(name):
+    if _recorder is None:
+        return nullcontext()
+    return _recorder.stage(name)
+
+
+def count_bytes(stage_name, read=0, written=0):
+    if _recorder is not None:
+        _recorder.count_bytes(stage_name, read, written)
+
+
+def record_page(path, start, elapsed, bytes_read, bytes_written, pid=None):
+    if _recorder is not None:
+        _recorder.record_page(path, start, elapsed, bytes_read, bytes_written, pid)
+
+
+def wrap_generator(name, func, target):
+    # Creating the generator does no work; each step is timed instead, and
+    # the total is recorded once it is exhausted or closed.
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        generator = func(*args, **kwargs)
+        elapsed = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    item = next(generator)
+                except StopIteration:
+                    return
+                finally:
+                    elapsed += time.perf_counter() - start
+                yield item
+        finally:
+            generator.close()
+            target.record_call(name, elapsed)
+    return wrapper
+
+
+def wrap(name, func, target):
+    if func.__code__.co_flags & CO_GENERATOR:
+        return wrap_generator(name, func, target)
+    # A recursive call (text_to_textnodes on an emphasis span's content) is
+    # passed straight through: its time is already inside the outer call's.
+    depth = [0]
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if depth[0]:
+            return func(*args, **kwargs)
+        depth[0] += 1
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            depth[0] -= 1
+            target.record_call(name, time.perf_counter() - start)
+    return wrapper
+
+
+def enable():
+    # Swap the conversion functions for timing wrappers, both in conversion
+    # itself (so internal calls are counted) and in every module that did a
+    # "from conversion import ...". Nothing is wrapped while disabled, so the
+    # normal build pays nothing for this.
+    global _recorder
+    if _recorder is not None:
+        return _recorder
+
+    from . import conversion
+
+    _recorder = Recorder()
+    for name in CONVERSION_FUNCTIONS:
+        original = getattr(conversion, name)
+        wrapper = wrap(name, original, _recorder)
+        for module in list(sys.modules.values()):
+            if getattr(module, name, None) is original:
+                setattr(module, name, wrapper)
+                _patched.append((module, name, original))
+    return _recorder
+
+
+def disable():
+    global _recorder
+    for module, name, original in reversed(_patched):
+        setattr(module, name, original)
+    _patched.clear()
+    _recorder = None
+
+
+def write_report(path, slowest=10):
+    with open(path, "w") as f:
+        json.dump(_recorder.report(slowest), f, indent=2)
+
+
+def write_trace(path):
+    with open(path, "w") as f:
+        json.dump(_recorder.chrome_trace(), f)
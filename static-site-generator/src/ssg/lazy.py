@@ -0,0 +1,90 @@
+import hashlib
+import os
+import posixpath
+import threading
+
+from .blockcache import BlockCache
+from .pages import render_page
+from .templates import load_template
+
+
+def source_digest(data):
+    return hashlib.blake2b(data, digest_size=16).digest()
+
+
+class LazySite:
+    # Serves a site straight from its sources: a page is rendered the first
+    # time it is requested and static files are read from static_dir, so
+    # nothing is built up front and the first preview costs one page
+    # however large the site is.
+    #
+    # Rendered pages stay in memory keyed by the source's (mtime, size),
+    # which costs one stat per request. When that moves, the source is read
+    # and hashed, and only re-rendered if its bytes (or the template's)
+    # actually changed, so a touch or an editor's save-without-changes
+    # doesn't cost a render.
+    def __init__(self, content_dir, static_dir, template_path, cache_size=10000):
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.block_cache = BlockCache(cache_size)
+        self.pages = {}
+        self.renders = 0
+        # BlockCache isn't thread-safe, and rendering one page at a time is
+        # plenty for a single person previewing.
+        self.lock = threading.Lock()
+
+    def resolve(self, url_path):
+        # Maps a normalized URL path to ("static", file path), ("page",
+        # markdown path), ("redirect", url) or None.
+        rel_path = url_path.lstrip("/")
+        if rel_path == "" or rel_path.endswith("/"):
+            rel_path += "index.html"
+        parts = rel_path.split("/")
+        if any(part in ("", ".", "..") for part in parts):
+            return None
+        native = os.path.join(*parts)
+
+        static_path = os.path.join(self.static_dir, native)
+        if os.path.isfile(static_path):
+            return "static", static_path
+
+        root, ext = posixpath.splitext(rel_path)
+        if ext == ".html":
+            source = os.path.join(self.content_dir, os.path.join(*root.split("/")) + ".md")
+            if os.path.isfile(source):
+                return "page", source
+        elif ext == "":
+            # /blog -> /blog/ when there is a blog/index.md or static
+            # blog/index.html, like a built site's directory redirect.
+            if (os.path.isfile(os.path.join(self.content_dir, native, "index.md"))
+                    or os.path.isfile(os.path.join(self.static_dir, native, "index.html"))):
+                return "redirect", url_path + "/"
+        return None
+
+    def render(self, source):
+        # Returns the page's HTML bytes and an ETag derived from the source
+        # and template bytes, which stays put when only an mtime moves.
+        with self.lock:
+            # Hashes the template and its partials, which are small.
+            template = load_template(self.template_path)
+            stat = os.stat(source)
+            key = (stat.st_mtime_ns, stat.st_size, template.digest)
+            entry = self.pages.get(source)
+            if entry is not None and entry["key"] == key:
+                return entry["html"], entry["etag"]
+
+            with open(source, "rb") as f:
+                data = f.read()
+            digest = source_digest(data) + template.digest.encode()
+            if entry is None or entry["digest"] != digest:
+                default_title = os.path.splitext(os.path.basename(source))[0]
+                try:
+                    html = render_page(data.decode("utf-8"), template, default_title, self.block_cache)
+                except ValueError as e:
+                    raise ValueError(f"{source}: {e}") from e
+                entry = {"html": html.encode("utf-8"), "digest": digest, "etag": f'"{source_digest(digest).hex()}"'}
+                self.renders += 1
+            entry["key"] = key
+            self.pages[source] = entry
+            return entry["html"], entry["etag"]
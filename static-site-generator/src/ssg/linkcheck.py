@@ -0,0 +1,298 @@
+import filecmp
+import heapq
+import html
+import json
+import os
+import re
+import time
+from urllib.parse import quote, unquote, urlsplit
+
+from .depgraph import resolve_link, site_path
+
+SITEMAP = "sitemap.xml"
+FEED = "feed.xml"
+
+# The sitemap protocol's limit per file; larger sites get numbered sitemaps
+# and sitemap.xml becomes their index.
+SITEMAP_MAX_URLS = 50000
+FEED_ITEMS = 20
+
+# Same attribute forms as fingerprint.URL_ATTR_RE: quoted, or unquoted as
+# HTMLNode.props_to_html writes safe values.
+ATTR_RE = re.compile(r"""\s(src|href|id)=(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+))""")
+TITLE_RE = re.compile(r"<title>(.*?)</title>", re.DOTALL)
+
+# RFC 822 names, independent of the locale (and of email.utils, which
+# pulls in socket and friends at import).
+DAY_NAMES = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+MONTH_NAMES = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+
+
+def walk_outputs(dest_dir):
+    # Every file under dest_dir as a site path, in a stable order.
+    for root, dirs, files in os.walk(dest_dir):
+        dirs.sort()
+        for name in sorted(files):
+            yield site_path(os.path.join(root, name), dest_dir)
+
+
+def scan_page(text):
+    # Returns the page's ids, its src/href values and its <title>.
+    ids = set()
+    urls = []
+    for match in ATTR_RE.finditer(text):
+        name, double, single, bare = match.groups()
+        value = double if double is not None else single if single is not None else bare
+        if "&" in value:
+            value = html.unescape(value)
+        if name == "id":
+            ids.add(value)
+        else:
+            urls.append(value)
+    title = TITLE_RE.search(text)
+    return ids, urls, html.unescape(title.group(1).strip()) if title else ""
+
+
+def link_target(url, page):
+    # (site path, fragment) for an internal link, (page, fragment) for a
+    # fragment-only one and None for anything else.
+    parts = urlsplit(url)
+    if parts.scheme or parts.netloc:
+        return None
+    if not parts.path:
+        return (page, unquote(parts.fragment)) if parts.fragment else None
+    target = resolve_link(url, page)
+    if target is None:
+        return None
+    return unquote(target), unquote(parts.fragment)
+
+
+def page_url(base_url, page):
+    if page == "index.html":
+        page = ""
+    elif page.endswith("/index.html"):
+        page = page[:-len("index.html")]
+    return base_url + quote(page)
+
+
+class StreamedFile:
+    # Written straight to a temporary file; an unchanged result leaves the
+    # existing file and its mtime alone, like pages.write_if_changed.
+    def __init__(self, path):
+        self.path = path
+        self.tmp_path = f"{path}.{os.getpid()}.tmp"
+        self.file = open(self.tmp_path, "w", encoding="utf-8")
+
+    def write(self, text):
+        self.file.write(text)
+
+    def close(self):
+        self.file.close()
+        if os.path.exists(self.path) and filecmp.cmp(self.tmp_path, self.path, shallow=False):
+            os.remove(self.tmp_path)
+            return False
+        os.replace(self.tmp_path, self.path)
+        return True
+
+
+class SitemapWriter:
+    # Up to SITEMAP_MAX_URLS pages go straight into sitemap.xml; more are
+    # split over sitemap-1.xml, sitemap-2.xml, ... with sitemap.xml as their
+    # index.
+    def __init__(self, dest_dir, base_url, total):
+        self.dest_dir = dest_dir
+        self.base_url = base_url
+        self.split = total > SITEMAP_MAX_URLS
+        self.files = []
+        self.current = None
+        self.count = 0
+        self.written = []
+
+    def start(self):
+        name = f"sitemap-{len(self.files) + 1}.xml" if self.split else SITEMAP
+        self.files.append(name)
+        self.current = StreamedFile(os.path.join(self.dest_dir, name))
+        self.current.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                           '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+        self.count = 0
+
+    def finish(self):
+        self.current.write("</urlset>\n")
+        if self.current.close():
+            self.written.append(self.files[-1])
+        self.current = None
+
+    def add(self, page, mtime):
+        if self.current is None or self.count == SITEMAP_MAX_URLS:
+            if self.current is not None:
+                self.finish()
+            self.start()
+        lastmod = time.strftime("%Y-%m-%d", time.gmtime(mtime))
+        self.current.write(f"<url><loc>{html.escape(page_url(self.base_url, page))}</loc>"
+                           f"<lastmod>{lastmod}</lastmod></url>\n")
+        self.count += 1
+
+    def close(self):
+        if self.current is None:
+            self.start()
+        self.finish()
+        if self.split:
+            index = StreamedFile(os.path.join(self.dest_dir, SITEMAP))
+            index.write('<?xml version="1.0" encoding="UTF-8"?>\n'
+                        '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n')
+            for name in self.files:
+                index.write(f"<sitemap><loc>{html.escape(self.base_url + name)}</loc></sitemap>\n")
+            index.write("</sitemapindex>\n")
+            if index.close():
+                self.written.append(SITEMAP)
+        return self.written
+
+
+def rfc822_date(timestamp):
+    t = time.gmtime(timestamp)
+    return (f"{DAY_NAMES[t.tm_wday]}, {t.tm_mday:02d} {MONTH_NAMES[t.tm_mon - 1]} {t.tm_year} "
+            f"{t.tm_hour:02d}:{t.tm_min:02d}:{t.tm_sec:02d} +0000")
+
+
+def write_feed(dest_dir, base_url, title, items):
+    # items are (mtime, page, title), newest first.
+    feed = StreamedFile(os.path.join(dest_dir, FEED))
+    feed.write('<?xml version="1.0" encoding="UTF-8"?>\n<rss version="2.0"><channel>\n'
+               f"<title>{html.escape(title)}</title><link>{html.escape(base_url)}</link>"
+               f"<description>{html.escape(title)}</description>\n")
+    for mtime, page, page_title in items:
+        url = html.escape(page_url(base_url, page))
+        date = rfc822_date(mtime)
+        feed.write(f"<item><title>{html.escape(page_title)}</title><link>{url}</link>"
+                   f"<guid>{url}</guid><pubDate>{date}</pubDate></item>\n")
+    feed.write("</channel></rss>\n")
+    return feed.close()
+
+
+def load_generated(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            names = json.load(f)
+    except (OSError, ValueError):
+        return []
+    return names if isinstance(names, list) else []
+
+
+def save_generated(path, names):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(names, f)
+    os.replace(tmp_path, path)
+
+
+def check_links(dest_dir, base_url=None, on_broken=None, record_path=None):
+    # One pass over dest_dir. The index of outputs is built from directory
+    # listings alone; each page is then read once, its links checked against
+    # that index as they are found and its ids kept for fragment links.
+    # Only links to another page's #fragment wait until that page has been
+    # read, so the work is O(pages + links) with no per-link stat.
+    #
+    # With a base_url, the same pass streams sitemap.xml and feed.xml (the
+    # newest pages by output mtime, which stays put while a page's output
+    # doesn't change). on_broken(page, url, reason) is called per broken link
+    # as it is found; the result holds the count.
+    #
+    # record_path keeps the names of the files those writers produced, so a
+    # later run without a base_url (or with fewer sitemaps) removes them
+    # instead of leaving stale copies to be compressed and shipped. Only
+    # recorded names are removed: files the stage didn't write, like a
+    # hand-made static/sitemap.xml or sitemap-2.xml, stay.
+    if base_url is not None and not base_url.endswith("/"):
+        base_url += "/"
+    outputs = set(walk_outputs(dest_dir))
+    ids = {}
+    # Resolved links, keyed by the URL and, for relative ones, the linking
+    # page's directory: nav bars and cross-links repeat across most pages.
+    resolved = {}
+    deferred = []
+    broken = 0
+    links = 0
+    newest = []
+    site_title = ""
+
+    def report(page, url, reason):
+        nonlocal broken
+        broken += 1
+        if on_broken is not None:
+            on_broken(page, url, reason)
+
+    pages = sorted(page for page in outputs if page.endswith(".html"))
+    sitemap = SitemapWriter(dest_dir, base_url, len(pages)) if base_url is not None else None
+    for page in pages:
+        path = os.path.join(dest_dir, *page.split("/"))
+        with open(path, encoding="utf-8", errors="replace") as f:
+            page_ids, urls, title = scan_page(f.read())
+        ids[page] = page_ids
+        if sitemap is not None:
+            mtime = os.stat(path).st_mtime
+            sitemap.add(page, mtime)
+            item = (mtime, page, title or page)
+            if len(newest) < FEED_ITEMS:
+                heapq.heappush(newest, item)
+            else:
+                heapq.heappushpop(newest, item)
+            if page == "index.html":
+                site_title = title
+
+        directory = page.rpartition("/")[0]
+        for url in urls:
+            if url.startswith("#"):
+                target = link_target(url, page)
+            else:
+                key = url if url.startswith("/") else (directory, url)
+                target = resolved.get(key, False)
+                if target is False:
+                    target = resolved[key] = link_target(url, page)
+            if target is None:
+                continue
+            links += 1
+            target, fragment = target
+            if target not in outputs:
+                # /docs resolves to docs/index.html, as the server redirects.
+                index = f"{target}/index.html"
+                if index not in outputs:
+                    report(page, url, "missing")
+                    continue
+                target = index
+            if not fragment:
+                continue
+            if target in ids:
+                if fragment not in ids[target]:
+                    report(page, url, "missing anchor")
+            elif target.endswith(".html"):
+                deferred.append((page, url, target, fragment))
+
+    for page, url, target, fragment in deferred:
+        if fragment not in ids[target]:
+            report(page, url, "missing anchor")
+
+    written = []
+    generated = []
+    if sitemap is not None:
+        written.extend(sitemap.close())
+        newest.sort(reverse=True)
+        if write_feed(dest_dir, base_url, site_title or base_url, newest):
+            written.append(FEED)
+        generated = sorted(set(sitemap.files) | {SITEMAP, FEED})
+
+    removed = []
+    if record_path is not None:
+        previous = load_generated(record_path)
+        for name in sorted(set(previous) - set(generated)):
+            if name in outputs:
+                os.remove(os.path.join(dest_dir, *name.split("/")))
+                removed.append(name)
+        if previous != generated:
+            save_generated(record_path, generated)
+    return {
+        "pages": len(pages), "links": links, "broken": broken,
+        "written": sorted(written), "removed": removed,
+    }
@@ -0,0 +1,165 @@
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+from .server import raise_open_file_limit
+
+SERVER_MODES = {
+    "basic": [],
+    "prod": ["--prod"],
+    "async": ["--async"],
+}
+
+
+async def read_response(reader):
+    # Returns the status and whether the server keeps the connection open.
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, _, header_bytes = head.partition(b"\r\n")
+    version, status = status_line.split()[:2]
+    headers = {}
+    for line in header_bytes.decode("latin-1").split("\r\n"):
+        name, _, value = line.partition(":")
+        if name:
+            headers[name.strip().lower()] = value.strip()
+
+    length = headers.get("content-length")
+    if length is not None:
+        await reader.readexactly(int(length))
+    else:
+        await reader.read()
+        return int(status), False
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = "close" not in connection and (version == b"HTTP/1.1" or "keep-alive" in connection)
+    return int(status), keep_alive
+
+
+async def client(host, port, paths, requests, latencies, errors, timeout):
+    # One keep-alive client making `requests` requests in turn. Servers that
+    # close after each response (the default HTTPServer) are reconnected to.
+    # A request not answered within `timeout` seconds counts as an error.
+    reader = writer = None
+    try:
+        for i in range(requests):
+            path = paths[i % len(paths)]
+            start = time.perf_counter()
+            try:
+                if writer is None:
+                    reader, writer = await asyncio.wait_for(
+                        asyncio.open_connection(host, port), timeout
+                    )
+                writer.write(
+                    f"GET {path} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n"
+                    f"Accept-Encoding: gzip\r\n\r\n".encode()
+                )
+                status, keep_alive = await asyncio.wait_for(read_response(reader), timeout)
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ValueError):
+                errors.append(1)
+                if writer is not None:
+                    writer.close()
+                writer = None
+                continue
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors.append(status)
+            if not keep_alive:
+                writer.close()
+                writer = None
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+async def run_load(host, port, connections, requests, paths, timeout=5.0):
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        client(host, port, paths, requests, latencies, errors, timeout) for _ in range(connections)
+    ))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": len(errors),
+        "seconds": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": statistics.median(latencies) * 1000 if latencies else 0.0,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000 if latencies else 0.0,
+    }
+
+
+def wait_for_port(host, port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            asyncio.run(asyncio.wait_for(asyncio.open_connection(host, port), 1))
+            return
+        except (OSError, asyncio.TimeoutError):
+            time.sleep(0.05)
+    raise RuntimeError(f"server on port {port} did not start")
+
+
+def start_server(mode, directory, port):
+    # The server runs as ssg.server, found the same way this package was
+    # whether or not it is installed.
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    path = os.environ.get("PYTHONPATH")
+    env = dict(os.environ, PYTHONPATH=package_root + (os.pathsep + path if path else ""))
+    return subprocess.Popen(
+        [sys.executable, "-m", "ssg.server", "--dir", directory, "--port", str(port)] + SERVER_MODES[mode],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, env=env,
+    )
+
+
+def print_result(name, result):
+    print(
+        f"{name:<8} {result['requests']:>8} req  {result['errors']:>6} errors  "
+        f"{result['rps']:>10.0f} req/s  p50 {result['p50_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms"
+    )
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Load-test the static file servers")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8931, help="Port of a running server, or the first one to start")
+    parser.add_argument("--connections", type=int, default=200, help="Concurrent keep-alive clients")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per client")
+    parser.add_argument("--paths", nargs="+", default=["/", "/static.css"])
+    parser.add_argument("--timeout", type=float, default=5.0, help="Seconds before a request counts as failed")
+    parser.add_argument(
+        "--compare", nargs="*", choices=sorted(SERVER_MODES), metavar="MODE",
+        help="Start ssg.server in each mode (default: all) on --dir and run the same load",
+    )
+    parser.add_argument("--dir", default="public", help="Directory the started servers serve")
+    args = parser.parse_args(argv)
+
+    raise_open_file_limit()
+    if args.compare is None:
+        result = asyncio.run(run_load(
+            args.host, args.port, args.connections, args.requests, args.paths, args.timeout
+        ))
+        print_result("server", result)
+        return 0
+
+    for offset, mode in enumerate(args.compare or sorted(SERVER_MODES)):
+        port = args.port + offset
+        process = start_server(mode, args.dir, port)
+        try:
+            wait_for_port(args.host, port)
+            result = asyncio.run(run_load(
+                args.host, port, args.connections, args.requests, args.paths, args.timeout
+            ))
+            print_result(mode, result)
+        finally:
+            process.terminate()
+            process.wait()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
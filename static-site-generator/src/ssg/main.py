@@ -0,0 +1,354 @@
+import argparse
+import os
+import sys
+import time
+
+from . import instrument
+from .cli import HelpFormatter
+from .copier import COPY_MODE_COPY, COPY_MODES, copy_tree
+from .depgraph import DepGraph
+from .manifest import load_manifest, sync_directory
+from .pages import TransformChain, generate_pages, write_build_stamp
+from .shard import merge_shards, parse_shard, shard_name, write_shard_manifest
+
+# The optional stages (fingerprinting, images, search, link checking,
+# compression) import their modules when they run, so a build that skips
+# them, or `ssg --help`, doesn't pay for loading them.
+
+CACHE_DIR = ".cache"
+# Content-addressed, so shard builds on one machine can share it.
+IMAGE_CACHE_DIR = os.path.join(CACHE_DIR, "images")
+
+
+def cache_paths(cache_dir):
+    return (
+        os.path.join(cache_dir, "static-manifest.json"),
+        os.path.join(cache_dir, "blocks.json"),
+        os.path.join(cache_dir, "depgraph.json"),
+        os.path.join(cache_dir, "trees.marshal"),
+    )
+
+
+MANIFEST_PATH, BLOCK_CACHE_PATH, DEPGRAPH_PATH, PARSE_CACHE_PATH = cache_paths(CACHE_DIR)
+# Terms extracted per page; the index covers the whole site, so it is built
+# by full builds and merges, never by a single shard.
+SEARCH_CACHE_PATH = os.path.join(CACHE_DIR, "search.json")
+# Sitemaps and feed the links stage wrote, so a build without --base-url can
+# remove them from public/.
+LINKS_RECORD_PATH = os.path.join(CACHE_DIR, "generated.json")
+# Files in public/ that compression didn't make smaller, so they aren't
+# compressed again on every build.
+COMPRESS_RECORD_PATH = os.path.join(CACHE_DIR, "incompressible.json")
+# Broken links printed one by one; past this they are only counted.
+MAX_REPORTED_LINKS = 20
+
+
+def shard_arg(spec):
+    try:
+        return parse_shard(spec)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(
+        prog=prog, description="Build the site into public/", formatter_class=HelpFormatter
+    )
+    parser.add_argument(
+        "--clean", action="store_true", help="Ignore the manifest and rebuild everything"
+    )
+    parser.add_argument(
+        "--copy-mode", choices=COPY_MODES, default=COPY_MODE_COPY,
+        help="How static files are transferred into public/",
+    )
+    parser.add_argument("--jobs", type=int, default=None, help="Number of copy workers")
+    parser.add_argument(
+        "--processes", type=int, default=None, help="Number of page rendering processes"
+    )
+    parser.add_argument(
+        "--no-compress", action="store_true",
+        help="Skip writing precompressed .gz/.br siblings into public/",
+    )
+    parser.add_argument(
+        "--no-fingerprint", action="store_true",
+        help="Don't write content-hashed asset copies or point pages at them",
+    )
+    parser.add_argument(
+        "--no-images", action="store_true",
+        help="Don't add image dimensions or write resized variants (variants need Pillow)",
+    )
+    parser.add_argument(
+        "--no-search", action="store_true", help="Don't write the search index into public/search/"
+    )
+    parser.add_argument(
+        "--no-links", action="store_true",
+        help="Don't check internal links or write sitemap.xml and feed.xml",
+    )
+    parser.add_argument(
+        "--strict-links", action="store_true", help="Fail the build when an internal link is broken"
+    )
+    parser.add_argument(
+        "--base-url", metavar="URL",
+        help="The site's public URL; sitemap.xml and feed.xml are only written when it is given",
+    )
+    parser.add_argument(
+        "--watch", action="store_true",
+        help="Keep running, rebuild changed files and serve public/ with live reload",
+    )
+    parser.add_argument("--port", type=int, default=8888, help="Port for --watch to serve on")
+    parser.add_argument(
+        "--report", metavar="PATH",
+        help="Write per-stage timings, call counts, bytes and the slowest pages as JSON",
+    )
+    parser.add_argument(
+        "--trace", metavar="PATH", help="Write a Chrome trace (chrome://tracing, Perfetto)"
+    )
+    parser.add_argument(
+        "--profile", metavar="PATH", nargs="?", const="build.prof",
+        help="Run the build under cProfile and save the stats (default build.prof)",
+    )
+    parser.add_argument(
+        "--shard", type=shard_arg, metavar="I/N",
+        help="Render only shard I of N of the pages into SHARD_DIR/I-of-N (no compression)",
+    )
+    parser.add_argument(
+        "--merge", action="store_true",
+        help="Combine the shard outputs in SHARD_DIR into public/, checking for collisions",
+    )
+    parser.add_argument("--shard-dir", default="shards", help="Where shard outputs live")
+    args = parser.parse_args(argv)
+
+    if args.shard and (args.merge or args.watch):
+        parser.error("--shard can't be combined with --merge or --watch")
+
+    if args.merge:
+        try:
+            merge(args)
+        except ValueError as e:
+            sys.exit(f"Merge failed: {e}")
+        return
+
+    if args.report or args.trace:
+        instrument.enable()
+        # Conversion functions are only counted in this process, so render
+        # in-process unless a pool size was asked for explicitly.
+        if args.processes is None:
+            args.processes = 1
+
+    if args.profile:
+        import cProfile
+        import pstats
+
+        profiler = cProfile.Profile()
+        profiler.runcall(build, args)
+        profiler.dump_stats(args.profile)
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(20)
+    else:
+        build(args)
+
+    if args.report:
+        instrument.write_report(args.report)
+    if args.trace:
+        instrument.write_trace(args.trace)
+
+    if args.watch:
+        from .watch import Rebuilder, watch
+
+        rebuilder = Rebuilder(
+            "static", "content", "template.html", "public", MANIFEST_PATH,
+            BLOCK_CACHE_PATH, DEPGRAPH_PATH, fingerprint=not args.no_fingerprint,
+            image_cache_dir=None if args.no_images else IMAGE_CACHE_DIR,
+            parse_cache_path=PARSE_CACHE_PATH,
+        )
+        watch(rebuilder, port=args.port)
+
+def build(args):
+    dest, cache_dir = "public", CACHE_DIR
+    if args.shard:
+        # A shard's directory is an artifact that only ever holds the current
+        # slice, so pages that moved to another shard can't linger in it.
+        # Its caches are its own, so shards can build side by side.
+        name = shard_name(*args.shard)
+        dest = os.path.join(args.shard_dir, name)
+        cache_dir = os.path.join(CACHE_DIR, f"shard-{name}")
+        clear_directory(dest)
+    manifest_path, block_cache_path, depgraph_path, parse_cache_path = cache_paths(cache_dir)
+
+    if args.clean:
+        paths = [manifest_path, block_cache_path, depgraph_path, parse_cache_path]
+        if not args.shard:
+            # The site-wide records belong to full builds; a shard never
+            # touches them (see the return after its pages).
+            paths += [SEARCH_CACHE_PATH, LINKS_RECORD_PATH, COMPRESS_RECORD_PATH]
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
+        clear_directory(dest)
+
+    with instrument.stage("copy"):
+        result = copies_directory_to_public(
+            "static", dest, manifest_path=manifest_path, mode=args.copy_mode, workers=args.jobs
+        )
+        instrument.count_bytes("copy", read=result["bytes"], written=result["bytes"])
+
+    hashes = {
+        rel_path: entry["hash"]
+        for rel_path, entry in load_manifest(manifest_path, "static", dest).items()
+    }
+    # Image attributes go on first, while src still names the original;
+    # the asset rewriter then fingerprints it.
+    transforms = []
+    assets = {}
+    if not args.no_fingerprint:
+        from .fingerprint import AssetRewriter, fingerprint_assets
+
+        with instrument.stage("fingerprint"):
+            result = fingerprint_assets(dest, hashes, workers=args.jobs)
+            assets = result["assets"]
+            print(
+                f"Fingerprinted {len(assets)} assets, wrote {len(result['written'])}, "
+                f"removed {len(result['removed'])}"
+            )
+        transforms.append(AssetRewriter(assets))
+
+    if not args.no_images:
+        from .images import ImageRewriter, process_images
+
+        with instrument.stage("images"):
+            start = time.perf_counter()
+            result = process_images(
+                dest, hashes, IMAGE_CACHE_DIR, assets, workers=args.processes
+            )
+            print(
+                f"Processed {len(result['images'])} images, encoded {result['encoded']} variants "
+                f"in {time.perf_counter() - start:.2f}s"
+            )
+        transforms.insert(0, ImageRewriter(result["images"]))
+
+    transform = TransformChain(transforms) if transforms else None
+
+    with instrument.stage("pages"):
+        start = time.perf_counter()
+        try:
+            pages = generate_pages(
+                "content", "template.html", dest, workers=args.processes,
+                cache_path=block_cache_path, graph_path=depgraph_path, transform=transform,
+                shard=args.shard, parse_cache_path=parse_cache_path,
+            )
+        except ValueError as e:
+            # Raised with the page's path, from a pool worker too.
+            sys.exit(f"Build failed: {e}")
+        print(f"Generated {len(pages)} pages in {time.perf_counter() - start:.2f}s")
+
+    if args.shard:
+        # Compression runs once, after the merge.
+        write_shard_manifest(dest, args.shard, pages, DepGraph(depgraph_path).pages, args.jobs)
+        print(f"Wrote shard {args.shard[0]} of {args.shard[1]} to {dest}")
+        return
+
+    if not args.no_search:
+        search(dest, args.processes)
+    if not args.no_links:
+        check_site(dest, args.base_url, args.strict_links)
+    if not args.no_compress:
+        compress(dest, args.jobs)
+    write_build_stamp(dest)
+
+def merge(args):
+    start = time.perf_counter()
+    result = merge_shards(args.shard_dir, "public", mode=args.copy_mode, workers=args.jobs)
+    graph = DepGraph(DEPGRAPH_PATH, load=False)
+    graph.pages = result["graph"]
+    graph.save()
+    print(
+        f"Merged {result['shards']} shards, {result['files']} files ({result['bytes']} bytes) "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+
+    if not args.no_search:
+        search("public", args.processes)
+    if not args.no_links:
+        check_site("public", args.base_url, args.strict_links)
+    if not args.no_compress:
+        compress("public", args.jobs)
+    write_build_stamp("public")
+
+def search(dest, workers):
+    from .search import build_search_index
+
+    with instrument.stage("search"):
+        start = time.perf_counter()
+        result = build_search_index(
+            "content", dest, SEARCH_CACHE_PATH, workers=workers, parse_cache_path=PARSE_CACHE_PATH
+        )
+        print(
+            f"Indexed {result['pages']} pages "
+            f"({result['extracted']} extracted) into {result['shards']} shards, "
+            f"wrote {len(result['written'])} in {time.perf_counter() - start:.2f}s"
+        )
+
+def check_site(dest, base_url, strict):
+    from .linkcheck import check_links
+
+    with instrument.stage("links"):
+        start = time.perf_counter()
+        reported = 0
+
+        def on_broken(page, url, reason):
+            nonlocal reported
+            if reported < MAX_REPORTED_LINKS:
+                print(f"Broken link in {page}: {url} ({reason})")
+            reported += 1
+
+        result = check_links(dest, base_url, on_broken, LINKS_RECORD_PATH)
+        print(
+            f"Checked {result['links']} links in {result['pages']} pages, "
+            f"{result['broken']} broken, wrote {len(result['written'])}, "
+            f"removed {len(result['removed'])} in {time.perf_counter() - start:.2f}s"
+        )
+    if strict and result["broken"]:
+        sys.exit(f"Build failed: {result['broken']} broken links")
+
+def compress(dest, workers):
+    from .precompress import precompress_tree
+
+    with instrument.stage("compress"):
+        start = time.perf_counter()
+        result = precompress_tree(dest, workers=workers, record_path=COMPRESS_RECORD_PATH)
+        instrument.count_bytes(
+            "compress", written=sum(os.path.getsize(path) for path in result["written"])
+        )
+        print(
+            f"Compressed {len(result['written'])} files, removed {len(result['removed'])} "
+            f"stale in {time.perf_counter() - start:.2f}s"
+        )
+
+def clear_directory(directory):
+    if os.path.exists(directory):
+        import shutil
+
+        shutil.rmtree(directory)
+    os.makedirs(directory)
+
+def copies_directory_to_public(source, dest, manifest_path=None, mode=COPY_MODE_COPY, workers=None):
+    start = time.perf_counter()
+
+    if manifest_path:
+        result = sync_directory(source, dest, manifest_path, mode=mode, workers=workers)
+        print(
+            f"Copied {len(result['copied'])} files, removed {len(result['removed'])}, "
+            f"{result['skipped']} unchanged in {time.perf_counter() - start:.2f}s"
+        )
+        return result
+
+    clear_directory(dest)
+    result = copy_tree(source, dest, mode=mode, workers=workers)
+    print(
+        f"Copied {result['files']} files ({result['bytes']} bytes) "
+        f"in {time.perf_counter() - start:.2f}s"
+    )
+    return result
+
+
+if __name__ == "__main__":
+    main()
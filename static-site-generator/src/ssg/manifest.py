@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+
+from .copier import COPY_MODE_COPY, copy_file, make_dirs, run_parallel, scan_tree
+
+MANIFEST_VERSION = 1
+
+
+def hash_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path, source, dest):
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+    # A manifest written for another version or another source/dest pair
+    # says nothing about the current tree, so start from scratch.
+    if data.get("version") != MANIFEST_VERSION:
+        return {}
+    if data.get("source") != source or data.get("dest") != dest:
+        return {}
+
+    return data.get("files", {})
+
+
+def save_manifest(path, source, dest, files):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    data = {
+        "version": MANIFEST_VERSION,
+        "source": source,
+        "dest": dest,
+        "files": files,
+    }
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def stat_or_none(path):
+    try:
+        return os.stat(path)
+    except FileNotFoundError:
+        return None
+
+
+def output_unchanged(entry, out_stat):
+    return (
+        out_stat is not None
+        and entry["out_size"] == out_stat.st_size
+        and entry["out_mtime_ns"] == out_stat.st_mtime_ns
+    )
+
+
+def prune_empty_dirs(path, root):
+    directory = os.path.dirname(path)
+    root = os.path.abspath(root)
+    while os.path.abspath(directory) != root:
+        try:
+            os.rmdir(directory)
+        except OSError:
+            return
+        directory = os.path.dirname(directory)
+
+
+def refresh_file(source_item, dest_item, src_stat, entry, mode):
+    digest = hash_file(source_item)
+    if entry is not None and digest == entry["hash"]:
+        # Touched but identical: only the recorded source stat moves.
+        return dict(entry, size=src_stat.st_size, mtime_ns=src_stat.st_mtime_ns), False
+
+    copy_file(source_item, dest_item, mode)
+    out_stat = os.stat(dest_item)
+    new_entry = {
+        "size": src_stat.st_size,
+        "mtime_ns": src_stat.st_mtime_ns,
+        "hash": digest,
+        "out_size": out_stat.st_size,
+        "out_mtime_ns": out_stat.st_mtime_ns,
+    }
+    return new_entry, True
+
+
+def sync_directory(source, dest, manifest_path, mode=COPY_MODE_COPY, workers=None):
+    old_files = load_manifest(manifest_path, source, dest)
+    new_files = {}
+    pending = []
+    skipped = 0
+
+    dirs, files = scan_tree(source)
+    make_dirs(dest, dirs)
+
+    for rel_path, src_stat in files:
+        entry = old_files.get(rel_path)
+        dest_item = os.path.join(dest, rel_path)
+
+        if entry is not None and output_unchanged(entry, stat_or_none(dest_item)):
+            if (entry["size"] == src_stat.st_size
+                    and entry["mtime_ns"] == src_stat.st_mtime_ns):
+                new_files[rel_path] = entry
+                skipped += 1
+                continue
+        else:
+            # The output is missing or was modified behind our back, so
+            # the recorded hash can't be trusted to skip the copy.
+            entry = None
+
+        pending.append((rel_path, src_stat, entry))
+
+    def refresh(item):
+        rel_path, src_stat, entry = item
+        return refresh_file(
+            os.path.join(source, rel_path), os.path.join(dest, rel_path), src_stat, entry, mode
+        )
+
+    copied = []
+    copied_bytes = 0
+    results = run_parallel(refresh, pending, workers)
+    for (rel_path, _, _), (new_entry, was_copied) in zip(pending, results):
+        new_files[rel_path] = new_entry
+        if was_copied:
+            copied.append(rel_path)
+            copied_bytes += new_entry["out_size"]
+        else:
+            skipped += 1
+
+    removed = []
+    for rel_path in old_files.keys() - new_files.keys():
+        dest_item = os.path.join(dest, rel_path)
+        if os.path.exists(dest_item):
+            os.remove(dest_item)
+            prune_empty_dirs(dest_item, dest)
+        removed.append(rel_path)
+
+    save_manifest(manifest_path, source, dest, new_files)
+
+    return {
+        "copied": sorted(copied),
+        "added": sorted(rel_path for rel_path in copied if rel_path not in old_files),
+        "removed": sorted(removed),
+        "skipped": skipped,
+        "bytes": copied_bytes,
+    }
@@ -0,0 +1,328 @@
+import hashlib
+import os
+import re
+import time
+
+from . import instrument
+from .blockcache import CACHE_VERSION, BlockCache
+from .conversion import markdown_to_html
+from .depgraph import DepGraph, internal_links, site_path
+from .parsecache import ParseCache
+from .shard import in_shard
+from .templates import compile_string, load_template
+
+TITLE_RE = re.compile(r"^# (.+?)\s*$", re.MULTILINE)
+
+BUILD_STAMP = ".build-stamp"
+
+# Below this many pages, starting worker processes costs more than it saves.
+PARALLEL_THRESHOLD = 32
+
+
+def extract_title(markdown):
+    match = TITLE_RE.search(markdown)
+    if match is None:
+        return None
+    return match.group(1)
+
+
+def render_page(markdown, template, default_title="", cache=None, parse_cache=None):
+    # template is a compiled templates.Template, or its source text. The
+    # page's node tree streams straight into the output buffer. With a
+    # parse_cache, an unchanged document's tree is loaded instead of parsed.
+    if isinstance(template, str):
+        template = compile_string(template)
+    title = extract_title(markdown) or default_title
+    if parse_cache is not None:
+        content = parse_cache.markdown_to_html(markdown, cache)
+    else:
+        content = markdown_to_html(markdown, cache)
+    return template.render({"Title": title, "Content": content})
+
+
+def generate_page(from_path, template, dest_path, cache=None, parse_cache=None):
+    with open(from_path, encoding="utf-8") as f:
+        markdown = f.read()
+    write_page(from_path, markdown, template, dest_path, cache, parse_cache=parse_cache)
+    return dest_path
+
+
+def write_page(
+    from_path, markdown, template, dest_path, cache=None, transform=None, page=None, parse_cache=None,
+):
+    # transform(html, page) post-processes the rendered page and returns the
+    # new HTML with the site paths it found the page depending on.
+    default_title = os.path.splitext(os.path.basename(from_path))[0]
+    try:
+        html = render_page(markdown, template, default_title, cache, parse_cache)
+    except ValueError as e:
+        raise ValueError(f"{from_path}: {e}") from e
+
+    references = ()
+    if transform is not None:
+        html, references = transform(html, page)
+    write_if_changed(dest_path, html)
+    return references
+
+
+class TransformChain:
+    # Runs page transforms in order, collecting the references each reports.
+    def __init__(self, transforms):
+        self.transforms = list(transforms)
+
+    def cache_key(self):
+        keys = []
+        for transform in self.transforms:
+            if not hasattr(transform, "cache_key"):
+                return None
+            keys.append(transform.cache_key())
+        return "\n".join(keys)
+
+    def __call__(self, html, page):
+        references = set()
+        for transform in self.transforms:
+            html, found = transform(html, page)
+            references.update(found)
+        return html, references
+
+
+def write_if_changed(dest_path, html):
+    # Leaving identical output untouched keeps its mtime, which is what the
+    # later stages (precompression, the server's ETags) key their work on.
+    data = html.encode("utf-8")
+    try:
+        with open(dest_path, "rb") as f:
+            if f.read() == data:
+                return False
+    except FileNotFoundError:
+        directory = os.path.dirname(dest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    with open(dest_path, "wb") as f:
+        f.write(data)
+    return True
+
+
+def remove_output(dest_path):
+    # A page's output and the precompressed siblings made from it.
+    # Imported here, as only a build that drops a page needs it.
+    from .precompress import ENCODED_SUFFIXES
+
+    for path in (dest_path,) + tuple(dest_path + suffix for suffix in ENCODED_SUFFIXES):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def write_build_stamp(dest_dir):
+    # ssg serve --async rebuilds its file index when this file changes, so
+    # it is written once everything else in dest_dir is in place.
+    path = os.path.join(dest_dir, BUILD_STAMP)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(time.time_ns()))
+    os.replace(tmp_path, path)
+
+
+def page_dest_path(from_path, content_dir, dest_dir):
+    rel_path = os.path.relpath(from_path, content_dir)
+    return os.path.join(dest_dir, os.path.splitext(rel_path)[0] + ".html")
+
+
+def find_pages(content_dir, dest_dir):
+    # Same paths as page_dest_path, with the relpath done once per directory
+    # rather than once per page.
+    pages = []
+    for root, _, files in os.walk(content_dir):
+        rel_root = os.path.relpath(root, content_dir)
+        dest_root = dest_dir if rel_root == "." else os.path.join(dest_dir, rel_root)
+        for name in files:
+            if not name.endswith(".md"):
+                continue
+            pages.append((os.path.join(root, name), os.path.join(dest_root, os.path.splitext(name)[0] + ".html")))
+    pages.sort()
+    return pages
+
+
+def build_page(
+    from_path, template, dest_path, dest_dir, cache=None, timed=False, transform=None,
+    parse_cache=None,
+):
+    # generate_page plus what the build records about the page: its
+    # outgoing internal links for the dependency graph and, when
+    # instrumentation is on, its timing.
+    start = time.perf_counter()
+    with open(from_path, encoding="utf-8") as f:
+        markdown = f.read()
+    page = site_path(dest_path, dest_dir)
+    references = write_page(
+        from_path, markdown, template, dest_path, cache, transform, page, parse_cache
+    )
+    links = sorted(set(internal_links(markdown, page)).union(references) - {page})
+
+    stats = None
+    if timed:
+        elapsed = time.perf_counter() - start
+        stats = (start, elapsed, os.path.getsize(from_path), os.path.getsize(dest_path), os.getpid())
+    return links, stats
+
+
+# Each worker process gets the compiled template and the persisted block
+# cache once, through the pool initializer, instead of with every task.
+_worker_template = None
+_worker_dest_dir = None
+_worker_cache = None
+_worker_timed = False
+_worker_transform = None
+_worker_parse_cache = None
+
+
+def _init_worker(template, dest_dir, cache_path, cache_size, timed, transform, parse_cache_path):
+    global _worker_template, _worker_dest_dir, _worker_cache, _worker_timed, _worker_transform
+    global _worker_parse_cache
+    _worker_template = template
+    _worker_dest_dir = dest_dir
+    _worker_timed = timed
+    _worker_transform = transform
+    if cache_path:
+        _worker_cache = BlockCache(cache_size, cache_path)
+    if parse_cache_path:
+        _worker_parse_cache = ParseCache(parse_cache_path)
+
+
+def _generate_in_worker(page):
+    from_path, dest_path = page
+    links, stats = build_page(
+        from_path, _worker_template, dest_path, _worker_dest_dir, _worker_cache, _worker_timed,
+        _worker_transform, _worker_parse_cache,
+    )
+    added = _worker_cache.take_added() if _worker_cache is not None else {}
+    trees = _worker_parse_cache.take_changes() if _worker_parse_cache is not None else None
+    return dest_path, added, trees, links, stats
+
+
+def render_key(template, transform):
+    # Everything besides a page's own source that its output depends on:
+    # the converter, the template and its fragments, and the transform's
+    # state as its cache_key() describes it. None for a transform without
+    # one, whose pages are then always rendered.
+    digest = hashlib.blake2b(f"{CACHE_VERSION}:{template.digest}".encode(), digest_size=16)
+    if transform is not None:
+        cache_key = getattr(transform, "cache_key", None)
+        key = cache_key() if cache_key is not None else None
+        if key is None:
+            return None
+        digest.update(key.encode())
+    return digest
+
+
+def page_key(from_path, base):
+    if base is None:
+        return None
+    digest = base.copy()
+    with open(from_path, "rb") as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def default_chunksize(page_count, workers):
+    # A few chunks per worker keeps the workers balanced when some pages are
+    # much larger than others, without paying IPC per page.
+    return max(1, page_count // (workers * 4))
+
+
+def generate_pages(
+    content_dir, template_path, dest_dir, workers=None, chunksize=None,
+    cache_path=None, cache_size=10000, graph_path=None, transform=None, shard=None,
+    parse_cache_path=None,
+):
+    # transform is applied to every rendered page (see write_page). With a
+    # process pool it is pickled once per worker, so it has to be picklable.
+    # shard=(i, N) renders only the pages shard.shard_of assigns to shard i.
+    # parse_cache_path keeps the documents' node trees across builds (see
+    # parsecache.ParseCache).
+    #
+    # With a graph_path, each page's entry keeps a key over its source and
+    # render_key. A page whose key matches and whose output exists isn't
+    # rendered again, so a build with nothing to do reads the sources and
+    # stops there. Returns every page's output path, rendered or not.
+    # Compiled once here; workers get the compiled template.
+    template = load_template(template_path)
+
+    pages = find_pages(content_dir, dest_dir)
+    sources = {os.path.normpath(from_path) for from_path, _ in pages}
+    if shard is not None:
+        pages = [page for page in pages if in_shard(os.path.relpath(page[0], content_dir), shard)]
+    workers = workers or os.cpu_count() or 1
+    timed = instrument.enabled()
+    # The graph is rebuilt from the current pages, which drops pages whose
+    # source is gone; the old one only supplies the keys, and the outputs of
+    # those dropped pages to delete.
+    previous = DepGraph(graph_path).pages if graph_path else {}
+    for source, entry in previous.items():
+        if source not in sources:
+            remove_output(os.path.join(dest_dir, entry["output"]))
+    graph = DepGraph(graph_path, load=False) if graph_path else None
+    keys = {}
+    written = []
+
+    def record(from_path, dest_path, links, stats):
+        written.append(dest_path)
+        if graph is not None:
+            graph.record(
+                from_path, site_path(dest_path, dest_dir), template_path, links, template.fragments,
+                keys[from_path],
+            )
+        if stats is not None:
+            instrument.record_page(from_path, *stats)
+
+    if graph is not None:
+        base = render_key(template, transform)
+        pending = []
+        for from_path, dest_path in pages:
+            key = keys[from_path] = page_key(from_path, base)
+            entry = previous.get(os.path.normpath(from_path))
+            if key is not None and entry is not None and entry.get("key") == key and os.path.exists(dest_path):
+                record(from_path, dest_path, entry["links"], None)
+            else:
+                pending.append((from_path, dest_path))
+        pages = pending
+
+    # The caches are only read when there is something to render.
+    cache = BlockCache(cache_size, cache_path) if cache_path and pages else None
+    parse_cache = ParseCache(parse_cache_path) if parse_cache_path and pages else None
+
+    if workers == 1 or len(pages) < PARALLEL_THRESHOLD:
+        for from_path, dest_path in pages:
+            links, stats = build_page(
+                from_path, template, dest_path, dest_dir, cache, timed, transform, parse_cache
+            )
+            record(from_path, dest_path, links, stats)
+    else:
+        # Only imported when a pool is started; see copier.run_parallel.
+        from concurrent.futures import ProcessPoolExecutor
+
+        workers = min(workers, len(pages))
+        chunksize = chunksize or default_chunksize(len(pages), workers)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(template, dest_dir, cache_path, cache_size, timed, transform, parse_cache_path),
+        ) as executor:
+            results = executor.map(_generate_in_worker, pages, chunksize=chunksize)
+            for (from_path, _), (dest_path, added, trees, links, stats) in zip(pages, results):
+                if cache is not None:
+                    cache.merge(added)
+                if parse_cache is not None:
+                    parse_cache.merge(*trees)
+                record(from_path, dest_path, links, stats)
+
+    if cache is not None:
+        cache.save()
+    if graph is not None and graph.pages != previous:
+        graph.save()
+    if parse_cache is not None:
+        parse_cache.save()
+    return written
@@ -0,0 +1,159 @@
+import hashlib
+import marshal
+import os
+import time
+
+from .blockcache import CACHE_VERSION
+from .conversion import markdown_to_html
+from .htmlnode import LeafNode, ParentNode
+
+# Bump when the serialized tree layout changes. The block cache's
+# CACHE_VERSION, which moves whenever the converter's output does, is
+# checked too, so trees built by an older converter are never loaded.
+TREE_FORMAT_VERSION = 1
+MARSHAL_VERSION = 4
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_MAX_AGE = 30 * 24 * 3600
+# An entry's last-used time, which eviction goes by, is only refreshed when
+# it is older than this, so warm builds in a row don't rewrite the cache.
+TOUCH_INTERVAL = 24 * 3600
+
+
+def tree_key(markdown):
+    return hashlib.blake2b(markdown.encode("utf-8"), digest_size=16).digest()
+
+
+def dump_node(node):
+    # LeafNode -> (tag, value, props) with a str value; ParentNode ->
+    # (tag, [children], props). Only types marshal handles natively.
+    if isinstance(node, ParentNode):
+        return (node.tag, [dump_node(child) for child in node.children], node.props)
+    if isinstance(node, LeafNode):
+        return (node.tag, node.value, node.props)
+    raise TypeError(f"Can't serialize {type(node).__name__}")
+
+
+def load_node(data, new=object.__new__):
+    # Rebuilds the tree without going through __init__, whose checks the
+    # tree already passed when it was first built.
+    tag, value, props = data
+    if value.__class__ is list:
+        node = new(ParentNode)
+        node.value = None
+        node.children = [load_node(child) for child in value]
+    else:
+        node = new(LeafNode)
+        node.value = value
+        node.children = None
+    node.tag = tag
+    node.props = props
+    return node
+
+
+class ParseCache:
+    # Each document's HTMLNode tree, marshalled, under the hash of its
+    # markdown. A hit skips splitting the document into blocks and all
+    # inline parsing. Like BlockCache, the whole cache is one file read once
+    # per process; worker processes hand back what they added and used
+    # (take_changes) for the parent to merge before it saves.
+    def __init__(self, path=None, max_bytes=DEFAULT_MAX_BYTES, max_age=DEFAULT_MAX_AGE):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        # key -> [marshalled tree, last used (seconds since the epoch)]
+        self.entries = {}
+        self.added = {}
+        self.used = set()
+        self.dirty = False
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self.load()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.used.add(key)
+        return load_node(marshal.loads(entry[0]))
+
+    def put(self, key, tree):
+        data = marshal.dumps(dump_node(tree), MARSHAL_VERSION)
+        self.entries[key] = [data, time.time()]
+        self.added[key] = data
+        self.dirty = True
+
+    def markdown_to_html(self, markdown, block_cache=None):
+        key = tree_key(markdown)
+        tree = self.get(key)
+        if tree is None:
+            tree = markdown_to_html(markdown, block_cache)
+            self.put(key, tree)
+        return tree
+
+    def take_changes(self):
+        changes = (self.added, self.used)
+        self.added, self.used = {}, set()
+        return changes
+
+    def merge(self, added, used):
+        now = time.time()
+        for key, data in added.items():
+            self.entries[key] = [data, now]
+            self.dirty = True
+        self.used.update(used)
+
+    def evict(self, now=None):
+        # Drops entries unused for max_age seconds, then the least recently
+        # used ones until the rest fit in max_bytes.
+        now = time.time() if now is None else now
+        for key in self.used:
+            entry = self.entries.get(key)
+            if entry is not None and entry[1] < now - TOUCH_INTERVAL:
+                entry[1] = now
+                self.dirty = True
+        self.used = set()
+
+        cutoff = now - self.max_age
+        by_age = sorted(self.entries.items(), key=lambda item: item[1][1])
+        total = sum(len(data) for data, _ in self.entries.values())
+        removed = 0
+        for key, (data, last_used) in by_age:
+            if last_used >= cutoff and total <= self.max_bytes:
+                break
+            del self.entries[key]
+            total -= len(data)
+            removed += 1
+        if removed:
+            self.dirty = True
+        return removed
+
+    def load(self):
+        try:
+            with open(self.path, "rb") as f:
+                data = marshal.load(f)
+        except (FileNotFoundError, EOFError, ValueError, TypeError):
+            return
+        if not isinstance(data, tuple) or data[:2] != (TREE_FORMAT_VERSION, CACHE_VERSION):
+            return
+        self.entries = {key: list(entry) for key, entry in data[2].items()}
+
+    def save(self):
+        self.evict()
+        if not self.dirty:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        entries = {key: tuple(entry) for key, entry in self.entries.items()}
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            marshal.dump((TREE_FORMAT_VERSION, CACHE_VERSION, entries), f, MARSHAL_VERSION)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
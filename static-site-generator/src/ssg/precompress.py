@@ -0,0 +1,175 @@
+import gzip
+import json
+import os
+
+from .copier import run_parallel, scan_tree
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {
+    ".html", ".css", ".js", ".mjs", ".json", ".xml", ".svg", ".txt", ".map",
+    ".webmanifest", ".ico", ".wasm",
+}
+
+ENCODED_SUFFIXES = (".gz", ".br")
+
+# Below this size the compressed body plus headers rarely beats the original.
+MIN_SIZE = 256
+
+# Bump when the record's layout changes.
+RECORD_VERSION = 1
+
+
+def gzip_compress(data):
+    # mtime=0 keeps the output byte-identical across builds.
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_compress(data):
+    return brotli.compress(data, quality=11)
+
+
+def encoders():
+    available = [(".gz", gzip_compress)]
+    if brotli is not None:
+        available.append((".br", brotli_compress))
+    return available
+
+
+def is_compressible(path, size):
+    return size >= MIN_SIZE and os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+
+def is_fresh(sibling, src_stat):
+    # Siblings are stamped with their source's mtime, so a matching mtime
+    # means the source has not been rewritten since it was compressed.
+    try:
+        return os.stat(sibling).st_mtime_ns == src_stat.st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+
+def load_record(path):
+    # rel_path -> [mtime_ns, size, [suffixes]]: the encodings that didn't
+    # make the file smaller when it last looked like this.
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != RECORD_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def save_record(path, files):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": RECORD_VERSION, "files": files}, f, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def is_skipped(entry, suffix, src_stat):
+    return (
+        entry is not None
+        and entry[0] == src_stat.st_mtime_ns
+        and entry[1] == src_stat.st_size
+        and suffix in entry[2]
+    )
+
+
+def precompress_file(path, src_stat, entry=None):
+    # Returns the siblings written and the suffixes whose output wasn't
+    # smaller than the file, which the caller records so the next build
+    # doesn't compress it again to find that out.
+    written = []
+    skipped = []
+    data = None
+    for suffix, compress in encoders():
+        sibling = path + suffix
+        if is_fresh(sibling, src_stat):
+            continue
+        if is_skipped(entry, suffix, src_stat):
+            skipped.append(suffix)
+            continue
+        if data is None:
+            with open(path, "rb") as f:
+                data = f.read()
+
+        compressed = compress(data)
+        if len(compressed) >= len(data):
+            if os.path.exists(sibling):
+                os.remove(sibling)
+            skipped.append(suffix)
+            continue
+
+        tmp_path = sibling + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(compressed)
+        os.utime(tmp_path, ns=(src_stat.st_atime_ns, src_stat.st_mtime_ns))
+        os.replace(tmp_path, sibling)
+        written.append(sibling)
+    return written, skipped
+
+
+def precompress_tree(root, workers=None, record_path=None):
+    # With a record_path, files found not worth compressing are remembered
+    # by path, mtime and size, and count as fresh until they change.
+    record = load_record(record_path) if record_path else {}
+    _, files = scan_tree(root)
+    sources = {}
+    siblings = []
+    for rel_path, stat in files:
+        path = os.path.join(root, rel_path)
+        if path.endswith(ENCODED_SUFFIXES):
+            siblings.append(path)
+        elif is_compressible(path, stat.st_size):
+            sources[path] = (rel_path, stat)
+
+    # Drop siblings whose source is gone or no longer worth compressing.
+    # Only names this stage could have produced are touched, so a real
+    # archive.tar.gz shipped in static/ is left alone.
+    removed = []
+    for sibling in siblings:
+        source = os.path.splitext(sibling)[0]
+        if source not in sources and os.path.splitext(source)[1].lower() in COMPRESSIBLE_EXTENSIONS:
+            os.remove(sibling)
+            removed.append(sibling)
+
+    # Up-to-date files are filtered out here, so a no-op build doesn't start
+    # a thread pool just to find that out.
+    pending = []
+    entries = {}
+    for path, (rel_path, stat) in sources.items():
+        entry = record.get(rel_path)
+        if all(is_fresh(path + suffix, stat) or is_skipped(entry, suffix, stat) for suffix, _ in encoders()):
+            # Entries are kept only while they still describe the file.
+            if entry is not None and entry[:2] == [stat.st_mtime_ns, stat.st_size]:
+                entries[rel_path] = entry
+        else:
+            pending.append((path, stat, entry))
+
+    results = run_parallel(lambda item: precompress_file(*item), pending, workers)
+    written = []
+    incompressible = []
+    for (path, stat, entry), (result, suffixes) in zip(pending, results):
+        written.extend(result)
+        if suffixes:
+            entries[sources[path][0]] = [stat.st_mtime_ns, stat.st_size, suffixes]
+            if entry is None or not all(is_skipped(entry, suffix, stat) for suffix in suffixes):
+                incompressible.append(path)
+
+    if record_path and entries != record:
+        save_record(record_path, entries)
+    return {
+        "written": sorted(written),
+        "removed": sorted(removed),
+        "incompressible": sorted(incompressible),
+        "files": len(sources),
+    }
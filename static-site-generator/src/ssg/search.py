@@ -0,0 +1,429 @@
+import bisect
+import hashlib
+import html
+import json
+import os
+import re
+
+from .conversion import markdown_to_html
+from .depgraph import site_path
+from .htmlnode import HEADING_TAGS
+from .pages import PARALLEL_THRESHOLD, extract_title, find_pages, write_if_changed
+from .parsecache import ParseCache
+
+# Output directory, relative to the site root.
+SEARCH_DIR = "search"
+SEARCH_META = "index.json"
+
+# Bump when the shard or meta format changes (SEARCH_INDEX_VERSION, read by
+# the browser) or when extraction changes what is recorded per page
+# (SEARCH_CACHE_VERSION), so the next build starts over.
+SEARCH_INDEX_VERSION = 1
+SEARCH_CACHE_VERSION = 1
+
+# Terms are sharded by their first PREFIX_LENGTH characters; a query for
+# "rend" only needs the "re" shard.
+PREFIX_LENGTH = 2
+
+# A term in a heading counts as this many occurrences in body text.
+HEADING_WEIGHT = 5
+
+TOKEN_RE = re.compile(r"[^\W_]+")
+SAFE_PREFIX_RE = re.compile(r"[a-z0-9]+")
+
+TAG_RE = re.compile(r"<[^>]*>")
+ALT_RE = re.compile(r"""\salt=(?:"([^"]*)"|([^\s"'=<>`]+))""")
+HEADING_FRAGMENT_RE = re.compile(r"<h[1-6][\s>]")
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall(text.lower()) if len(token) > 1 or token.isdigit()]
+
+
+def node_text(node, headings, body):
+    # Splits the rendered tree into heading texts and body texts. Leaf values
+    # are escaped HTML, so "&lt;" is indexed as the "<" it stands for.
+    if node.tag is None and "<" in node.value:
+        # Escaped text never holds a "<": this is a block the block cache
+        # rendered, as parse-cache trees built with one carry them.
+        fragment_text(node.value, headings, body)
+        return
+    if node.tag in HEADING_TAGS and headings is not body:
+        # Inside the heading both lists are the same one.
+        parts = []
+        node_text(node, parts, parts)
+        headings.append("".join(parts))
+        return
+    if node.value is not None:
+        body.append(html.unescape(node.value) if "&" in node.value else node.value)
+    if node.children:
+        for child in node.children:
+            node_text(child, headings, body)
+    if node.props and node.props.get("alt"):
+        body.append(node.props["alt"])
+
+
+def fragment_text(fragment, headings, body):
+    # The same split as node_text for a rendered block: a heading block is a
+    # single <hN> element, tags separate leaves and alt texts are body text.
+    for match in ALT_RE.finditer(fragment):
+        body.append(html.unescape(match.group(1) or match.group(2)))
+    if HEADING_FRAGMENT_RE.match(fragment):
+        headings.append(html.unescape(TAG_RE.sub("", fragment)))
+    else:
+        body.append(html.unescape(TAG_RE.sub(" ", fragment)))
+
+
+def page_terms(markdown, parse_cache=None):
+    # {term: weight} for a page, with heading terms weighted up. The build
+    # passes its parse cache, which holds the trees of the pages it just
+    # rendered, so a changed page isn't parsed a second time here.
+    headings = []
+    body = []
+    if parse_cache is not None:
+        tree = parse_cache.markdown_to_html(markdown)
+    else:
+        tree = markdown_to_html(markdown)
+    node_text(tree, headings, body)
+    terms = {}
+    for token in tokenize(" ".join(body)):
+        terms[token] = terms.get(token, 0) + 1
+    for token in tokenize(" ".join(headings)):
+        terms[token] = terms.get(token, 0) + HEADING_WEIGHT
+    return terms
+
+
+def extract_page(from_path, parse_cache=None):
+    with open(from_path, "rb") as f:
+        data = f.read()
+    markdown = data.decode("utf-8")
+    return {
+        "hash": hashlib.blake2b(data, digest_size=16).hexdigest(),
+        "title": extract_title(markdown) or os.path.splitext(os.path.basename(from_path))[0],
+        "terms": page_terms(markdown, parse_cache),
+    }
+
+
+# Worker processes load the parse cache once, through the pool initializer.
+_worker_parse_cache = None
+
+
+def _init_worker(parse_cache_path):
+    global _worker_parse_cache
+    _worker_parse_cache = ParseCache(parse_cache_path) if parse_cache_path else None
+
+
+def _extract_in_worker(from_path):
+    return extract_page(from_path, _worker_parse_cache)
+
+
+def source_hash(from_path):
+    with open(from_path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+def encode_postings(postings):
+    # [(doc, weight), ...] sorted by doc -> [doc gap, weight, doc gap, weight, ...].
+    # Doc ids grow slowly through a posting list, so the gaps are small
+    # numbers that take a digit or two each in the JSON.
+    flat = []
+    previous = 0
+    for doc, weight in postings:
+        flat.append(doc - previous)
+        flat.append(weight)
+        previous = doc
+    return flat
+
+
+def decode_postings(flat):
+    postings = []
+    doc = 0
+    for i in range(0, len(flat), 2):
+        doc += flat[i]
+        postings.append((doc, flat[i + 1]))
+    return postings
+
+
+def shard_prefix(term):
+    return term[:PREFIX_LENGTH]
+
+
+def shard_file(prefix):
+    # Prefixes outside [a-z0-9] are hex-encoded so every file name is safe.
+    if SAFE_PREFIX_RE.fullmatch(prefix):
+        return prefix + ".json"
+    return "x" + prefix.encode("utf-8").hex() + ".json"
+
+
+def load_search_cache(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if data.get("version") != SEARCH_CACHE_VERSION:
+        return {}
+    return data.get("pages", {})
+
+
+def save_search_cache(path, pages):
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        # dumps uses the C encoder; dump streams through the pure-Python one.
+        f.write(json.dumps({"version": SEARCH_CACHE_VERSION, "pages": pages}, sort_keys=True))
+    os.replace(tmp_path, path)
+
+
+def assign_ids(pages):
+    # Doc ids are kept across builds, and freed ids are reused lowest first,
+    # so adding or removing a page leaves the other pages' postings (and
+    # the shards holding them) unchanged.
+    used = {entry["id"] for entry in pages.values() if "id" in entry}
+    free = (doc for doc in range(len(pages) + len(used)) if doc not in used)
+    for source in sorted(pages):
+        if "id" not in pages[source]:
+            pages[source]["id"] = next(free)
+
+
+def load_meta(search_dir):
+    try:
+        with open(os.path.join(search_dir, SEARCH_META), encoding="utf-8") as f:
+            meta = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if meta.get("version") != SEARCH_INDEX_VERSION or meta.get("prefix_length") != PREFIX_LENGTH:
+        return None
+    return meta
+
+
+def load_shard(path):
+    with open(path, encoding="utf-8") as f:
+        shard = json.load(f)
+    return dict(zip(shard["terms"], shard["postings"]))
+
+
+def posting_changes(cached, pages):
+    # {term: {doc: weight, or None to drop the doc}} between the pages the
+    # index on disk was built from and the current ones. Unchanged pages
+    # keep their cache entry object and contribute nothing.
+    changes = {}
+    changed = [
+        (cached.get(source), pages.get(source)) for source in cached.keys() | pages.keys()
+        if cached.get(source) is not pages.get(source)
+    ]
+    # All removals first, since a freed doc id may be reused by a new page.
+    for old, _ in changed:
+        if old is not None:
+            for term in old["terms"]:
+                changes.setdefault(term, {})[old["id"]] = None
+    for _, new in changed:
+        if new is not None:
+            for term, weight in new["terms"].items():
+                changes.setdefault(term, {})[new["id"]] = weight
+    return changes
+
+
+def full_shards(pages):
+    postings = {}
+    for entry in pages.values():
+        for term, weight in entry["terms"].items():
+            postings.setdefault(term, []).append((entry["id"], weight))
+
+    shards = {}
+    for term in sorted(postings):
+        shards.setdefault(shard_prefix(term), {})[term] = encode_postings(sorted(postings[term]))
+    return shards
+
+
+def patched_shards(search_dir, old_shards, changes):
+    # Loads only the shards the changed terms fall in and re-encodes only
+    # those terms' posting lists; every other list is kept as it was.
+    by_prefix = {}
+    for term, docs in changes.items():
+        by_prefix.setdefault(shard_prefix(term), {})[term] = docs
+
+    shards = {}
+    for prefix, terms in by_prefix.items():
+        name = old_shards.get(prefix)
+        shard = load_shard(os.path.join(search_dir, name)) if name else {}
+        for term, docs in terms.items():
+            postings = dict(decode_postings(shard.get(term, [])))
+            for doc, weight in docs.items():
+                if weight is None:
+                    postings.pop(doc, None)
+                else:
+                    postings[doc] = weight
+            if postings:
+                shard[term] = encode_postings(sorted(postings.items()))
+            else:
+                shard.pop(term, None)
+        shards[prefix] = dict(sorted(shard.items()))
+    return shards
+
+
+def write_json(path, data):
+    return write_if_changed(path, json.dumps(data, ensure_ascii=False, separators=(",", ":")))
+
+
+def build_search_index(content_dir, dest_dir, cache_path=None, workers=None, parse_cache_path=None):
+    # Writes dest_dir/search/: index.json with the documents and shard list,
+    # and one file per term prefix holding that prefix's sorted terms and
+    # their delta-encoded posting lists. Extracted terms are cached per page
+    # under the source's hash, so only changed pages are read again, and
+    # only the posting lists of their terms are rebuilt. Their trees come
+    # from parse_cache_path when page generation left them there; the parse
+    # cache is only read, never saved, here.
+    cached = load_search_cache(cache_path) if cache_path else {}
+    pages = {}
+    pending = []
+    for from_path, dest_path in find_pages(content_dir, dest_dir):
+        source = os.path.normpath(from_path)
+        entry = cached.get(source)
+        if entry is not None and entry["hash"] == source_hash(from_path):
+            pages[source] = entry
+        else:
+            pending.append(source)
+            pages[source] = {"url": None} if entry is None else {"id": entry["id"]}
+        pages[source]["url"] = "/" + site_path(dest_path, dest_dir)
+
+    workers = workers or os.cpu_count() or 1
+    if len(pending) < PARALLEL_THRESHOLD or workers == 1:
+        parse_cache = ParseCache(parse_cache_path) if parse_cache_path and pending else None
+        extracted = [extract_page(source, parse_cache) for source in pending]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(parse_cache_path,)
+        ) as executor:
+            extracted = list(executor.map(
+                _extract_in_worker, pending, chunksize=max(1, len(pending) // (workers * 4))
+            ))
+    for source, entry in zip(pending, extracted):
+        pages[source].update(entry)
+    assign_ids(pages)
+
+    # The shards on disk can be patched when they were built from the cached
+    # pages; otherwise (first build, cleaned output, new format) they are
+    # all rebuilt.
+    search_dir = os.path.join(dest_dir, SEARCH_DIR)
+    meta = load_meta(search_dir) if cached else None
+    files = {}
+    if meta is not None and all(
+        os.path.exists(os.path.join(search_dir, name)) for name in meta["shards"].values()
+    ):
+        files.update(meta["shards"])
+        shards = patched_shards(search_dir, files, posting_changes(cached, pages))
+    else:
+        shards = full_shards(pages)
+
+    written = []
+    for prefix, shard in shards.items():
+        if not shard:
+            files.pop(prefix, None)
+            continue
+        name = files[prefix] = shard_file(prefix)
+        if write_json(os.path.join(search_dir, name), {"terms": list(shard), "postings": list(shard.values())}):
+            written.append(name)
+
+    docs = [None] * (max((entry["id"] for entry in pages.values()), default=-1) + 1)
+    for entry in pages.values():
+        docs[entry["id"]] = [entry["url"], entry["title"]]
+    meta = {
+        "version": SEARCH_INDEX_VERSION,
+        "prefix_length": PREFIX_LENGTH,
+        "docs": docs,
+        "shards": dict(sorted(files.items())),
+    }
+    if write_json(os.path.join(search_dir, SEARCH_META), meta):
+        written.append(SEARCH_META)
+
+    # Compressed siblings are left to the precompress stage's own cleanup.
+    current = set(files.values()) | {SEARCH_META}
+    removed = sorted(
+        name for name in os.listdir(search_dir) if name.endswith(".json") and name not in current
+    )
+    for name in removed:
+        os.remove(os.path.join(search_dir, name))
+
+    if cache_path and pages != cached:
+        save_search_cache(cache_path, pages)
+    return {
+        "pages": len(pages),
+        "extracted": len(pending),
+        "shards": len(files),
+        "written": sorted(written),
+        "removed": removed,
+    }
+
+
+class SearchIndex:
+    # Reads an index the way a browser client would: index.json once, then
+    # only the shards a query's terms fall in. Used by the tests and the
+    # query benchmark; no client script ships with the generator.
+    def __init__(self, search_dir):
+        self.search_dir = search_dir
+        with open(os.path.join(search_dir, SEARCH_META), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != SEARCH_INDEX_VERSION:
+            raise ValueError(f"{search_dir}: unsupported search index version {meta.get('version')}")
+        self.prefix_length = meta["prefix_length"]
+        self.docs = meta["docs"]
+        self.shard_files = meta["shards"]
+        self.shards = {}
+
+    def shard(self, prefix):
+        shard = self.shards.get(prefix)
+        if shard is None:
+            name = self.shard_files.get(prefix)
+            if name is None:
+                return None
+            with open(os.path.join(self.search_dir, name), encoding="utf-8") as f:
+                shard = self.shards[prefix] = json.load(f)
+        return shard
+
+    def lookup(self, term, prefix=False):
+        # {doc: weight} for the term, or for every term starting with it.
+        if len(term) < self.prefix_length:
+            # Shorter than a shard key: every shard the term is a prefix of.
+            prefixes = [key for key in self.shard_files if key.startswith(term)] if prefix else [term]
+        else:
+            prefixes = [term[:self.prefix_length]]
+
+        weights = {}
+        for key in prefixes:
+            shard = self.shard(key)
+            if shard is None:
+                continue
+            terms = shard["terms"]
+            i = bisect.bisect_left(terms, term)
+            while i < len(terms) and (terms[i] == term or prefix and terms[i].startswith(term)):
+                for doc, weight in decode_postings(shard["postings"][i]):
+                    weights[doc] = weights.get(doc, 0) + weight
+                if not prefix:
+                    break
+                i += 1
+        return weights
+
+    def search(self, query, limit=10):
+        # Pages containing every term, ranked by summed weight. The last
+        # term matches as a prefix, since it may still be being typed.
+        tokens = TOKEN_RE.findall(query.lower())
+        if not tokens:
+            return []
+        # A single letter is only worth looking up as the prefix being typed.
+        terms = tokenize(" ".join(tokens[:-1])) + tokens[-1:]
+        scores = None
+        for i, term in enumerate(terms):
+            weights = self.lookup(term, prefix=i == len(terms) - 1)
+            if scores is None:
+                scores = weights
+            else:
+                scores = {doc: score + weights[doc] for doc, score in scores.items() if doc in weights}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(self.docs[doc][0], self.docs[doc][1], score) for doc, score in ranked]
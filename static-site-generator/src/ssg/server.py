@@ -0,0 +1,761 @@
+import os
+import argparse
+import asyncio
+import contextlib
+import functools
+import http.client
+import io
+import json
+import mimetypes
+import posixpath
+import signal
+import threading
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from http import HTTPStatus
+from http.server import HTTPServer, SimpleHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+
+class FileCache:
+    # Keeps the bytes of small, frequently requested files in memory. Entries
+    # are validated against the file's current (mtime, size) on every hit and
+    # the least recently used ones go first once max_bytes is exceeded.
+    def __init__(self, max_bytes=32 * 1024 * 1024, max_file_size=64 * 1024):
+        self.max_bytes = max_bytes
+        self.max_file_size = max_file_size
+        self.entries = OrderedDict()
+        self.size = 0
+        self.lock = threading.Lock()
+
+    def get(self, path, stat):
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None:
+                return None
+            mtime_ns, data = entry
+            if mtime_ns != stat.st_mtime_ns or len(data) != stat.st_size:
+                self.size -= len(data)
+                del self.entries[path]
+                return None
+            self.entries.move_to_end(path)
+            return data
+
+    def put(self, path, stat, data):
+        if len(data) > self.max_file_size:
+            return
+        with self.lock:
+            old = self.entries.pop(path, None)
+            if old is not None:
+                self.size -= len(old[1])
+            self.entries[path] = (stat.st_mtime_ns, data)
+            self.size += len(data)
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+
+
+def make_etag(stat):
+    return f'"{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+
+def parse_range(header, size):
+    # Returns (start, end) inclusive, None when the header should be ignored
+    # and the whole file sent, or "unsatisfiable". Only single ranges are
+    # supported; a multi-range request gets the full body.
+    units, _, spec = header.partition("=")
+    if units.strip() != "bytes" or "," in spec:
+        return None
+    first, sep, last = spec.strip().partition("-")
+    if not sep:
+        return None
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else size - 1
+        else:
+            if not last:
+                return None
+            start = max(0, size - int(last))
+            end = size - 1
+    except ValueError:
+        return None
+    if start >= size:
+        return "unsatisfiable"
+    if end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+# Written into the served directory by the build's fingerprint and image
+# stages (fingerprint.ASSET_MANIFEST, images.IMAGE_MANIFEST). The files they
+# list are named after their content, so clients may keep them for a year.
+ASSET_MANIFEST = "asset-manifest.json"
+IMAGE_MANIFEST = "image-manifest.json"
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+# Preferred first. Siblings are written by the build's precompress stage.
+PRECOMPRESSED_ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepted_encodings(header):
+    accepted = set()
+    refused = set()
+    for part in header.split(","):
+        name, _, params = part.partition(";")
+        name = name.strip().lower()
+        if not name:
+            continue
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip() == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        (accepted if quality > 0 else refused).add(name)
+
+    if "*" in accepted:
+        accepted.update(encoding for encoding, _ in PRECOMPRESSED_ENCODINGS)
+    return accepted - refused
+
+
+def read_manifest(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def load_immutable_paths(root):
+    # Paths relative to root, "/"-separated. Only what the build recorded
+    # counts: a file whose name merely looks fingerprinted is revalidated.
+    assets = read_manifest(os.path.join(root, ASSET_MANIFEST))
+    images = read_manifest(os.path.join(root, IMAGE_MANIFEST))
+    return frozenset(assets.values()) | frozenset(images.get("variants", ()))
+
+
+def cache_control(rel_path, immutable):
+    if rel_path in immutable:
+        return IMMUTABLE_CACHE_CONTROL
+    return "no-cache"
+
+
+def is_not_modified(headers, etag, stat):
+    if_none_match = headers.get("If-None-Match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or etag in tags
+
+    if_modified_since = headers.get("If-Modified-Since")
+    if if_modified_since is not None and stat is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        return int(stat.st_mtime) <= since
+    return False
+
+
+def requested_range(headers, etag, size):
+    header = headers.get("Range")
+    if header is None:
+        return None
+    if_range = headers.get("If-Range")
+    if if_range is not None and if_range.strip() != etag:
+        return None
+    return parse_range(header, size)
+
+
+class StaticHandler(SimpleHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body are separate writes; with Nagle on, the body waits
+    # for the client's delayed ACK of the headers on every kept-alive request.
+    disable_nagle_algorithm = True
+    file_cache = FileCache()
+    # Set from the directory's build manifests when the server starts. A
+    # rebuild can only add names to them, which are then sent as no-cache.
+    immutable = frozenset()
+
+    def do_GET(self):
+        self.serve_file(head=False)
+
+    def do_HEAD(self):
+        self.serve_file(head=True)
+
+    def cache_control(self, path):
+        rel_path = os.path.relpath(path, self.directory).replace(os.sep, "/")
+        return cache_control(rel_path, self.immutable)
+
+    def not_modified(self, etag, stat):
+        return is_not_modified(self.headers, etag, stat)
+
+    def requested_range(self, etag, stat):
+        return requested_range(self.headers, etag, stat.st_size)
+
+    def serve_file(self, head):
+        path = self.translate_path(self.path)
+        if os.path.isdir(path):
+            index = os.path.join(path, "index.html")
+            if not self.path.split("?", 1)[0].endswith("/") or not os.path.isfile(index):
+                # Redirects and directory listings are left to the base class.
+                return super().do_HEAD() if head else super().do_GET()
+            path = index
+
+        try:
+            stat = os.stat(path)
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+
+        encoding, body_path, stat = self.negotiate_encoding(path, stat)
+        try:
+            f = open(body_path, "rb")
+        except OSError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+
+        with f:
+            stat = os.fstat(f.fileno())
+            etag = make_etag(stat)
+
+            if self.not_modified(etag, stat):
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_common_headers(path, etag, stat)
+                self.end_headers()
+                return
+
+            byte_range = self.requested_range(etag, stat)
+            if byte_range == "unsatisfiable":
+                self.send_response(HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE)
+                self.send_header("Content-Range", f"bytes */{stat.st_size}")
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+
+            if byte_range is None:
+                start, end = 0, stat.st_size - 1
+                self.send_response(HTTPStatus.OK)
+            else:
+                start, end = byte_range
+                self.send_response(HTTPStatus.PARTIAL_CONTENT)
+                self.send_header("Content-Range", f"bytes {start}-{end}/{stat.st_size}")
+
+            length = end - start + 1
+            self.send_common_headers(path, etag, stat)
+            self.send_header("Content-Type", self.guess_type(path))
+            if encoding is not None:
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(length))
+            self.end_headers()
+
+            if head or length <= 0:
+                return
+            self.send_body(f, body_path, stat, start, length)
+
+    def negotiate_encoding(self, path, stat):
+        # Pick a precompressed sibling written by the build. One whose mtime
+        # doesn't match the source is stale and never served.
+        accepted = accepted_encodings(self.headers.get("Accept-Encoding", ""))
+        for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+            if encoding not in accepted:
+                continue
+            try:
+                encoded_stat = os.stat(path + suffix)
+            except OSError:
+                continue
+            if encoded_stat.st_mtime_ns == stat.st_mtime_ns:
+                return encoding, path + suffix, encoded_stat
+        return None, path, stat
+
+    def send_common_headers(self, path, etag, stat):
+        self.send_header("ETag", etag)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Last-Modified", formatdate(stat.st_mtime, usegmt=True))
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Cache-Control", self.cache_control(path))
+
+    def send_body(self, f, path, stat, start, length):
+        cache = self.file_cache
+        if stat.st_size <= cache.max_file_size:
+            data = cache.get(path, stat)
+            if data is None:
+                data = f.read()
+                cache.put(path, stat, data)
+            self.wfile.write(data[start:start + length])
+            return
+
+        # socket.sendfile uses os.sendfile where available, so large bodies
+        # go from the page cache to the socket without passing through Python.
+        self.connection.sendfile(f, start, length)
+
+
+class LazyHandler(StaticHandler):
+    # --lazy: renders each page from its markdown source when it is
+    # requested and serves static files from the static directory in place,
+    # so previewing a site needs no build at all. run_lazy sets `site` and
+    # points the handler's directory at the static directory.
+    site = None
+
+    def serve_file(self, head):
+        resolved = self.site.resolve(normalize_url_path(self.path))
+        if resolved is None:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+        kind, target = resolved
+        if kind == "static":
+            super().serve_file(head)
+            return
+        if kind == "redirect":
+            query = urlsplit(self.path).query
+            self.send_response(HTTPStatus.MOVED_PERMANENTLY)
+            self.send_header("Location", target + ("?" + query if query else ""))
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        try:
+            body, etag = self.site.render(target)
+        except FileNotFoundError:
+            self.send_error(HTTPStatus.NOT_FOUND, "File not found")
+            return
+        except ValueError as e:
+            self.log_error("%s", e)
+            self.send_error(HTTPStatus.INTERNAL_SERVER_ERROR, "Render failed", str(e))
+            return
+
+        if is_not_modified(self.headers, etag, None):
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if not head:
+            self.wfile.write(body)
+
+
+# Written by the build once public/ is complete. The async server rebuilds
+# its file index when this file's mtime moves.
+BUILD_STAMP = ".build-stamp"
+
+
+class FileIndex:
+    # Path-to-metadata map of a directory, built once per build: content
+    # types, cache policies and the fresh precompressed siblings. Serving a
+    # request then needs no path translation or sibling stats. Sizes and
+    # ETags come from the opened file instead, since a build may rewrite it
+    # before the index catches up.
+    def __init__(self, root):
+        self.root = os.path.abspath(root)
+        self.files = {}
+        self.dirs = set()
+        self.scan()
+
+    def scan(self):
+        files = {}
+        dirs = {"/"}
+        immutable = load_immutable_paths(self.root)
+        for directory, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            rel_dir = os.path.relpath(directory, self.root).replace(os.sep, "/")
+            prefix = "/" if rel_dir == "." else f"/{rel_dir}/"
+            dirs.add(prefix)
+            names = set(filenames)
+            for name in filenames:
+                if name.startswith("."):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                encodings = []
+                for encoding, suffix in PRECOMPRESSED_ENCODINGS:
+                    if name + suffix not in names:
+                        continue
+                    try:
+                        encoded_stat = os.stat(path + suffix)
+                    except OSError:
+                        continue
+                    if encoded_stat.st_mtime_ns == stat.st_mtime_ns:
+                        encodings.append((encoding, path + suffix))
+                files[prefix + name] = {
+                    "path": path,
+                    "content_type": mimetypes.guess_type(name)[0] or "application/octet-stream",
+                    "cache_control": cache_control(prefix[1:] + name, immutable),
+                    "encodings": encodings,
+                }
+        self.files = files
+        self.dirs = dirs
+
+    def lookup(self, url_path):
+        # Returns (entry, None), (None, redirect_location) or (None, None).
+        if url_path.endswith("/"):
+            return self.files.get(url_path + "index.html"), None
+        entry = self.files.get(url_path)
+        if entry is None and url_path + "/" in self.dirs:
+            return None, url_path + "/"
+        return entry, None
+
+
+class AsyncServer:
+    # Serves a directory from a single event loop. Each connection is a task
+    # handling keep-alive requests in turn; writes wait for the transport's
+    # buffer to drain, so a slow client holds only its own buffer.
+    def __init__(
+        self, directory, max_connections=4096, keepalive_timeout=15.0,
+        shutdown_timeout=5.0, stamp_interval=0.5,
+    ):
+        self.directory = directory
+        self.max_connections = max_connections
+        self.keepalive_timeout = keepalive_timeout
+        self.shutdown_timeout = shutdown_timeout
+        self.stamp_interval = stamp_interval
+        self.index = FileIndex(directory)
+        self.stamp = self.read_stamp()
+        self.file_cache = FileCache()
+        self.limit = None
+        self.tasks = set()
+        self.idle = set()
+        self.closing = False
+        self.server = None
+
+    def read_stamp(self):
+        try:
+            return os.stat(os.path.join(self.directory, BUILD_STAMP)).st_mtime_ns
+        except OSError:
+            return None
+
+    async def watch_stamp(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(self.stamp_interval)
+            stamp = self.read_stamp()
+            if stamp != self.stamp:
+                self.stamp = stamp
+                self.index = await loop.run_in_executor(None, FileIndex, self.directory)
+
+    async def start(self, host="", port=8888):
+        self.limit = asyncio.Semaphore(self.max_connections)
+        self.server = await asyncio.start_server(
+            self.handle_connection, host or None, port, backlog=min(self.max_connections, 4096)
+        )
+        return self.server
+
+    async def handle_connection(self, reader, writer):
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        # Hold writes once 64KB are queued for this client.
+        writer.transport.set_write_buffer_limits(high=64 * 1024)
+        try:
+            async with self.limit:
+                while not self.closing:
+                    self.idle.add(writer)
+                    try:
+                        head = await asyncio.wait_for(
+                            reader.readuntil(b"\r\n\r\n"), self.keepalive_timeout
+                        )
+                    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                            asyncio.TimeoutError, ConnectionError):
+                        break
+                    finally:
+                        self.idle.discard(writer)
+                    if not await self.handle_request(head, reader, writer):
+                        break
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.tasks.discard(task)
+            writer.close()
+            with contextlib.suppress(Exception):
+                await writer.wait_closed()
+
+    async def handle_request(self, head, reader, writer):
+        # Returns whether the connection stays open for another request.
+        request_line, _, header_bytes = head.partition(b"\r\n")
+        try:
+            method, target, version = request_line.decode("latin-1").split()
+        except ValueError:
+            await self.send_error(writer, HTTPStatus.BAD_REQUEST, keep_alive=False)
+            return False
+        headers = http.client.parse_headers(io.BytesIO(header_bytes))
+
+        connection = headers.get("Connection", "").lower()
+        keep_alive = (
+            not self.closing
+            and "close" not in connection
+            and (version == "HTTP/1.1" or "keep-alive" in connection)
+        )
+
+        if "Transfer-Encoding" in headers:
+            # Request bodies are never used, and a chunked one can't be
+            # skipped without decoding it.
+            await self.send_error(writer, HTTPStatus.NOT_IMPLEMENTED, keep_alive=False)
+            return False
+        try:
+            length = int(headers.get("Content-Length") or 0)
+        except ValueError:
+            length = -1
+        if length < 0:
+            await self.send_error(writer, HTTPStatus.BAD_REQUEST, keep_alive=False)
+            return False
+        if length:
+            await reader.readexactly(length)
+
+        if method not in ("GET", "HEAD"):
+            await self.send_error(
+                writer, HTTPStatus.NOT_IMPLEMENTED, keep_alive, {"Allow": "GET, HEAD"}
+            )
+            return keep_alive
+
+        entry, location = self.index.lookup(normalize_url_path(target))
+        if location is not None:
+            await self.send_error(writer, HTTPStatus.MOVED_PERMANENTLY, keep_alive, {"Location": location})
+            return keep_alive
+        if entry is None:
+            await self.send_error(writer, HTTPStatus.NOT_FOUND, keep_alive)
+            return keep_alive
+
+        return await self.send_file(entry, headers, writer, method == "HEAD", keep_alive)
+
+    def negotiate_encoding(self, entry, headers):
+        if entry["encodings"]:
+            accepted = accepted_encodings(headers.get("Accept-Encoding", ""))
+            for encoding, path in entry["encodings"]:
+                if encoding in accepted:
+                    return encoding, path
+        return None, entry["path"]
+
+    async def send_file(self, entry, headers, writer, head, keep_alive):
+        # Returns whether the connection can carry another response.
+        encoding, path = self.negotiate_encoding(entry, headers)
+        # Opened here rather than in an executor: on a local disk that is
+        # cheaper than the thread hop. The headers describe the opened file,
+        # not the index, which lags behind a build by up to stamp_interval.
+        try:
+            f = open(path, "rb")
+        except OSError:
+            await self.send_error(writer, HTTPStatus.NOT_FOUND, keep_alive)
+            return keep_alive
+        with f:
+            return await self.send_open_file(entry, f, path, encoding, headers, writer, head, keep_alive)
+
+    async def send_open_file(self, entry, f, path, encoding, headers, writer, head, keep_alive):
+        loop = asyncio.get_running_loop()
+        stat = os.fstat(f.fileno())
+        etag = make_etag(stat)
+        response_headers = {
+            "ETag": etag,
+            "Vary": "Accept-Encoding",
+            "Last-Modified": formatdate(stat.st_mtime, usegmt=True),
+            "Accept-Ranges": "bytes",
+            "Cache-Control": entry["cache_control"],
+        }
+
+        if is_not_modified(headers, etag, stat):
+            self.write_head(writer, HTTPStatus.NOT_MODIFIED, response_headers, keep_alive)
+            await writer.drain()
+            return keep_alive
+
+        size = stat.st_size
+        data = None
+        cache = self.file_cache
+        if not head and size <= cache.max_file_size:
+            # Read before the headers go out, so Content-Length counts these
+            # bytes even if a build is rewriting the file in place.
+            data = cache.get(path, stat)
+            if data is None:
+                data = await loop.run_in_executor(None, f.read)
+                if len(data) == size:
+                    cache.put(path, stat, data)
+            size = len(data)
+
+        byte_range = requested_range(headers, etag, size)
+        if byte_range == "unsatisfiable":
+            response_headers = {"Content-Range": f"bytes */{size}", "Content-Length": "0"}
+            self.write_head(writer, HTTPStatus.REQUESTED_RANGE_NOT_SATISFIABLE, response_headers, keep_alive)
+            await writer.drain()
+            return keep_alive
+
+        if byte_range is None:
+            status = HTTPStatus.OK
+            start, end = 0, size - 1
+        else:
+            status = HTTPStatus.PARTIAL_CONTENT
+            start, end = byte_range
+            response_headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        length = end - start + 1
+
+        response_headers["Content-Type"] = entry["content_type"]
+        if encoding is not None:
+            response_headers["Content-Encoding"] = encoding
+        response_headers["Content-Length"] = str(length)
+        self.write_head(writer, status, response_headers, keep_alive)
+        if head or length <= 0:
+            await writer.drain()
+            return keep_alive
+
+        if data is not None:
+            writer.write(data[start:start + length])
+            await writer.drain()
+            return keep_alive
+
+        # loop.sendfile uses os.sendfile when the transport allows it and
+        # otherwise reads in chunks, waiting for the socket to drain between.
+        # A file truncated mid-send leaves the body short, and only closing
+        # the connection tells the client so.
+        await writer.drain()
+        sent = await loop.sendfile(writer.transport, f, start, length)
+        return keep_alive and sent == length
+
+    def write_head(self, writer, status, headers, keep_alive):
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}", f"Date: {formatdate(usegmt=True)}"]
+        lines.extend(f"{name}: {value}" for name, value in headers.items())
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def send_error(self, writer, status, keep_alive, headers=None):
+        body = f"{status.value} {status.phrase}\n".encode()
+        headers = dict(headers or {})
+        headers["Content-Type"] = "text/plain; charset=utf-8"
+        headers["Content-Length"] = str(len(body))
+        self.write_head(writer, status, headers, keep_alive)
+        writer.write(body)
+        await writer.drain()
+
+    async def shutdown(self):
+        # Stop accepting, close idle keep-alive connections and give the
+        # ones mid-response shutdown_timeout seconds to finish.
+        self.closing = True
+        self.server.close()
+        for writer in list(self.idle):
+            writer.close()
+        if self.tasks:
+            _, pending = await asyncio.wait(set(self.tasks), timeout=self.shutdown_timeout)
+            for task in pending:
+                task.cancel()
+        await self.server.wait_closed()
+
+    async def serve(self, host="", port=8888):
+        server = await self.start(host, port)
+        stamp_task = asyncio.create_task(self.watch_stamp())
+        stop = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, stop.set)
+        print(f"Serving HTTP (asyncio) on http://localhost:{server.sockets[0].getsockname()[1]} "
+              f"from directory '{self.directory}'...")
+        await stop.wait()
+        stamp_task.cancel()
+        await self.shutdown()
+
+
+def normalize_url_path(target):
+    # "/a/../b/" -> "/b/". The trailing slash is kept, since it decides
+    # between serving a directory's index.html and redirecting to it.
+    raw = unquote(urlsplit(target).path)
+    path = posixpath.normpath("/" + raw.lstrip("/"))
+    if raw.endswith("/") and path != "/":
+        path += "/"
+    return path
+
+
+def raise_open_file_limit():
+    # Each keep-alive client is a file descriptor; the default soft limit
+    # (often 1024) is the first thing thousands of clients run into.
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        with contextlib.suppress(ValueError, OSError):
+            resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def run_async(directory=".", port=8888, max_connections=4096):
+    raise_open_file_limit()
+    asyncio.run(AsyncServer(directory, max_connections=max_connections).serve(port=port))
+
+
+def run_lazy(content_dir="content", static_dir="static", template_path="template.html", port=8888):
+    # Only this mode needs the site modules, so serving a built directory
+    # stays free of them.
+    from .lazy import LazySite
+
+    LazyHandler.site = LazySite(content_dir, static_dir, template_path)
+    handler = functools.partial(LazyHandler, directory=os.path.abspath(static_dir))
+    httpd = ProdHTTPServer(("", port), handler)
+    print(f"Rendering '{content_dir}' on demand at http://localhost:{port}, static files from '{static_dir}'...")
+    httpd.serve_forever()
+
+
+class ProdHTTPServer(ThreadingHTTPServer):
+    # socketserver's default listen backlog of 5 turns a burst of new
+    # clients into SYN retries of a second or more.
+    request_queue_size = 1024
+
+
+def run(
+    server_class=HTTPServer,
+    handler_class=SimpleHTTPRequestHandler,
+    port=8888,
+    directory=None,
+):
+    if directory:  # Change the current working directory if directory is specified
+        os.chdir(directory)
+    server_address = ("", port)
+    httpd = server_class(server_address, handler_class)
+    print(f"Serving HTTP on http://localhost:{port} from directory '{directory}'...")
+    httpd.serve_forever()
+
+
+def main(argv=None, prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="HTTP Server")
+    parser.add_argument(
+        "--dir", type=str, help="Directory to serve files from", default="."
+    )
+    parser.add_argument("--port", type=int, help="Port to serve HTTP on", default=8888)
+    parser.add_argument(
+        "--prod", action="store_true",
+        help="Threaded keep-alive server with ETag/Range support and a hot-file cache",
+    )
+    parser.add_argument(
+        "--async", dest="use_async", action="store_true",
+        help="Single-process asyncio server for many concurrent keep-alive clients",
+    )
+    parser.add_argument(
+        "--lazy", action="store_true",
+        help="Render pages from --content on request and serve --static in place, without a build",
+    )
+    parser.add_argument("--content", default="content", help="Markdown sources for --lazy")
+    parser.add_argument("--static", default="static", help="Static files for --lazy")
+    parser.add_argument("--template", default="template.html", help="Page template for --lazy")
+    parser.add_argument(
+        "--max-connections", type=int, default=4096,
+        help="Connections --async serves at once; further clients wait (default 4096)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.lazy:
+        run_lazy(args.content, args.static, args.template, port=args.port)
+    elif args.use_async:
+        run_async(args.dir, port=args.port, max_connections=args.max_connections)
+    elif args.prod:
+        StaticHandler.immutable = load_immutable_paths(args.dir)
+        run(ProdHTTPServer, StaticHandler, port=args.port, directory=args.dir)
+    else:
+        run(port=args.port, directory=args.dir)
+
+
+if __name__ == "__main__":
+    main()
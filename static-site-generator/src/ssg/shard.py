@@ -0,0 +1,138 @@
+import hashlib
+import json
+import os
+
+from .copier import COPY_MODE_COPY, copy_file, make_dirs, run_parallel, scan_tree
+from .manifest import hash_file
+
+SHARD_MANIFEST = "shard-manifest.json"
+SHARD_MANIFEST_VERSION = 1
+
+
+def parse_shard(spec):
+    # "2/4" -> (2, 4). Shards are numbered from 1, as CI matrices usually are.
+    index, sep, count = spec.partition("/")
+    try:
+        index, count = int(index), int(count)
+    except ValueError:
+        raise ValueError(f"Invalid shard {spec!r}: expected i/N, e.g. 2/4") from None
+    if not sep or count < 1 or not 1 <= index <= count:
+        raise ValueError(f"Invalid shard {spec!r}: expected i/N with 1 <= i <= N")
+    return index, count
+
+
+def shard_name(index, count):
+    return f"{index}-of-{count}"
+
+
+def shard_of(rel_path, count):
+    # Stable across processes, machines and Python versions, unlike hash().
+    key = rel_path.replace(os.sep, "/").encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(key, digest_size=8).digest(), "big") % count + 1
+
+
+def in_shard(rel_path, shard):
+    index, count = shard
+    return shard_of(rel_path, count) == index
+
+
+def write_shard_manifest(dest, shard, pages, graph_pages, workers=None):
+    # Records every file of the shard's output with its hash, which of them
+    # are pages, and the pages' dependency graph entries, so a merge only
+    # needs the shard directories, wherever they were built.
+    _, files = scan_tree(dest)
+    rel_paths = [rel_path for rel_path, _ in files if rel_path != SHARD_MANIFEST]
+    hashes = run_parallel(lambda rel_path: hash_file(os.path.join(dest, rel_path)), rel_paths, workers)
+
+    index, count = shard
+    data = {
+        "version": SHARD_MANIFEST_VERSION,
+        "shard": index,
+        "count": count,
+        "files": {rel_path.replace(os.sep, "/"): digest for rel_path, digest in zip(rel_paths, hashes)},
+        "pages": sorted(os.path.relpath(path, dest).replace(os.sep, "/") for path in pages),
+        "graph": graph_pages,
+    }
+    with open(os.path.join(dest, SHARD_MANIFEST), "w", encoding="utf-8") as f:
+        json.dump(data, f, sort_keys=True)
+    return data
+
+
+def load_shards(shard_root):
+    manifests = []
+    for name in sorted(os.listdir(shard_root)):
+        path = os.path.join(shard_root, name, SHARD_MANIFEST)
+        if not os.path.isfile(path):
+            continue
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if data.get("version") != SHARD_MANIFEST_VERSION:
+            raise ValueError(f"{path}: unsupported shard manifest version {data.get('version')}")
+        manifests.append((os.path.join(shard_root, name), data))
+    return manifests
+
+
+def plan_merge(manifests):
+    # Returns {rel_path: shard_dir} naming one source for every output file.
+    # Raises ValueError when shards are missing or don't fit together: two
+    # shards with different bytes under one path, or a page output that
+    # another shard has as a static file.
+    if not manifests:
+        raise ValueError("No shard manifests found")
+    counts = {data["count"] for _, data in manifests}
+    if len(counts) != 1:
+        raise ValueError(f"Shards from different splits: N = {sorted(counts)}")
+    count = counts.pop()
+    indexes = sorted(data["shard"] for _, data in manifests)
+    if indexes != list(range(1, count + 1)):
+        raise ValueError(f"Expected shards 1..{count}, found {indexes}")
+
+    sources = {}
+    digests = {}
+    page_owners = {}
+    errors = []
+    for shard_dir, data in manifests:
+        for page in data["pages"]:
+            page_owners[page] = shard_dir
+        for rel_path, digest in data["files"].items():
+            if rel_path not in sources:
+                sources[rel_path] = shard_dir
+                digests[rel_path] = digest
+            elif digests[rel_path] != digest:
+                errors.append(f"{rel_path}: differs between {sources[rel_path]} and {shard_dir}")
+
+    for shard_dir, data in manifests:
+        pages = set(data["pages"])
+        for rel_path in data["files"]:
+            owner = page_owners.get(rel_path)
+            if owner is not None and rel_path not in pages:
+                errors.append(f"{rel_path}: page in {owner} but a static file in {shard_dir}")
+
+    if errors:
+        raise ValueError("Shard outputs collide:\n  " + "\n  ".join(sorted(set(errors))))
+    return sources
+
+
+def merge_shards(shard_root, dest, mode=COPY_MODE_COPY, workers=None):
+    # dest is rebuilt from the shards alone. With mode=hardlink the merge
+    # costs one link per file when the shards are on the same filesystem.
+    manifests = load_shards(shard_root)
+    sources = plan_merge(manifests)
+
+    # Only cleared once the shards are known to fit together.
+    if os.path.exists(dest):
+        import shutil
+
+        shutil.rmtree(dest)
+    make_dirs(dest, sorted({os.path.dirname(rel_path) for rel_path in sources} - {""}))
+
+    def place(item):
+        rel_path, shard_dir = item
+        return copy_file(os.path.join(shard_dir, rel_path), os.path.join(dest, rel_path), mode)
+
+    sizes = run_parallel(place, sorted(sources.items()), workers)
+
+    graph_pages = {}
+    for _, data in manifests:
+        graph_pages.update(data["graph"])
+    return {"files": len(sources), "bytes": sum(sizes), "shards": len(manifests), "graph": graph_pages}
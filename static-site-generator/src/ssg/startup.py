@@ -0,0 +1,130 @@
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from .benchmark import small_page
+
+# A no-op incremental build, from starting the interpreter to its exit, has
+# to stay well under this; --startup fails past it.
+STARTUP_BUDGET_MS = 100
+
+# Modules a build that has nothing to do must not import; each is only
+# needed once a stage has real work (or by another command).
+LAZY_MODULES = (
+    "concurrent.futures",
+    "multiprocessing",
+    "email.utils",
+    "ssg.server",
+    "ssg.watch",
+    "PIL",
+    "ssg.benchmark",
+)
+
+
+def parse_importtime(stderr):
+    # `-X importtime` lines are "import time: self | cumulative | name" in
+    # microseconds, with the name indented two spaces per nesting level.
+    # Returns (name, depth, self seconds, cumulative seconds) per import.
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        imports.append((name.strip(), depth, int(self_us) / 1e6, int(cumulative_us) / 1e6))
+    return imports
+
+
+def make_site(root, pages=50, seed=0):
+    rng = random.Random(seed)
+    os.makedirs(os.path.join(root, "content", "pages"))
+    os.makedirs(os.path.join(root, "static"))
+    for i in range(pages):
+        name = "index.md" if i == 0 else os.path.join("pages", f"{i}.md")
+        with open(os.path.join(root, "content", name), "w") as f:
+            f.write(small_page(rng, i))
+    with open(os.path.join(root, "static", "site.css"), "w") as f:
+        f.write("body { margin: 0 auto; max-width: 40em; }\n" * 20)
+    with open(os.path.join(root, "template.html"), "w") as f:
+        f.write('<!doctype html><html><head><title>{{ Title }}</title>'
+                '<link href="/site.css" rel="stylesheet"></head><body>{{ Content }}</body></html>\n')
+
+
+def build_command(args=(), importtime=False):
+    # What the installed `ssg` script runs; `python -m ssg` adds runpy.
+    return [sys.executable] + (["-X", "importtime"] if importtime else []) + [
+        "-c", "import sys; from ssg.cli import main; sys.exit(main())", "build", *args,
+    ]
+
+
+def measure_startup(site_dir, args=(), repeat=5):
+    # Builds site_dir once, then times `ssg build` with nothing left to do,
+    # as a fresh process each time. One more run under -X importtime gives
+    # the import breakdown; it isn't counted in the timings, since importtime
+    # slows imports down itself.
+    package_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    path = os.environ.get("PYTHONPATH")
+    env = dict(os.environ, PYTHONPATH=package_root + (os.pathsep + path if path else ""))
+    # Timed from bytecode, as an installed package runs; otherwise every run
+    # would include compiling the package's sources.
+    env.pop("PYTHONDONTWRITEBYTECODE", None)
+
+    def run(importtime=False):
+        return subprocess.run(
+            build_command(args, importtime), cwd=site_dir, env=env,
+            capture_output=True, text=True, check=True,
+        )
+
+    def interpreter():
+        subprocess.run([sys.executable, "-c", "pass"], env=env, check=True)
+
+    # The bare interpreter is timed alongside, as a yardstick for the
+    # machine: everything above it is the package's own startup and work.
+    run()
+    timings = []
+    baseline = []
+    for _ in range(repeat):
+        for func, results in ((run, timings), (interpreter, baseline)):
+            start = time.perf_counter()
+            func()
+            results.append(time.perf_counter() - start)
+    imports = parse_importtime(run(importtime=True).stderr)
+    return {
+        "timings": timings,
+        "median": statistics.median(timings),
+        "interpreter": statistics.median(baseline),
+        "imports": imports,
+    }
+
+
+def check_startup(budget_ms=STARTUP_BUDGET_MS, repeat=5, args=(), log=print):
+    # Returns 1 when the build is over budget or imports a lazy module.
+    with tempfile.TemporaryDirectory() as site_dir:
+        make_site(site_dir)
+        result = measure_startup(site_dir, args, repeat)
+
+    imports = result["imports"]
+    names = {name for name, *_ in imports}
+    total = sum(cumulative for _, depth, _, cumulative in imports if depth == 0)
+    log(f"no-op build: median {result['median'] * 1000:.1f} ms, min {min(result['timings']) * 1000:.1f} ms "
+        f"(budget {budget_ms} ms); bare interpreter {result['interpreter'] * 1000:.1f} ms")
+    log(f"imports: {total * 1000:.1f} ms under -X importtime, which inflates them")
+    log("slowest imports (self time):")
+    for name, _, self_time, cumulative in sorted(imports, key=lambda item: -item[2])[:10]:
+        log(f"  {name:<32} {self_time * 1000:>7.2f} ms  (cumulative {cumulative * 1000:.2f} ms)")
+
+    failed = False
+    loaded = [name for name in LAZY_MODULES if name in names]
+    if loaded:
+        log(f"OVER BUDGET: a no-op build imported {', '.join(loaded)}")
+        failed = True
+    if result["median"] * 1000 > budget_ms:
+        log(f"OVER BUDGET: {result['median'] * 1000:.1f} ms > {budget_ms} ms")
+        failed = True
+    return 1 if failed else 0
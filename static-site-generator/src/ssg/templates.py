@@ -0,0 +1,216 @@
+import functools
+import hashlib
+import os
+import re
+
+# {{ Name }} slots and {% tag "argument" %} tags. Slots are filled per page;
+# tags are resolved once, when the template is compiled.
+TOKEN_RE = re.compile(
+    r"{{\s*(\w+)\s*}}"
+    r"|{%\s*(\w+)(?:\s+(?:\"([^\"]*)\"|'([^']*)'|(\w+)))?\s*%}"
+)
+
+# Deepest chain of includes and parents a template may have.
+MAX_INCLUDE_DEPTH = 32
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+class Template:
+    # A compiled layout: literals[0], slot 0, literals[1], slot 1, ...,
+    # literals[-1]. Includes and inheritance are already resolved, so
+    # rendering is one pass writing strings, with no scanning or replacing.
+    # fragments names every other file (partial or parent) it was built from.
+    __slots__ = ("literals", "slots", "fragments", "digest")
+
+    def __init__(self, literals, slots, fragments=(), digest=None):
+        self.literals = literals
+        self.slots = slots
+        self.fragments = tuple(fragments)
+        self.digest = digest
+
+    def iter_chunks(self, values):
+        # Values are strings or HTML nodes; a node's chunks are passed
+        # through as its tree is walked, never joined into a string of their
+        # own. A slot without a value is written as it appeared.
+        literals = self.literals
+        yield literals[0]
+        for i, (name, raw) in enumerate(self.slots):
+            value = values.get(name, raw)
+            if value.__class__ is str:
+                yield value
+            else:
+                yield from value.iter_html()
+            yield literals[i + 1]
+
+    def write(self, fp, values):
+        for chunk in self.iter_chunks(values):
+            fp.write(chunk)
+
+    def render(self, values):
+        # One join over the whole page, rather than joining the content and
+        # then copying it into the layout. Same as iter_chunks, without a
+        # generator frame between the node walk and the join.
+        literals = self.literals
+        parts = [literals[0]]
+        for i, (name, raw) in enumerate(self.slots):
+            value = values.get(name, raw)
+            if value.__class__ is str:
+                parts.append(value)
+            else:
+                parts.extend(value.iter_html())
+            parts.append(literals[i + 1])
+        return "".join(parts)
+
+
+def parse(source, name):
+    # Returns nested nodes: strings, ("slot", name, raw), ("include", path)
+    # and ("block", name, nodes), plus the path given to {% extends %}.
+    root = []
+    stack = [(None, root)]
+    parent = None
+    position = 0
+    for match in TOKEN_RE.finditer(source):
+        nodes = stack[-1][1]
+        if match.start() > position:
+            nodes.append(source[position:match.start()])
+        position = match.end()
+
+        slot, tag = match.group(1), match.group(2)
+        argument = next((group for group in match.groups()[2:] if group is not None), None)
+        if slot is not None:
+            nodes.append(("slot", slot, match.group(0)))
+        elif tag == "block" and argument:
+            block = ("block", argument, [])
+            nodes.append(block)
+            stack.append((argument, block[2]))
+        elif tag == "endblock":
+            if len(stack) == 1:
+                raise ValueError(f"{name}: endblock without a block")
+            stack.pop()
+        elif tag == "include" and argument:
+            nodes.append(("include", argument))
+        elif tag == "extends" and argument:
+            if parent is not None or any(
+                not (isinstance(node, str) and not node.strip()) for node in root
+            ):
+                raise ValueError(f"{name}: extends must come first")
+            parent = argument
+        else:
+            raise ValueError(f"{name}: unknown template tag {match.group(0)!r}")
+
+    if len(stack) > 1:
+        raise ValueError(f"{name}: block {stack[-1][0]!r} is never closed")
+    if position < len(source):
+        stack[-1][1].append(source[position:])
+    return root, parent
+
+
+def collect_blocks(nodes, path, blocks):
+    # Blocks keep the path of the template defining them, which their
+    # includes are resolved against.
+    for node in nodes:
+        if isinstance(node, tuple) and node[0] == "block":
+            # The most derived template's version of a block wins.
+            blocks.setdefault(node[1], (node[2], path))
+            collect_blocks(node[2], path, blocks)
+
+
+class Compiler:
+    def __init__(self, read):
+        self.read = read
+        self.fragments = []
+        self.literals = [""]
+        self.slots = []
+
+    def load(self, path, chain):
+        if len(chain) > MAX_INCLUDE_DEPTH or path in chain:
+            raise ValueError(f"{path}: template includes or extends itself")
+        source = self.read(path)
+        if chain:
+            self.fragments.append(path)
+        return parse(source, path)
+
+    def compile(self, path, chain=()):
+        # Inheritance is resolved first: the chain of parents is walked to
+        # the root layout, with each child's blocks overriding its parents'.
+        nodes, parent = self.load(path, chain)
+        blocks = {}
+        while parent is not None:
+            collect_blocks(nodes, path, blocks)
+            chain += (path,)
+            path = os.path.normpath(os.path.join(os.path.dirname(path), parent))
+            nodes, parent = self.load(path, chain)
+        self.emit(nodes, blocks, path, chain + (path,))
+
+    def emit(self, nodes, blocks, path, chain):
+        for node in nodes:
+            if isinstance(node, str):
+                self.literals[-1] += node
+            elif node[0] == "slot":
+                self.slots.append((node[1], node[2]))
+                self.literals.append("")
+            elif node[0] == "block":
+                block_nodes, block_path = blocks.get(node[1], (node[2], path))
+                self.emit(block_nodes, blocks, block_path, chain)
+            else:
+                include = os.path.normpath(os.path.join(os.path.dirname(path), node[1]))
+                self.compile(include, chain)
+
+    def template(self):
+        return Template(tuple(self.literals), tuple(self.slots), dict.fromkeys(self.fragments))
+
+
+def read_file(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        raise ValueError(f"Template not found: {path}") from None
+
+
+def compile_template(path):
+    compiler = Compiler(read_file)
+    compiler.compile(os.path.normpath(path))
+    return compiler.template()
+
+
+@functools.lru_cache(maxsize=32)
+def compile_string(source, base_dir="."):
+    # For templates given as text. Includes and extends are resolved
+    # against base_dir.
+    virtual_path = os.path.normpath(os.path.join(base_dir, "<string>"))
+
+    def read(path):
+        return source if path == virtual_path else read_file(path)
+
+    compiler = Compiler(read)
+    compiler.compile(virtual_path)
+    return compiler.template()
+
+
+# path -> ({file: digest}, Template) for every template loaded in this
+# process. A hit costs hashing the template and its fragments, which are
+# small, so edits are picked up even when an mtime doesn't move.
+_compiled = {}
+
+
+def load_template(path):
+    path = os.path.normpath(path)
+    entry = _compiled.get(path)
+    if entry is not None:
+        digests, template = entry
+        try:
+            if all(file_digest(file) == digest for file, digest in digests.items()):
+                return template
+        except FileNotFoundError:
+            pass
+
+    template = compile_template(path)
+    digests = {file: file_digest(file) for file in (path,) + template.fragments}
+    template.digest = hashlib.blake2b("".join(digests.values()).encode(), digest_size=16).hexdigest()
+    _compiled[path] = (digests, template)
+    return template
@@ -0,0 +1,25 @@
+import unittest
+
+from .benchmark import compare, make_corpus, run
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_corpus_is_deterministic(self):
+        self.assertEqual(make_corpus(seed=3), make_corpus(seed=3))
+
+    def test_run_selected_cases(self):
+        report = run(repeat=1, only=["text_to_textnodes"], log=lambda line: None)
+        self.assertEqual(list(report["results"]), ["text_to_textnodes/link_dense"])
+        self.assertEqual(report["results"]["text_to_textnodes/link_dense"]["runs"], 1)
+
+    def test_compare_flags_regressions_beyond_threshold(self):
+        baseline = {"results": {"a": {"median": 1.0}, "b": {"median": 1.0}, "gone": {"median": 1.0}}}
+        report = {"results": {"a": {"median": 1.05}, "b": {"median": 1.5}, "new": {"median": 9.0}}}
+
+        regressions = compare(report, baseline, threshold=0.10)
+
+        self.assertEqual([name for name, *_ in regressions], ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,76 @@
+import json
+import os
+import tempfile
+import unittest
+
+from .blockcache import BlockCache
+from .conversion import markdown_to_html
+
+MARKDOWN = "# Title\n\nSome **bold** text\n\n```\ncode\n```\n\nSome **bold** text"
+
+
+class TestBlockCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "cache", "blocks.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_and_put(self):
+        cache = BlockCache()
+        self.assertIsNone(cache.get("block"))
+        cache.put("block", "<p>block</p>")
+        self.assertEqual(cache.get("block"), "<p>block</p>")
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_lru_eviction(self):
+        cache = BlockCache(maxsize=2)
+        cache.put("a", "A")
+        cache.put("b", "B")
+        cache.get("a")
+        cache.put("c", "C")
+        self.assertEqual(cache.get("a"), "A")
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+
+    def test_markdown_to_html_uses_cache(self):
+        cache = BlockCache()
+        expected = markdown_to_html(MARKDOWN).to_html()
+
+        self.assertEqual(markdown_to_html(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual((cache.hits, cache.misses), (1, 3))
+
+        self.assertEqual(markdown_to_html(MARKDOWN, cache).to_html(), expected)
+        self.assertEqual(cache.hits, 5)
+
+    def test_persistence(self):
+        cache = BlockCache(path=self.path)
+        markdown_to_html(MARKDOWN, cache)
+        cache.save()
+
+        reloaded = BlockCache(path=self.path)
+        self.assertEqual(len(reloaded), 3)
+        markdown_to_html(MARKDOWN, reloaded)
+        self.assertEqual(reloaded.misses, 0)
+
+    def test_version_mismatch_discards_entries(self):
+        os.makedirs(os.path.dirname(self.path))
+        with open(self.path, "w") as f:
+            json.dump({"version": -1, "entries": [["key", "<p>stale</p>"]]}, f)
+        self.assertEqual(len(BlockCache(path=self.path)), 0)
+
+    def test_take_added(self):
+        cache = BlockCache()
+        cache.put("a", "A")
+        added = cache.take_added()
+        self.assertEqual(list(added.values()), ["A"])
+        self.assertEqual(cache.take_added(), {})
+
+        other = BlockCache()
+        other.merge(added)
+        self.assertEqual(other.get("a"), "A")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import contextlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from . import cli
+from .startup import LAZY_MODULES, make_site, parse_importtime
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def loaded_modules(statement):
+    env = dict(os.environ, PYTHONPATH=PACKAGE_ROOT)
+    result = subprocess.run(
+        [sys.executable, "-c", f"import sys; {statement}; print('\\n'.join(sys.modules))"],
+        env=env, capture_output=True, text=True, check=True,
+    )
+    return set(result.stdout.split())
+
+
+class TestCli(unittest.TestCase):
+    def test_usage(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out):
+            self.assertEqual(cli.main(["--help"]), 0)
+            self.assertEqual(cli.main([]), 2)
+        for command in cli.COMMANDS:
+            self.assertIn(command, out.getvalue())
+
+    def test_unknown_command(self):
+        err = io.StringIO()
+        with contextlib.redirect_stderr(err):
+            self.assertEqual(cli.main(["deploy"]), 2)
+        self.assertIn("unknown command 'deploy'", err.getvalue())
+
+    def test_bench_load_reaches_load_tester(self):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), self.assertRaises(SystemExit) as raised:
+            cli.main(["bench", "--load", "--help"])
+        self.assertEqual(raised.exception.code, 0)
+        self.assertTrue(out.getvalue().startswith("usage: ssg bench --load"))
+
+    def test_noop_build_skips_pages(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as site:
+            make_site(site, pages=5)
+            os.chdir(site)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    self.assertFalse(cli.main(["build"]))
+                    page = os.path.join(site, "public", "index.html")
+                    # A page that is skipped is not even rendered, so an edit
+                    # to its output survives the next build.
+                    with open(page, "a") as f:
+                        f.write("<!-- kept -->")
+                    self.assertFalse(cli.main(["build"]))
+                with open(page) as f:
+                    self.assertTrue(f.read().endswith("<!-- kept -->"))
+            finally:
+                os.chdir(cwd)
+
+    def test_clean_shard_build_keeps_site_records(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as site:
+            make_site(site, pages=4)
+            os.chdir(site)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    self.assertFalse(cli.main(["build"]))
+                    records = sorted(path for path in os.listdir(".cache") if path.endswith(".json"))
+                    self.assertIn("search.json", records)
+                    self.assertFalse(cli.main(["build", "--clean", "--shard", "1/2"]))
+                    self.assertEqual(
+                        sorted(path for path in os.listdir(".cache") if path.endswith(".json")), records
+                    )
+                    self.assertTrue(os.path.isdir(os.path.join(".cache", "shard-1-of-2")))
+            finally:
+                os.chdir(cwd)
+
+    def test_build_reports_invalid_markdown(self):
+        cwd = os.getcwd()
+        with tempfile.TemporaryDirectory() as site:
+            make_site(site, pages=2)
+            with open(os.path.join(site, "content", "index.md"), "w") as f:
+                f.write("# Listing\n\nrun `ls to list")
+            os.chdir(site)
+            try:
+                with contextlib.redirect_stdout(io.StringIO()):
+                    with self.assertRaises(SystemExit) as raised:
+                        cli.main(["build"])
+            finally:
+                os.chdir(cwd)
+        self.assertEqual(
+            raised.exception.code,
+            f"Build failed: {os.path.join('content', 'index.md')}: Invalid markdown: unclosed '`' at position 4",
+        )
+
+    def test_build_imports_stay_lazy(self):
+        modules = loaded_modules("import ssg.main")
+        self.assertEqual([name for name in LAZY_MODULES if name in modules], [])
+        self.assertNotIn("ssg.main", loaded_modules("import ssg.cli"))
+
+    def test_parse_importtime(self):
+        stderr = (
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       120 |        120 |   _io\n"
+            "import time:       300 |        420 | ssg.main\n"
+            "unrelated line\n"
+        )
+        self.assertEqual(parse_importtime(stderr), [
+            ("_io", 1, 0.00012, 0.00012),
+            ("ssg.main", 0, 0.0003, 0.00042),
+        ])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from .copier import (
+    COPY_MODE_HARDLINK,
+    COPY_MODE_REFLINK,
+    copy_file,
+    copy_tree,
+    scan_tree,
+)
+
+
+class TestCopier(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "public")
+        os.makedirs(os.path.join(self.source, "images", "icons"))
+        self.files = {
+            "static.css": b"body {}",
+            os.path.join("images", "image.png"): os.urandom(3 * 1024 * 1024),
+            os.path.join("images", "icons", "empty.svg"): b"",
+        }
+        for rel_path, data in self.files.items():
+            with open(os.path.join(self.source, rel_path), "wb") as f:
+                f.write(data)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assert_copied(self):
+        for rel_path, data in self.files.items():
+            with open(os.path.join(self.dest, rel_path), "rb") as f:
+                self.assertEqual(f.read(), data)
+
+    def test_scan_tree(self):
+        dirs, files = scan_tree(self.source)
+        self.assertEqual(sorted(dirs), ["images", os.path.join("images", "icons")])
+        self.assertEqual(sorted(rel for rel, _ in files), sorted(self.files))
+
+    def test_copy_tree(self):
+        result = copy_tree(self.source, self.dest, workers=4)
+        self.assertEqual(result["files"], 3)
+        self.assertEqual(result["bytes"], sum(len(data) for data in self.files.values()))
+        self.assert_copied()
+
+    def test_copy_tree_single_worker(self):
+        copy_tree(self.source, self.dest, workers=1)
+        self.assert_copied()
+
+    def test_reflink_falls_back_to_copy(self):
+        copy_tree(self.source, self.dest, mode=COPY_MODE_REFLINK)
+        self.assert_copied()
+
+    def test_hardlink_shares_inode(self):
+        copy_tree(self.source, self.dest, mode=COPY_MODE_HARDLINK)
+        self.assert_copied()
+        self.assertTrue(os.path.samefile(
+            os.path.join(self.source, "static.css"), os.path.join(self.dest, "static.css")
+        ))
+
+    def test_overwrite_does_not_write_through_hardlink(self):
+        copy_tree(self.source, self.dest, mode=COPY_MODE_HARDLINK)
+        other = os.path.join(self.tmp.name, "other.css")
+        with open(other, "wb") as f:
+            f.write(b"p {}")
+        copy_file(other, os.path.join(self.dest, "static.css"))
+        with open(os.path.join(self.source, "static.css"), "rb") as f:
+            self.assertEqual(f.read(), b"body {}")
+
+    def test_unknown_mode(self):
+        with self.assertRaises(ValueError):
+            copy_tree(self.source, self.dest, mode="teleport")
+
+
+if __name__ == "__main__":
+    unittest.main()
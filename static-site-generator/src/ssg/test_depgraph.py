@@ -0,0 +1,151 @@
+import json
+import os
+import tempfile
+import unittest
+
+from .depgraph import DEPGRAPH_VERSION, DepGraph, internal_links, resolve_link
+from .pages import generate_pages
+
+
+class TestLinks(unittest.TestCase):
+    def test_resolve_link(self):
+        self.assertEqual(resolve_link("/blog/post.html", "index.html"), "blog/post.html")
+        self.assertEqual(resolve_link("other.html#top", "blog/post.html"), "blog/other.html")
+        self.assertEqual(resolve_link("../images/a.png", "blog/post.html"), "images/a.png")
+        self.assertEqual(resolve_link("/", "blog/post.html"), "index.html")
+        self.assertEqual(resolve_link("/blog/", "index.html"), "blog/index.html")
+        self.assertEqual(resolve_link("./", "blog/post.html"), "blog/index.html")
+
+    def test_external_links_are_ignored(self):
+        for url in ("https://example.com/", "//cdn.example.com/a.js", "mailto:a@b.c", "#top", "../../x.html"):
+            self.assertIsNone(resolve_link(url, "blog/post.html"), url)
+
+    def test_internal_links(self):
+        markdown = "[Home](/) and [self](post.html), ![img](/images/a.png) [ext](https://x.org)"
+        self.assertEqual(
+            internal_links(markdown, "blog/post.html"), ["images/a.png", "index.html"]
+        )
+
+
+class TestDepGraph(unittest.TestCase):
+    def setUp(self):
+        self.graph = DepGraph()
+        self.graph.record("content/index.md", "index.html", "template.html", ["blog/post.html"])
+        self.graph.record(
+            "content/blog/post.md", "blog/post.html", "template.html", [],
+            fragments=["partials/nav.html"],
+        )
+        self.graph.record("content/about.md", "about.html", "other.html", ["images/a.png"])
+
+    def test_affected_by_source(self):
+        self.assertEqual(self.graph.affected({"content/index.md"}), {"content/index.md"})
+
+    def test_affected_by_template_and_fragment(self):
+        self.assertEqual(
+            self.graph.affected({"./template.html"}), {"content/index.md", "content/blog/post.md"}
+        )
+        self.assertEqual(self.graph.affected({"partials/nav.html"}), {"content/blog/post.md"})
+
+    def test_affected_by_outputs(self):
+        self.assertEqual(self.graph.affected(set(), {"images/a.png"}), {"content/about.md"})
+        self.assertEqual(self.graph.affected(set(), {"missing.html"}), set())
+
+    def test_save_and_load(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "cache", "depgraph.json")
+            self.graph.path = path
+            self.graph.save()
+            loaded = DepGraph(path)
+            self.assertEqual(loaded.pages, self.graph.pages)
+
+            with open(path, "w") as f:
+                json.dump({"version": DEPGRAPH_VERSION + 1, "pages": self.graph.pages}, f)
+            self.assertEqual(len(DepGraph(path)), 0)
+
+    def test_generate_pages_records_graph(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            template = os.path.join(tmp, "template.html")
+            path = os.path.join(tmp, "depgraph.json")
+            os.makedirs(content)
+            with open(template, "w") as f:
+                f.write("{{ Content }}")
+            with open(os.path.join(content, "index.md"), "w") as f:
+                f.write("[Post](/blog/post.html)")
+
+            generate_pages(content, template, os.path.join(tmp, "public"), graph_path=path)
+
+            entry = DepGraph(path).pages[os.path.join(content, "index.md")]
+            self.assertEqual(entry["output"], "index.html")
+            self.assertEqual(entry["template"], template)
+            self.assertEqual(entry["links"], ["blog/post.html"])
+
+    def test_generate_pages_skips_unchanged_pages(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            template = os.path.join(tmp, "template.html")
+            public = os.path.join(tmp, "public")
+            path = os.path.join(tmp, "depgraph.json")
+            os.makedirs(content)
+            with open(template, "w") as f:
+                f.write("{{ Content }}")
+            for name in ("a.md", "b.md"):
+                with open(os.path.join(content, name), "w") as f:
+                    f.write(f"# {name}")
+
+            def build():
+                generate_pages(content, template, public, workers=1, graph_path=path)
+                outputs = {}
+                for name in ("a.html", "b.html"):
+                    with open(os.path.join(public, name)) as f:
+                        outputs[name] = f.read()
+                    # A page that is skipped isn't rendered at all, so this
+                    # marker survives the next build.
+                    with open(os.path.join(public, name), "a") as f:
+                        f.write("<!-- kept -->")
+                return outputs
+
+            build()
+            with open(os.path.join(content, "b.md"), "w") as f:
+                f.write("# changed")
+            outputs = build()
+            self.assertTrue(outputs["a.html"].endswith("<!-- kept -->"))
+            self.assertIn(">changed</h1>", outputs["b.html"])
+            self.assertFalse(outputs["b.html"].endswith("<!-- kept -->"))
+
+            with open(template, "w") as f:
+                f.write("<main>{{ Content }}</main>")
+            outputs = build()
+            self.assertTrue(outputs["a.html"].startswith("<main>"))
+            self.assertFalse(outputs["a.html"].endswith("<!-- kept -->"))
+
+    def test_generate_pages_removes_outputs_of_deleted_sources(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            template = os.path.join(tmp, "template.html")
+            public = os.path.join(tmp, "public")
+            path = os.path.join(tmp, "depgraph.json")
+            os.makedirs(os.path.join(content, "blog"))
+            with open(template, "w") as f:
+                f.write("{{ Content }}")
+            for name in ("index.md", os.path.join("blog", "post.md")):
+                with open(os.path.join(content, name), "w") as f:
+                    f.write("# Page")
+
+            generate_pages(content, template, public, workers=1, graph_path=path)
+            post = os.path.join(public, "blog", "post.html")
+            for suffix in (".gz", ".br"):
+                with open(post + suffix, "wb") as f:
+                    f.write(b"compressed")
+
+            os.remove(os.path.join(content, "blog", "post.md"))
+            generate_pages(content, template, public, workers=1, graph_path=path)
+
+            for suffix in ("", ".gz", ".br"):
+                self.assertFalse(os.path.exists(post + suffix))
+            self.assertTrue(os.path.exists(os.path.join(public, "index.html")))
+            self.assertNotIn(os.path.join(content, "blog", "post.md"), DepGraph(path))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import tempfile
+import unittest
+
+from .depgraph import DepGraph
+from .fingerprint import (
+    ASSET_MANIFEST,
+    AssetRewriter,
+    fingerprint_assets,
+    fingerprinted_name,
+    is_fingerprintable,
+)
+from .pages import PARALLEL_THRESHOLD, generate_pages
+
+ASSETS = {"static.css": "static.3f9a1c2b.css", "images/a.png": "images/a.0123abcd.png"}
+
+
+class TestFingerprintAssets(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, "images"))
+        self.hashes = {}
+        self.write("static.css", b"body {}")
+        self.write(os.path.join("images", "a.png"), b"\x89PNG")
+        self.write("index.html", b"<p></p>")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, data):
+        with open(os.path.join(self.root, rel_path), "wb") as f:
+            f.write(data)
+        self.hashes[rel_path] = hashlib.sha256(data).hexdigest()
+
+    def test_names(self):
+        self.assertEqual(fingerprinted_name("a/b.min.js", "0123456789"), "a/b.min.01234567.js")
+        self.assertTrue(is_fingerprintable("static.css"))
+        self.assertFalse(is_fingerprintable("index.html"))
+        self.assertTrue(is_fingerprintable("report.20240101.pdf"))
+
+    def test_writes_copies_and_manifest(self):
+        result = fingerprint_assets(self.root, self.hashes)
+
+        css = fingerprinted_name("static.css", self.hashes["static.css"])
+        self.assertEqual(result["assets"]["static.css"], css)
+        self.assertEqual(len(result["written"]), 2)
+        with open(os.path.join(self.root, css), "rb") as f:
+            self.assertEqual(f.read(), b"body {}")
+        with open(os.path.join(self.root, ASSET_MANIFEST)) as f:
+            self.assertEqual(json.load(f), result["assets"])
+
+        self.assertEqual(fingerprint_assets(self.root, self.hashes)["written"], [])
+
+    def test_changed_asset_replaces_old_copy(self):
+        old = fingerprint_assets(self.root, self.hashes)["assets"]["static.css"]
+        self.write("static.css", b"body { margin: 0 }")
+
+        result = fingerprint_assets(self.root, self.hashes)
+
+        self.assertEqual(result["removed"], [old])
+        self.assertFalse(os.path.exists(os.path.join(self.root, old)))
+        self.assertTrue(os.path.exists(os.path.join(self.root, result["assets"]["static.css"])))
+
+
+class TestAssetRewriter(unittest.TestCase):
+    def test_rewrites_quoted_and_unquoted_urls(self):
+        html, references = AssetRewriter(ASSETS)(
+            '<link href="/static.css" rel="stylesheet"><img src=/images/a.png alt=x >', "index.html"
+        )
+        self.assertEqual(
+            html,
+            '<link href="/static.3f9a1c2b.css" rel="stylesheet"><img src=/images/a.0123abcd.png alt=x >',
+        )
+        self.assertEqual(references, {"static.css", "images/a.png"})
+
+    def test_relative_urls_stay_relative(self):
+        html, _ = AssetRewriter(ASSETS)("<img src='../images/a.png?v=1#x'>", "blog/post.html")
+        self.assertEqual(html, "<img src='../images/a.0123abcd.png?v=1#x'>")
+
+    def test_other_urls_are_left_alone(self):
+        source = '<a href="https://example.com/static.css">x</a><a href=/about.html>about</a>'
+        html, references = AssetRewriter(ASSETS)(source, "index.html")
+        self.assertEqual(html, source)
+        self.assertEqual(references, {"about.html"})
+
+    def test_generate_pages_applies_transform(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            content = os.path.join(tmp, "content")
+            public = os.path.join(tmp, "public")
+            template = os.path.join(tmp, "template.html")
+            graph_path = os.path.join(tmp, "depgraph.json")
+            os.makedirs(content)
+            with open(template, "w") as f:
+                f.write('<link href="/static.css">{{ Content }}')
+            for i in range(PARALLEL_THRESHOLD):
+                with open(os.path.join(content, f"page{i}.md"), "w") as f:
+                    f.write("![a](/images/a.png)")
+
+            for workers in (1, 2):
+                generate_pages(
+                    content, template, public, workers=workers,
+                    graph_path=graph_path, transform=AssetRewriter(ASSETS),
+                )
+                with open(os.path.join(public, "page0.html")) as f:
+                    self.assertEqual(
+                        f.read(),
+                        '<link href="/static.3f9a1c2b.css">'
+                        '<div><p><img src=/images/a.0123abcd.png alt=a ></img></p></div>',
+                    )
+                entry = DepGraph(graph_path).pages[os.path.join(content, "page0.md")]
+                self.assertEqual(entry["links"], ["images/a.png", "static.css"])
+
+
+if __name__ == "__main__":
+    unittest.main()
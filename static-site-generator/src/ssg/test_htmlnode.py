@@ -1,8 +1,14 @@
+import io
+import mmap
+import os
+import pathlib
+import tempfile
 import unittest
 
-from textnode import TextNode
-from htmlnode import HTMLNode, LeafNode, ParentNode
-from conversion import (
+from .blockcache import BlockCache
+from .textnode import TextNode
+from .htmlnode import HTMLNode, LeafNode, ParentNode
+from .conversion import (
     text_node_to_html_node, 
     split_nodes_delimiter, 
     TEXT_TYPE_BOLD,
@@ -22,7 +28,11 @@ from conversion import (
     block_to_ordered_list,
     block_to_unordered_list,
     block_to_quote,
-    block_to_paragraph
+    block_to_paragraph,
+    block_to_block_types,
+    classify_block,
+    markdown_to_html,
+    iter_markdown_blocks,
 )
 
 
@@ -37,6 +47,10 @@ class TestHTMLNode(unittest.TestCase):
         expected_string = " href=https://www.Boot.dev "
         self.assertEqual(node.props_to_html(), expected_string)
 
+    def test_nodes_have_no_instance_dict(self):
+        for node in [HTMLNode("p", "x"), LeafNode("x", "b"), ParentNode("p", [LeafNode("x")])]:
+            self.assertFalse(hasattr(node, "__dict__"))
+
     def test_LeafNode_to_html(self):
         node = LeafNode("This is a node", "h1")
         expected_string = "<h1>This is a node</h1>"
@@ -90,6 +104,37 @@ class TestHTMLNode(unittest.TestCase):
             node = ParentNode(None, [LeafNode("normal text", "p")])
         self.assertEqual(str(context.exception), "ParentNode must have a tag")
 
+
+    def test_parent_props_to_html(self):
+        node = ParentNode("div", [LeafNode("text", None)], {"class": "note"})
+        self.assertEqual(node.to_html(), "<div class=note >text</div>")
+
+    def test_deeply_nested_to_html(self):
+        depth = 10000
+        node = LeafNode("leaf", "b")
+        for _ in range(depth):
+            node = ParentNode("span", [node])
+
+        expected_string = "<span>" * depth + "<b>leaf</b>" + "</span>" * depth
+        self.assertEqual(node.to_html(), expected_string)
+
+    def test_write_html(self):
+        node = ParentNode(
+            "ul",
+            [ParentNode("li", [LeafNode(str(i), None)]) for i in range(3)]
+        )
+        buffer = io.StringIO()
+
+        node.write_html(buffer)
+
+        self.assertEqual(buffer.getvalue(), "<ul><li>0</li><li>1</li><li>2</li></ul>")
+        self.assertEqual("".join(node.iter_html()), buffer.getvalue())
+
+    def test_iter_html_invalid_child(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode("x", None)])])
+        node.children[0].children = []
+        with self.assertRaises(ValueError):
+            node.to_html()
     
     def test_delimiter(self):
         node = TextNode("this is text with **bold** and more text", TEXT_TYPE_TEXT)
@@ -255,6 +300,28 @@ This is the same paragraph on a new line
 
         self.assertEqual(result, expected_ul_node)
 
+    def test_block_to_unordered_list_with_dashes(self):
+        result = block_to_unordered_list("* First item\n- Second item")
+
+        expected_li_nodes = [
+            HTMLNode(tag="li", value="First item"),
+            HTMLNode(tag="li", value="Second item"),
+        ]
+
+        self.assertEqual(result, HTMLNode(tag="ul", value=expected_li_nodes))
+
+    def test_classify_block(self):
+        self.assertEqual(classify_block("### Title "), ("h3", ["Title"]))
+        self.assertEqual(classify_block("```\ncode\n```"), ("code", ["code"]))
+        self.assertEqual(classify_block("> a\n>b "), ("blockquote", ["a", "b"]))
+        self.assertEqual(classify_block("- a\n* b"), ("unordered list", ["a", "b"]))
+        self.assertEqual(classify_block("9. a\n10. b"), ("ordered list", ["a", "b"]))
+        self.assertEqual(classify_block("text"), ("paragraph", ["text"]))
+
+    def test_classify_block_falls_back_to_paragraph(self):
+        for block in ("####### seven", "#no space", "```\nunclosed", "> a\nb", "* a\nb", "1. a\n2 b", "1.a"):
+            self.assertEqual(block_to_block_types(block), "paragraph", block)
+
     def test_block_to_blockquote(self):
         blockquote_block = "> This is a quote.\n> It spans multiple lines."
         
@@ -278,5 +345,166 @@ This is the same paragraph on a new line
         
         self.assertEqual(result, expected_paragraph_node)
 
+    def test_text_to_textnodes(self):
+        text = "This is **text** with an *italic* word and a `code block` and an ![image](https://example.com/a.png) and a [link](https://boot.dev)"
+
+        result = text_to_textnodes(text)
+
+        expected = [
+            TextNode("This is ", TEXT_TYPE_TEXT),
+            TextNode("text", TEXT_TYPE_BOLD),
+            TextNode(" with an ", TEXT_TYPE_TEXT),
+            TextNode("italic", TEXT_TYPE_ITALIC),
+            TextNode(" word and a ", TEXT_TYPE_TEXT),
+            TextNode("code block", TEXT_TYPE_CODE),
+            TextNode(" and an ", TEXT_TYPE_TEXT),
+            TextNode("image", TEXT_TYPE_IMAGE, "https://example.com/a.png"),
+            TextNode(" and a ", TEXT_TYPE_TEXT),
+            TextNode("link", TEXT_TYPE_LINK, "https://boot.dev"),
+        ]
+
+        self.assertEqual(result, expected)
+
+    def test_text_to_textnodes_nesting(self):
+        result = text_to_textnodes("**bold *inner* text** and `a*b` and [x*y](https://example.com/*)")
+
+        expected = [
+            TextNode("bold *inner* text", TEXT_TYPE_BOLD, children=[
+                TextNode("bold ", TEXT_TYPE_TEXT),
+                TextNode("inner", TEXT_TYPE_ITALIC),
+                TextNode(" text", TEXT_TYPE_TEXT),
+            ]),
+            TextNode(" and ", TEXT_TYPE_TEXT),
+            TextNode("a*b", TEXT_TYPE_CODE),
+            TextNode(" and ", TEXT_TYPE_TEXT),
+            TextNode("x*y", TEXT_TYPE_LINK, "https://example.com/*"),
+        ]
+
+        self.assertEqual(result, expected)
+
+    def test_text_to_textnodes_plain_brackets(self):
+        result = text_to_textnodes("a [note] and ! mark")
+
+        self.assertEqual(result, [TextNode("a [note] and ! mark", TEXT_TYPE_TEXT)])
+
+    def test_text_to_textnodes_spaced_asterisks_are_text(self):
+        result = text_to_textnodes("* not a list and 2 * 3 is *six*")
+
+        expected = [
+            TextNode("* not a list and 2 * 3 is ", TEXT_TYPE_TEXT),
+            TextNode("six", TEXT_TYPE_ITALIC),
+        ]
+        self.assertEqual(result, expected)
+
+    def test_text_to_textnodes_links_inside_emphasis(self):
+        cases = {
+            "**see [docs](/d)**": "<b>see <a href=/d >docs</a></b>",
+            "*[b](/y)*": "<i><a href=/y >b</a></i>",
+            "*[x*y](/a)* and **a *b [c](/d)* e**": (
+                "<i><a href=/a >x*y</a></i> and <b>a <i>b <a href=/d >c</a></i> e</b>"
+            ),
+        }
+        for text, expected in cases.items():
+            html = "".join(text_node_to_html_node(node).to_html() for node in text_to_textnodes(text))
+            self.assertEqual(html, expected, text)
+
+    def test_text_to_textnodes_unopened_asterisks_are_text(self):
+        # No closer, or between letters or digits: never an opener.
+        for text in ["2*3=6", "match *.md files", "some **bold text", "an *italic word", "a**b**c", "snake_case_name"]:
+            self.assertEqual(text_to_textnodes(text), [TextNode(text, TEXT_TYPE_TEXT)])
+
+        self.assertEqual(
+            text_to_textnodes("2*3 is *six* and *a*b*"),
+            [
+                TextNode("2*3 is ", TEXT_TYPE_TEXT),
+                TextNode("six", TEXT_TYPE_ITALIC),
+                TextNode(" and ", TEXT_TYPE_TEXT),
+                TextNode("a*b", TEXT_TYPE_ITALIC),
+            ],
+        )
+
+    def test_text_to_textnodes_unclosed_code_span(self):
+        with self.assertRaises(ValueError):
+            text_to_textnodes("a `code span")
+
+    def test_markdown_to_html(self):
+        markdown = "# Title\n\nA [link](/a) and ![pic](/p.png)\n\n```\n*not italic*\n```\n\n* one\n* **two**"
+
+        result = markdown_to_html(markdown).to_html()
+
+        expected = (
+            "<div><h1 id=title >Title</h1>"
+            "<p>A <a href=/a >link</a> and <img src=/p.png alt=pic ></img></p>"
+            "<pre><code>*not italic*</code></pre>"
+            "<ul><li>one</li><li><b>two</b></li></ul></div>"
+        )
+        self.assertEqual(result, expected)
+
+    def test_headings_get_ids(self):
+        result = markdown_to_html("# Hello, *big* World!\n\n## `ssg build` --clean\n\n### ?!").to_html()
+        self.assertEqual(result, (
+            "<div><h1 id=hello-big-world >Hello, <i>big</i> World!</h1>"
+            "<h2 id=ssg-build---clean ><code>ssg build</code> --clean</h2>"
+            "<h3>?!</h3></div>"
+        ))
+
+    def test_markdown_to_html_escapes_text_and_code(self):
+        markdown = "Use `a < b && c` in *<tags>* & text\n\n```\nif a < b && c:\n    print(\"<b>\")\n```"
+        expected = (
+            "<div><p>Use <code>a &lt; b &amp;&amp; c</code> in <i>&lt;tags&gt;</i> &amp; text</p>"
+            "<pre><code>if a &lt; b &amp;&amp; c:\n    print(\"&lt;b&gt;\")</code></pre></div>"
+        )
+        self.assertEqual(markdown_to_html(markdown).to_html(), expected)
+        # The cached renderer stores and replays the same escaped fragments.
+        cache = BlockCache()
+        self.assertEqual(markdown_to_html(markdown, cache).to_html(), expected)
+        self.assertEqual(markdown_to_html(markdown, cache).to_html(), expected)
+
+    def test_props_to_html_quotes_unsafe_values(self):
+        node = HTMLNode("img", "", None, {"alt": "two words", "title": 'say "hi"', "src": ""})
+        self.assertEqual(node.props_to_html(), ' alt="two words" title="say &quot;hi&quot;" src="" ')
+
+    def test_markdown_to_blocks_keeps_blank_lines_in_fences(self):
+        markdown = "Intro\n\n```\nfirst\n\n\nsecond\n```\n\n\n\nOutro\r\nsame block"
+
+        result = markdown_to_blocks(markdown)
+
+        expected = ["Intro", "```\nfirst\n\n\nsecond\n```", "Outro\nsame block"]
+        self.assertEqual(result, expected)
+
+    def test_iter_markdown_blocks_sources(self):
+        markdown = "# Title\n\n```\na\n\nb\n```\n\n* item"
+        expected = ["# Title", "```\na\n\nb\n```", "* item"]
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "page.md")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(markdown)
+
+            self.assertEqual(list(iter_markdown_blocks(pathlib.Path(path))), expected)
+            with open(path, encoding="utf-8") as f:
+                self.assertEqual(list(iter_markdown_blocks(f)), expected)
+            with open(path, "rb") as f:
+                self.assertEqual(list(iter_markdown_blocks(f)), expected)
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    self.assertEqual(list(iter_markdown_blocks(mapped)), expected)
+
+        self.assertEqual(list(iter_markdown_blocks(io.StringIO(markdown))), expected)
+
+    def test_iter_markdown_blocks_is_lazy(self):
+        source = io.StringIO("one\n\n" + "two\n" * 1000)
+        blocks = iter_markdown_blocks(source)
+        self.assertEqual(next(blocks), "one")
+        self.assertEqual(source.tell(), len("one\n\n"))
+
+    def test_iter_markdown_blocks_rejects_unknown_sources(self):
+        with self.assertRaises(TypeError):
+            list(iter_markdown_blocks(42))
+
+    def test_markdown_to_html_from_file(self):
+        markdown = "# Title\n\n```\ncode\n\nmore\n```"
+        expected = "<div><h1 id=title >Title</h1><pre><code>code\n\nmore</code></pre></div>"
+        self.assertEqual(markdown_to_html(io.StringIO(markdown)).to_html(), expected)
+
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,121 @@
+import hashlib
+import os
+import struct
+import tempfile
+import unittest
+import zlib
+
+from . import images
+from .images import IMAGE_MANIFEST, ImageRewriter, image_size, process_images, variant_name
+
+
+def png_bytes(width, height):
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    raw = b"".join(b"\x00" + b"\x80" * (width * 3) for _ in range(height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", ihdr) + chunk(b"IDAT", zlib.compress(raw)) + chunk(b"IEND", b"")
+
+
+def jpeg_bytes(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00"
+    sof0 = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + sof0 + b"\xff\xd9"
+
+
+class TestImageSize(unittest.TestCase):
+    def size_of(self, data):
+        with tempfile.NamedTemporaryFile() as f:
+            f.write(data)
+            f.flush()
+            return image_size(f.name)
+
+    def test_formats(self):
+        self.assertEqual(self.size_of(png_bytes(3, 2)), (3, 2))
+        self.assertEqual(self.size_of(jpeg_bytes(640, 480)), (640, 480))
+        self.assertEqual(self.size_of(b"GIF89a" + struct.pack("<HH", 17, 9) + b"\x00" * 20), (17, 9))
+        vp8l = b"RIFF\x00\x00\x00\x00WEBPVP8L\x00\x00\x00\x00\x2f" + ((99) | (49 << 14)).to_bytes(4, "little")
+        self.assertEqual(self.size_of(vp8l + b"\x00" * 8), (100, 50))
+
+    def test_unknown_data(self):
+        self.assertIsNone(self.size_of(b"not an image"))
+        self.assertIsNone(self.size_of(b"\xff\xd8\x00\x00"))
+
+
+class TestProcessImages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.public = os.path.join(self.tmp.name, "public")
+        self.cache_dir = os.path.join(self.tmp.name, "cache")
+        os.makedirs(os.path.join(self.public, "images"))
+        self.hashes = {}
+        self.write(os.path.join("images", "wide.png"), png_bytes(700, 10))
+        self.write("static.css", b"body {}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, data):
+        with open(os.path.join(self.public, rel_path), "wb") as f:
+            f.write(data)
+        self.hashes[rel_path] = hashlib.sha256(data).hexdigest()
+
+    def test_dimensions_without_variants(self):
+        saved, images.Image = images.Image, None
+        try:
+            result = process_images(self.public, self.hashes, self.cache_dir)
+        finally:
+            images.Image = saved
+
+        self.assertEqual(
+            result["images"],
+            {"images/wide.png": {"width": 700, "height": 10, "srcset": [(700, "images/wide.png")]}},
+        )
+        self.assertTrue(os.path.exists(os.path.join(self.public, IMAGE_MANIFEST)))
+
+    @unittest.skipIf(images.pillow() is None, "Pillow is not installed")
+    def test_variants_are_encoded_once(self):
+        digest = self.hashes[os.path.join("images", "wide.png")]
+        result = process_images(self.public, self.hashes, self.cache_dir, workers=1)
+
+        self.assertEqual(result["encoded"], 2)
+        for width in (320, 640):
+            name = variant_name("images/wide.png", digest, width)
+            self.assertEqual(image_size(os.path.join(self.public, name))[0], width)
+
+        os.remove(os.path.join(self.public, variant_name("images/wide.png", digest, 320)))
+        result = process_images(self.public, self.hashes, self.cache_dir, workers=1)
+        self.assertEqual(result["encoded"], 0)
+        self.assertEqual(len(result["written"]), 1)
+
+
+class TestImageRewriter(unittest.TestCase):
+    IMAGES = {
+        "images/a.png": {
+            "width": 800, "height": 600,
+            "srcset": [(320, "images/a-320w.0123abcd.png"), (800, "images/a.0123abcd.png")],
+        },
+        "images/b.png": {"width": 10, "height": 20, "srcset": [(10, "images/b.png")]},
+    }
+
+    def test_adds_dimensions_and_srcset(self):
+        html, references = ImageRewriter(self.IMAGES)(
+            '<p><img src=../images/a.png alt=a ></p><img src="/images/b.png">', "blog/post.html"
+        )
+        self.assertEqual(
+            html,
+            '<p><img width=800 height=600 srcset="/images/a-320w.0123abcd.png 320w, '
+            '/images/a.0123abcd.png 800w" src=../images/a.png alt=a ></p>'
+            '<img width=10 height=20 src="/images/b.png">',
+        )
+        self.assertEqual(references, {"images/a.png", "images/b.png"})
+
+    def test_leaves_unknown_and_sized_images(self):
+        source = '<img src=/images/c.png><img width=1 src=/images/a.png>'
+        self.assertEqual(ImageRewriter(self.IMAGES)(source, "index.html")[0], source)
+
+
+if __name__ == "__main__":
+    unittest.main()
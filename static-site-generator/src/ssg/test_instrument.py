@@ -0,0 +1,89 @@
+import os
+import tempfile
+import unittest
+
+from . import conversion
+from . import instrument
+from . import pages
+from .pages import PARALLEL_THRESHOLD, generate_pages
+
+
+class TestInstrument(unittest.TestCase):
+    def tearDown(self):
+        instrument.disable()
+
+    def test_disabled_by_default(self):
+        self.assertFalse(instrument.enabled())
+        with instrument.stage("copy"):
+            pass
+        instrument.count_bytes("copy", read=10)
+
+    def test_enable_wraps_and_disable_restores(self):
+        original = conversion.markdown_to_html
+        recorder = instrument.enable()
+
+        self.assertIsNot(conversion.markdown_to_html, original)
+        self.assertIs(pages.markdown_to_html, conversion.markdown_to_html)
+        conversion.markdown_to_html("# Title\n\nSome *text*")
+        self.assertEqual(recorder.functions["markdown_to_html"]["calls"], 1)
+        self.assertEqual(recorder.functions["text_to_textnodes"]["calls"], 2)
+        self.assertEqual(recorder.functions["iter_markdown_blocks"]["calls"], 1)
+        self.assertEqual(recorder.functions["classify_block"]["calls"], 2)
+        self.assertEqual(conversion.markdown_to_blocks("one\n\ntwo"), ["one", "two"])
+        self.assertEqual(recorder.functions["iter_markdown_blocks"]["calls"], 2)
+
+        instrument.disable()
+        self.assertIs(conversion.markdown_to_html, original)
+        self.assertIs(pages.markdown_to_html, original)
+
+    def test_stage_report_and_trace(self):
+        recorder = instrument.enable()
+        with instrument.stage("copy"):
+            instrument.count_bytes("copy", read=5, written=5)
+        with instrument.stage("copy"):
+            pass
+        for i in range(15):
+            instrument.record_page(f"page{i}.md", 0.0, i / 100, 10, 20)
+
+        report = recorder.report(slowest=3)
+
+        self.assertEqual(report["stages"]["copy"]["calls"], 2)
+        self.assertEqual(report["stages"]["copy"]["bytes_read"], 5)
+        self.assertEqual(report["stages"]["pages"]["bytes_written"], 300)
+        self.assertEqual(report["pages"]["count"], 15)
+        self.assertEqual(
+            [page["path"] for page in report["pages"]["slowest"]],
+            ["page14.md", "page13.md", "page12.md"],
+        )
+        events = recorder.chrome_trace()["traceEvents"]
+        self.assertEqual(len(events), 17)
+        self.assertTrue(all(event["ph"] == "X" for event in events))
+
+
+class TestPageTiming(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(self.content)
+        with open(self.template, "w") as f:
+            f.write("{{ Content }}")
+        for i in range(PARALLEL_THRESHOLD + 2):
+            with open(os.path.join(self.content, f"page{i}.md"), "w") as f:
+                f.write(f"# Page {i}")
+
+    def tearDown(self):
+        instrument.disable()
+        self.tmp.cleanup()
+
+    def test_pages_are_timed_serially_and_in_workers(self):
+        for workers in (1, 2):
+            recorder = instrument.enable()
+            generate_pages(self.content, self.template, os.path.join(self.tmp.name, "public"), workers=workers)
+            self.assertEqual(len(recorder.pages), PARALLEL_THRESHOLD + 2)
+            self.assertGreater(recorder.stages["pages"]["bytes_written"], 0)
+            instrument.disable()
+
+
+if __name__ == "__main__":
+    unittest.main()
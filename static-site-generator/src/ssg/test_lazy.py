@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from .lazy import LazySite
+
+
+class TestLazySite(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.static = os.path.join(root, "static")
+        self.template = os.path.join(root, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        os.makedirs(os.path.join(self.static, "images"))
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.content, "index.md"), "# Home\n\nHello")
+        self.write(os.path.join(self.content, "blog", "index.md"), "# Blog")
+        self.write(os.path.join(self.content, "blog", "post.md"), "Just text")
+        self.write(os.path.join(self.static, "static.css"), "body {}")
+        self.site = LazySite(self.content, self.static, self.template)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text, mtime=None):
+        with open(path, "w") as f:
+            f.write(text)
+        if mtime is not None:
+            os.utime(path, ns=(mtime, mtime))
+
+    def test_resolve(self):
+        self.assertEqual(self.site.resolve("/"), ("page", os.path.join(self.content, "index.md")))
+        self.assertEqual(
+            self.site.resolve("/blog/post.html"), ("page", os.path.join(self.content, "blog", "post.md"))
+        )
+        self.assertEqual(
+            self.site.resolve("/blog/"), ("page", os.path.join(self.content, "blog", "index.md"))
+        )
+        self.assertEqual(self.site.resolve("/blog"), ("redirect", "/blog/"))
+        self.assertEqual(self.site.resolve("/static.css"), ("static", os.path.join(self.static, "static.css")))
+        self.assertIsNone(self.site.resolve("/images"))
+        self.assertIsNone(self.site.resolve("/missing.html"))
+        self.assertIsNone(self.site.resolve("/blog/post.md"))
+
+    def test_renders_on_demand_and_caches(self):
+        self.assertEqual(self.site.renders, 0)
+        path = os.path.join(self.content, "blog", "post.md")
+        html, etag = self.site.render(path)
+        self.assertEqual(html, b"<title>post</title><div><p>Just text</p></div>")
+        self.assertEqual(self.site.render(path), (html, etag))
+        self.assertEqual(self.site.renders, 1)
+
+    def test_touch_does_not_rerender(self):
+        path = os.path.join(self.content, "index.md")
+        _, etag = self.site.render(path)
+        os.utime(path, ns=(1, 1))
+        self.assertEqual(self.site.render(path)[1], etag)
+        self.assertEqual(self.site.renders, 1)
+
+    def test_edits_rerender(self):
+        path = os.path.join(self.content, "index.md")
+        _, etag = self.site.render(path)
+        self.write(path, "# Home\n\nChanged", mtime=1)
+        html, edited_etag = self.site.render(path)
+        self.assertIn(b"Changed", html)
+        self.assertNotEqual(edited_etag, etag)
+
+        self.write(self.template, "<h1>{{ Title }}</h1>{{ Content }}", mtime=1)
+        html, template_etag = self.site.render(path)
+        self.assertTrue(html.startswith(b"<h1>Home</h1>"))
+        self.assertNotEqual(template_etag, edited_etag)
+        self.assertEqual(self.site.renders, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,134 @@
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from . import linkcheck
+from .conversion import markdown_to_html
+from .linkcheck import FEED, SITEMAP, check_links, link_target, page_url, scan_page
+
+
+class TestLinkHelpers(unittest.TestCase):
+    def test_scan_page(self):
+        ids, urls, title = scan_page(
+            '<title>A &amp; B</title><h2 id=intro>x</h2><a href="/b.html?x=1&amp;y=2#top">b</a>'
+            "<img src='img/a b.png'><p id=\"long one\">"
+        )
+        self.assertEqual(ids, {"intro", "long one"})
+        self.assertEqual(urls, ["/b.html?x=1&y=2#top", "img/a b.png"])
+        self.assertEqual(title, "A & B")
+
+    def test_link_target(self):
+        self.assertEqual(link_target("#top", "docs/a.html"), ("docs/a.html", "top"))
+        self.assertEqual(link_target("b.html#x", "docs/a.html"), ("docs/b.html", "x"))
+        self.assertEqual(link_target("/img/a%20b.png", "a.html"), ("img/a b.png", ""))
+        self.assertIsNone(link_target("https://example.com/", "a.html"))
+        self.assertIsNone(link_target("mailto:me@example.com", "a.html"))
+        self.assertIsNone(link_target("#", "a.html"))
+
+    def test_page_url(self):
+        self.assertEqual(page_url("https://e.com/", "index.html"), "https://e.com/")
+        self.assertEqual(page_url("https://e.com/", "blog/index.html"), "https://e.com/blog/")
+        self.assertEqual(page_url("https://e.com/", "a b.html"), "https://e.com/a%20b.html")
+
+
+class TestCheckLinks(unittest.TestCase):
+    def setUp(self):
+        self.dest = tempfile.mkdtemp()
+        self.write("index.html", '<title>Home</title><a href="/docs">docs</a><a href="/docs/b.html#usage">u</a>'
+                                 '<a href="#top">top</a><img src="/logo.png"><a href="https://x.org/nope">x</a>')
+        self.write("docs/index.html", '<title>Docs</title><a href="b.html">b</a><a href="../missing.html">m</a>')
+        self.write("docs/b.html", '<title>B</title><h2 id=usage>Usage</h2><a href="../index.html#nowhere">n</a>')
+        self.write("logo.png", "png")
+
+    def tearDown(self):
+        shutil.rmtree(self.dest)
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.dest, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+
+    def test_reports_missing_pages_and_anchors(self):
+        broken = []
+        result = check_links(self.dest, on_broken=lambda *args: broken.append(args))
+        self.assertEqual(sorted(broken), [
+            ("docs/b.html", "../index.html#nowhere", "missing anchor"),
+            ("docs/index.html", "../missing.html", "missing"),
+            ("index.html", "#top", "missing anchor"),
+        ])
+        self.assertEqual((result["pages"], result["links"], result["broken"]), (3, 7, 3))
+        self.assertFalse(os.path.exists(os.path.join(self.dest, SITEMAP)))
+
+    def test_heading_anchors_resolve(self):
+        pages = {
+            "guide.html": "# Guide\n\n## Getting *Started*, fast!\n\nSee [below](#getting-started-fast).",
+            "faq.html": "Read [the start](guide.html#getting-started-fast) or [nothing](guide.html#nope).",
+        }
+        for name, markdown in pages.items():
+            self.write(name, markdown_to_html(markdown).to_html())
+        broken = []
+        check_links(self.dest, on_broken=lambda *args: broken.append(args))
+        self.assertNotIn("guide.html", [page for page, _, _ in broken])
+        self.assertIn(("faq.html", "guide.html#nope", "missing anchor"), broken)
+        self.assertNotIn(("faq.html", "guide.html#getting-started-fast", "missing anchor"), broken)
+
+    def test_writes_sitemap_and_feed(self):
+        result = check_links(self.dest, "https://example.com")
+        self.assertEqual(result["written"], [FEED, SITEMAP])
+        with open(os.path.join(self.dest, SITEMAP)) as f:
+            sitemap = f.read()
+        self.assertIn("<loc>https://example.com/</loc>", sitemap)
+        self.assertIn("<loc>https://example.com/docs/b.html</loc>", sitemap)
+        with open(os.path.join(self.dest, FEED)) as f:
+            feed = f.read()
+        self.assertIn("<title>Home</title><link>https://example.com/</link>", feed)
+        self.assertEqual(feed.count("<item>"), 3)
+
+        mtime = os.stat(os.path.join(self.dest, SITEMAP)).st_mtime_ns
+        self.assertEqual(check_links(self.dest, "https://example.com")["written"], [])
+        self.assertEqual(os.stat(os.path.join(self.dest, SITEMAP)).st_mtime_ns, mtime)
+
+    def test_large_sitemap_is_split(self):
+        record_path = os.path.join(self.dest, ".record.json")
+        self.write("sitemap-7.xml", "hand-made")
+        with mock.patch.object(linkcheck, "SITEMAP_MAX_URLS", 2):
+            result = check_links(self.dest, "https://example.com/", record_path=record_path)
+            self.assertEqual(result["written"], [FEED, "sitemap-1.xml", "sitemap-2.xml", SITEMAP])
+            with open(os.path.join(self.dest, SITEMAP)) as f:
+                self.assertIn("<sitemapindex", f.read())
+
+        # Back under the limit, the recorded numbered parts go away; one the
+        # stage never wrote stays.
+        result = check_links(self.dest, "https://example.com/", record_path=record_path)
+        self.assertEqual(result["removed"], ["sitemap-1.xml", "sitemap-2.xml"])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "sitemap-1.xml")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "sitemap-7.xml")))
+        with open(os.path.join(self.dest, SITEMAP)) as f:
+            self.assertIn("<urlset", f.read())
+
+    def test_generated_files_removed_without_base_url(self):
+        record_path = os.path.join(self.dest, ".record.json")
+        self.write("static-sitemap/sitemap.xml", "kept")
+        with mock.patch.object(linkcheck, "SITEMAP_MAX_URLS", 2):
+            check_links(self.dest, "https://example.com/", record_path=record_path)
+
+        result = check_links(self.dest, record_path=record_path)
+
+        self.assertEqual(result["removed"], [FEED, "sitemap-1.xml", "sitemap-2.xml", SITEMAP])
+        for name in result["removed"]:
+            self.assertFalse(os.path.exists(os.path.join(self.dest, name)))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "static-sitemap", "sitemap.xml")))
+        self.assertEqual(check_links(self.dest, record_path=record_path)["removed"], [])
+
+    def test_unrecorded_files_are_kept(self):
+        self.write("sitemap.xml", "hand-made")
+        result = check_links(self.dest, record_path=os.path.join(self.dest, ".record.json"))
+        self.assertEqual(result["removed"], [])
+        self.assertTrue(os.path.exists(os.path.join(self.dest, SITEMAP)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import tempfile
+import unittest
+
+from .manifest import sync_directory, load_manifest
+
+
+class TestSyncDirectory(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "public")
+        self.manifest = os.path.join(self.tmp.name, "cache", "manifest.json")
+        os.makedirs(os.path.join(self.source, "images"))
+        self.write("static.css", "body {}")
+        self.write(os.path.join("images", "image.png"), "png")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        with open(os.path.join(self.source, rel_path), "w") as f:
+            f.write(text)
+
+    def read_dest(self, rel_path):
+        with open(os.path.join(self.dest, rel_path)) as f:
+            return f.read()
+
+    def test_first_build_copies_everything(self):
+        result = sync_directory(self.source, self.dest, self.manifest)
+        self.assertEqual(sorted(result["copied"]), ["images/image.png", "static.css"])
+        self.assertEqual(self.read_dest("images/image.png"), "png")
+        self.assertEqual(len(load_manifest(self.manifest, self.source, self.dest)), 2)
+
+    def test_noop_rebuild_skips_everything(self):
+        sync_directory(self.source, self.dest, self.manifest)
+        result = sync_directory(self.source, self.dest, self.manifest)
+        self.assertEqual(result["copied"], [])
+        self.assertEqual(result["skipped"], 2)
+
+    def test_changed_file_is_rewritten(self):
+        sync_directory(self.source, self.dest, self.manifest)
+        self.write("static.css", "body { color: red; }")
+        result = sync_directory(self.source, self.dest, self.manifest)
+        self.assertEqual(result["copied"], ["static.css"])
+        self.assertEqual(self.read_dest("static.css"), "body { color: red; }")
+
+    def test_touched_but_identical_file_is_skipped(self):
+        sync_directory(self.source, self.dest, self.manifest)
+        path = os.path.join(self.source, "static.css")
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        result = sync_directory(self.source, self.dest, self.manifest)
+        self.assertEqual(result["copied"], [])
+
+    def test_removed_source_is_pruned(self):
+        sync_directory(self.source, self.dest, self.manifest)
+        os.remove(os.path.join(self.source, "images", "image.png"))
+        result = sync_directory(self.source, self.dest, self.manifest)
+        self.assertEqual(result["removed"], ["images/image.png"])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "images")))
+
+    def test_deleted_output_is_restored(self):
+        sync_directory(self.source, self.dest, self.manifest)
+        os.remove(os.path.join(self.dest, "static.css"))
+        result = sync_directory(self.source, self.dest, self.manifest)
+        self.assertEqual(result["copied"], ["static.css"])
+
+    def test_unowned_output_is_left_alone(self):
+        sync_directory(self.source, self.dest, self.manifest)
+        with open(os.path.join(self.dest, "index.html"), "w") as f:
+            f.write("<html></html>")
+        sync_directory(self.source, self.dest, self.manifest)
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
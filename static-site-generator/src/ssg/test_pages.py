@@ -0,0 +1,99 @@
+import os
+import tempfile
+import unittest
+
+from .pages import PARALLEL_THRESHOLD, extract_title, find_pages, generate_pages, render_page
+
+TEMPLATE = "<title>{{ Title }}</title><main>{{ Content }}</main>"
+
+
+class TestPages(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.content = os.path.join(self.tmp.name, "content")
+        self.public = os.path.join(self.tmp.name, "public")
+        self.template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(os.path.join(self.content, "blog"))
+        with open(self.template, "w") as f:
+            f.write(TEMPLATE)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_page(self, rel_path, markdown):
+        with open(os.path.join(self.content, rel_path), "w") as f:
+            f.write(markdown)
+
+    def read_output(self, rel_path):
+        with open(os.path.join(self.public, rel_path)) as f:
+            return f.read()
+
+    def test_extract_title(self):
+        self.assertEqual(extract_title("intro\n\n# Hello  \n\n## Sub"), "Hello")
+        self.assertIsNone(extract_title("## Only a subheading"))
+
+    def test_render_page(self):
+        html = render_page("# Hi\n\nSome **bold** text", TEMPLATE)
+        self.assertEqual(
+            html, "<title>Hi</title><main><div><h1 id=hi >Hi</h1><p>Some <b>bold</b> text</p></div></main>"
+        )
+
+    def test_find_pages(self):
+        self.write_page("index.md", "# Home")
+        self.write_page(os.path.join("blog", "post.md"), "# Post")
+        self.write_page("notes.txt", "not markdown")
+
+        pages = find_pages(self.content, self.public)
+
+        self.assertEqual(pages, [
+            (os.path.join(self.content, "blog", "post.md"), os.path.join(self.public, "blog", "post.html")),
+            (os.path.join(self.content, "index.md"), os.path.join(self.public, "index.html")),
+        ])
+
+    def test_generate_pages_serial(self):
+        self.write_page("index.md", "# Home\n\nWelcome")
+        self.write_page(os.path.join("blog", "untitled.md"), "No heading here")
+
+        generate_pages(self.content, self.template, self.public, workers=1)
+
+        self.assertEqual(
+            self.read_output("index.html"),
+            "<title>Home</title><main><div><h1 id=home >Home</h1><p>Welcome</p></div></main>",
+        )
+        self.assertIn("<title>untitled</title>", self.read_output(os.path.join("blog", "untitled.html")))
+
+    def test_generate_pages_parallel(self):
+        count = PARALLEL_THRESHOLD + 8
+        for i in range(count):
+            self.write_page(os.path.join("blog", f"post{i}.md"), f"# Post {i}\n\n*body {i}*")
+
+        pages = generate_pages(self.content, self.template, self.public, workers=2)
+
+        self.assertEqual(len(pages), count)
+        self.assertEqual(
+            self.read_output(os.path.join("blog", "post7.html")),
+            "<title>Post 7</title><main><div><h1 id=post-7 >Post 7</h1><p><i>body 7</i></p></div></main>",
+        )
+
+    def test_generate_pages_with_block_cache(self):
+        cache_path = os.path.join(self.tmp.name, "blocks.json")
+        for i in range(PARALLEL_THRESHOLD + 8):
+            self.write_page(f"page{i}.md", f"# Page {i}\n\nShared **footer**")
+
+        generate_pages(self.content, self.template, self.public, workers=2, cache_path=cache_path)
+        first = self.read_output("page3.html")
+        os.remove(os.path.join(self.public, "page3.html"))
+        generate_pages(self.content, self.template, self.public, workers=1, cache_path=cache_path)
+
+        self.assertTrue(os.path.exists(cache_path))
+        self.assertEqual(self.read_output("page3.html"), first)
+
+    def test_error_names_the_page(self):
+        self.write_page("broken.md", "an `unclosed code span")
+        with self.assertRaises(ValueError) as context:
+            generate_pages(self.content, self.template, self.public, workers=1)
+        self.assertIn("broken.md", str(context.exception))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,104 @@
+import os
+import tempfile
+import time
+import unittest
+
+from .conversion import markdown_to_html
+from .pages import generate_pages
+from .parsecache import TOUCH_INTERVAL, ParseCache, dump_node, load_node, tree_key
+
+DOCUMENT = (
+    "# Title\n\nSome **bold** and [a link](/a.html) ![img](/i.png)\n\n"
+    "- one\n- two\n\n1. first\n2. second\n\n> quoted\n\n```\ncode\n```"
+)
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "trees.marshal")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_round_trip(self):
+        tree = markdown_to_html(DOCUMENT)
+        loaded = load_node(dump_node(tree))
+        self.assertEqual(loaded.to_html(), tree.to_html())
+        self.assertEqual(type(loaded.children[0]).__name__, "ParentNode")
+
+    def test_persisted_hit_returns_same_html(self):
+        expected = markdown_to_html(DOCUMENT).to_html()
+        cache = ParseCache(self.path)
+        self.assertEqual(cache.markdown_to_html(DOCUMENT).to_html(), expected)
+        cache.save()
+
+        reloaded = ParseCache(self.path)
+        self.assertEqual(reloaded.markdown_to_html(DOCUMENT).to_html(), expected)
+        self.assertEqual((reloaded.hits, reloaded.misses), (1, 0))
+
+    def test_key_depends_on_content(self):
+        self.assertEqual(tree_key(DOCUMENT), tree_key(DOCUMENT))
+        self.assertNotEqual(tree_key(DOCUMENT), tree_key(DOCUMENT + " "))
+
+    def test_corrupt_or_old_file_is_ignored(self):
+        with open(self.path, "wb") as f:
+            f.write(b"\x00garbage")
+        self.assertEqual(len(ParseCache(self.path)), 0)
+
+    def test_unchanged_cache_is_not_rewritten(self):
+        cache = ParseCache(self.path)
+        cache.markdown_to_html(DOCUMENT)
+        cache.save()
+        mtime = os.stat(self.path).st_mtime_ns
+
+        cache = ParseCache(self.path)
+        cache.markdown_to_html(DOCUMENT)
+        cache.save()
+        self.assertEqual(os.stat(self.path).st_mtime_ns, mtime)
+
+    def test_evict_by_age_and_size(self):
+        cache = ParseCache(max_age=1000)
+        now = time.time()
+        for i, age in enumerate((2000, 30, 20, 10)):
+            cache.markdown_to_html(f"# Page {i}\n\n{'text ' * 100}")
+            cache.entries[tree_key(f"# Page {i}\n\n{'text ' * 100}")][1] = now - age
+        keys = sorted(cache.entries, key=lambda key: cache.entries[key][1])
+
+        self.assertEqual(cache.evict(now), 1)
+        self.assertNotIn(keys[0], cache.entries)
+
+        cache.max_bytes = len(cache.entries[keys[1]][0]) * 2
+        self.assertEqual(cache.evict(now), 1)
+        self.assertEqual(sorted(cache.entries), sorted(keys[2:]))
+
+    def test_use_refreshes_age(self):
+        cache = ParseCache(max_age=TOUCH_INTERVAL * 2)
+        cache.markdown_to_html(DOCUMENT)
+        key = tree_key(DOCUMENT)
+        cache.entries[key][1] -= TOUCH_INTERVAL * 1.5
+        cache.markdown_to_html(DOCUMENT)
+        self.assertEqual(cache.evict(time.time() + TOUCH_INTERVAL), 0)
+        self.assertIn(key, cache.entries)
+
+    def test_generate_pages_uses_cache(self):
+        content = os.path.join(self.tmp.name, "content")
+        public = os.path.join(self.tmp.name, "public")
+        template = os.path.join(self.tmp.name, "template.html")
+        os.makedirs(content)
+        with open(template, "w") as f:
+            f.write("{{ Content }}")
+        with open(os.path.join(content, "index.md"), "w") as f:
+            f.write(DOCUMENT)
+
+        generate_pages(content, template, public, workers=1, parse_cache_path=self.path)
+        self.assertEqual(len(ParseCache(self.path)), 1)
+        os.remove(os.path.join(public, "index.html"))
+        generate_pages(content, template, public, workers=1, parse_cache_path=self.path)
+
+        with open(os.path.join(public, "index.html")) as f:
+            self.assertEqual(f.read(), markdown_to_html(DOCUMENT).to_html())
+
+
+if __name__ == "__main__":
+    unittest.main()
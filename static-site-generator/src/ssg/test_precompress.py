@@ -0,0 +1,92 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from .precompress import precompress_tree
+
+CSS = b"body { color: #c9d1d9; }\n" * 100
+
+
+class TestPrecompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        os.makedirs(os.path.join(self.root, "images"))
+        self.write("static.css", CSS)
+        self.write("tiny.css", b"p {}")
+        self.write(os.path.join("images", "image.png"), os.urandom(4096))
+        self.record = os.path.join(self.root, "record.json")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, rel_path):
+        return os.path.join(self.root, rel_path)
+
+    def write(self, rel_path, data):
+        with open(self.path(rel_path), "wb") as f:
+            f.write(data)
+
+    def test_writes_gzip_siblings_for_compressible_files(self):
+        result = precompress_tree(self.root, workers=2)
+
+        self.assertIn(self.path("static.css.gz"), result["written"])
+        with gzip.open(self.path("static.css.gz")) as f:
+            self.assertEqual(f.read(), CSS)
+        self.assertFalse(os.path.exists(self.path("tiny.css.gz")))
+        self.assertFalse(os.path.exists(self.path(os.path.join("images", "image.png.gz"))))
+
+    def test_sibling_carries_source_mtime(self):
+        precompress_tree(self.root)
+        self.assertEqual(
+            os.stat(self.path("static.css.gz")).st_mtime_ns,
+            os.stat(self.path("static.css")).st_mtime_ns,
+        )
+
+    def test_unchanged_files_are_skipped(self):
+        precompress_tree(self.root)
+        self.assertEqual(precompress_tree(self.root)["written"], [])
+
+    def test_changed_file_is_recompressed(self):
+        precompress_tree(self.root)
+        self.write("static.css", CSS * 2)
+        stat = os.stat(self.path("static.css"))
+        os.utime(self.path("static.css"), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+        result = precompress_tree(self.root)
+
+        self.assertIn(self.path("static.css.gz"), result["written"])
+        with gzip.open(self.path("static.css.gz")) as f:
+            self.assertEqual(f.read(), CSS * 2)
+
+    def test_incompressible_file_is_recorded(self):
+        self.write("random.txt", os.urandom(4096))
+
+        result = precompress_tree(self.root, record_path=self.record)
+        self.assertEqual(result["incompressible"], [self.path("random.txt")])
+        self.assertFalse(os.path.exists(self.path("random.txt.gz")))
+
+        result = precompress_tree(self.root, record_path=self.record)
+        self.assertEqual((result["written"], result["incompressible"]), ([], []))
+
+        self.write("random.txt", CSS)
+        result = precompress_tree(self.root, record_path=self.record)
+        self.assertIn(self.path("random.txt.gz"), result["written"])
+        self.assertEqual(result["incompressible"], [])
+
+    def test_orphaned_sibling_is_removed(self):
+        precompress_tree(self.root)
+        os.remove(self.path("static.css"))
+        result = precompress_tree(self.root)
+        self.assertIn(self.path("static.css.gz"), result["removed"])
+        self.assertFalse(os.path.exists(self.path("static.css.gz")))
+
+    def test_unrelated_archives_are_kept(self):
+        self.write("archive.tar.gz", gzip.compress(b"data"))
+        precompress_tree(self.root)
+        self.assertTrue(os.path.exists(self.path("archive.tar.gz")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from .blockcache import BlockCache
+from .conversion import markdown_to_html
+from .parsecache import ParseCache, tree_key
+from .search import (
+    HEADING_WEIGHT,
+    SEARCH_DIR,
+    SearchIndex,
+    build_search_index,
+    decode_postings,
+    encode_postings,
+    page_terms,
+    shard_file,
+    tokenize,
+)
+
+
+class TestSearchTerms(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertEqual(
+            tokenize("Static-site *generator*, 2 of_them à la"),
+            ["static", "site", "generator", "2", "of", "them", "la"],
+        )
+
+    def test_page_terms_weight_headings(self):
+        terms = page_terms("# Build\n\nbuild the **site** with ![a logo](/logo.png)\n\n```\ncode here\n```")
+        self.assertEqual(terms["build"], HEADING_WEIGHT + 1)
+        self.assertEqual(terms["site"], 1)
+        self.assertEqual(terms["logo"], 1)
+        self.assertEqual(terms["code"], 1)
+
+    def test_page_terms_index_text_not_entities(self):
+        terms = page_terms("Fish & chips use `<tags>`")
+        self.assertEqual(sorted(terms), ["chips", "fish", "tags", "use"])
+
+    def test_page_terms_from_cached_fragments(self):
+        # Parse-cache trees built with the block cache hold rendered blocks.
+        markdown = (
+            "# Build **the** site\n\nbuild the **site** with ![a logo](/logo.png) "
+            "and ![two words](/x.png)\n\n```\nif a < b:\n```\n\n* one\n* two &amp; three"
+        )
+        parse_cache = ParseCache()
+        parse_cache.put(tree_key(markdown), markdown_to_html(markdown, BlockCache()))
+        self.assertEqual(page_terms(markdown, parse_cache), page_terms(markdown))
+        self.assertEqual(parse_cache.hits, 1)
+
+    def test_postings_round_trip(self):
+        postings = [(0, 3), (4, 1), (5, 2), (120, 7)]
+        self.assertEqual(encode_postings(postings), [0, 3, 4, 1, 1, 2, 115, 7])
+        self.assertEqual(decode_postings(encode_postings(postings)), postings)
+
+    def test_shard_file(self):
+        self.assertEqual(shard_file("re"), "re.json")
+        self.assertEqual(shard_file("é"), "xc3a9.json")
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        root = self.tmp.name
+        self.content = os.path.join(root, "content")
+        self.public = os.path.join(root, "public")
+        self.cache = os.path.join(root, "cache", "search.json")
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write("index.md", "# Home\n\nWelcome to the static site generator.")
+        self.write("blog/render.md", "# Rendering\n\nHow pages render from markdown.")
+        self.write("blog/cache.md", "# Caching\n\nThe render cache keeps static pages fast.")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        with open(os.path.join(self.content, rel_path), "w") as f:
+            f.write(text)
+
+    def build(self, public=None):
+        return build_search_index(self.content, public or self.public, self.cache)
+
+    def search(self, query, public=None):
+        index = SearchIndex(os.path.join(public or self.public, SEARCH_DIR))
+        return [url for url, _, _ in index.search(query)]
+
+    def test_search(self):
+        self.build()
+        self.assertEqual(self.search("render"), ["/blog/render.html", "/blog/cache.html"])
+        self.assertEqual(self.search("static render"), ["/blog/cache.html"])
+        self.assertEqual(self.search("ren"), ["/blog/render.html", "/blog/cache.html"])
+        self.assertEqual(self.search("gen"), ["/index.html"])
+        self.assertEqual(self.search("h"), ["/index.html", "/blog/render.html"])
+        self.assertEqual(self.search("missing"), [])
+
+    def test_query_loads_only_its_shard(self):
+        self.build()
+        index = SearchIndex(os.path.join(self.public, SEARCH_DIR))
+        index.search("render")
+        self.assertEqual(list(index.shards), ["re"])
+
+    def test_incremental_update_matches_full_build(self):
+        self.build()
+        self.write("blog/render.md", "# Rendering\n\nHow pages render from templates.")
+        self.write("blog/new.md", "# New\n\nA new page about templates.")
+        os.remove(os.path.join(self.content, "blog", "cache.md"))
+
+        result = self.build()
+        self.assertEqual(result["extracted"], 2)
+        # "how" only changed page, with the same weight: patched, same bytes.
+        self.assertNotIn("ho.json", result["written"])
+        self.assertNotIn("we.json", result["written"])
+        self.assertIn("te.json", result["written"])
+        self.assertIn("ca.json", result["removed"])
+        self.assertEqual(self.search("templates"), ["/blog/new.html", "/blog/render.html"])
+        self.assertEqual(self.search("markdown"), [])
+
+        # Same cache, no index on disk: everything is rebuilt from scratch.
+        full = os.path.join(self.tmp.name, "full")
+        shutil.copy(self.cache, self.cache + ".bak")
+        self.build(full)
+        shutil.copy(self.cache + ".bak", self.cache)
+        incremental_dir = os.path.join(self.public, SEARCH_DIR)
+        full_dir = os.path.join(full, SEARCH_DIR)
+        self.assertEqual(sorted(os.listdir(incremental_dir)), sorted(os.listdir(full_dir)))
+        for name in os.listdir(full_dir):
+            with open(os.path.join(incremental_dir, name)) as a, open(os.path.join(full_dir, name)) as b:
+                self.assertEqual(a.read(), b.read(), name)
+
+    def test_changed_pages_use_the_parse_cache(self):
+        # The tree page generation cached for a source is what gets indexed.
+        path = os.path.join(self.tmp.name, "cache", "trees.marshal")
+        parse_cache = ParseCache(path)
+        with open(os.path.join(self.content, "index.md"), encoding="utf-8") as f:
+            parse_cache.put(tree_key(f.read()), markdown_to_html("# Home\n\nzebra"))
+        parse_cache.save()
+
+        build_search_index(self.content, self.public, self.cache, parse_cache_path=path)
+        self.assertEqual(self.search("zebra"), ["/index.html"])
+        self.assertEqual(self.search("welcome"), [])
+
+    def test_unchanged_build_writes_nothing(self):
+        self.build()
+        result = self.build()
+        self.assertEqual(result["extracted"], 0)
+        self.assertEqual(result["written"], [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,432 @@
+import asyncio
+import functools
+import http.client
+import os
+import tempfile
+import threading
+import unittest
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer
+
+from .server import (
+    BUILD_STAMP,
+    AsyncServer,
+    FileCache,
+    FileIndex,
+    StaticHandler,
+    accepted_encodings,
+    cache_control,
+    is_not_modified,
+    load_immutable_paths,
+    make_etag,
+    parse_range,
+    requested_range,
+)
+
+
+class QuietHandler(StaticHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class TestProtocol(unittest.TestCase):
+    def test_parse_range(self):
+        self.assertEqual(parse_range("bytes=0-9", 100), (0, 9))
+        self.assertEqual(parse_range("bytes=90-", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=-10", 100), (90, 99))
+        self.assertEqual(parse_range("bytes=50-500", 100), (50, 99))
+        self.assertEqual(parse_range("bytes=100-", 100), "unsatisfiable")
+        # Multi-range, other units and malformed specs send the whole file.
+        self.assertIsNone(parse_range("bytes=0-1,5-6", 100))
+        self.assertIsNone(parse_range("items=0-1", 100))
+        self.assertIsNone(parse_range("bytes=a-b", 100))
+        self.assertIsNone(parse_range("bytes=9-1", 100))
+
+    def test_accepted_encodings(self):
+        self.assertEqual(accepted_encodings("gzip, br"), {"gzip", "br"})
+        self.assertEqual(accepted_encodings("br;q=0, gzip;q=0.5"), {"gzip"})
+        self.assertEqual(accepted_encodings("*, gzip;q=0"), {"*", "br"})
+        self.assertEqual(accepted_encodings(""), set())
+
+    def test_is_not_modified(self):
+        stat = os.stat(__file__)
+        etag = make_etag(stat)
+        self.assertTrue(is_not_modified({"If-None-Match": f'"x", {etag}'}, etag, stat))
+        self.assertTrue(is_not_modified({"If-None-Match": "*"}, etag, stat))
+        # If-None-Match wins over If-Modified-Since.
+        self.assertFalse(is_not_modified({
+            "If-None-Match": '"x"', "If-Modified-Since": formatdate(stat.st_mtime + 60, usegmt=True),
+        }, etag, stat))
+        self.assertTrue(is_not_modified(
+            {"If-Modified-Since": formatdate(stat.st_mtime + 60, usegmt=True)}, etag, stat
+        ))
+        self.assertFalse(is_not_modified(
+            {"If-Modified-Since": formatdate(stat.st_mtime - 60, usegmt=True)}, etag, stat
+        ))
+        self.assertFalse(is_not_modified({"If-Modified-Since": "yesterday"}, etag, stat))
+
+    def test_requested_range_if_range(self):
+        stat = os.stat(__file__)
+        etag = make_etag(stat)
+        self.assertEqual(requested_range({"Range": "bytes=0-1", "If-Range": etag}, etag, 10), (0, 1))
+        self.assertIsNone(requested_range({"Range": "bytes=0-1", "If-Range": '"old"'}, etag, 10))
+
+
+class TestFileCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, data, mtime=None):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "wb") as f:
+            f.write(data)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path, os.stat(path)
+
+    def test_evicts_least_recently_used(self):
+        cache = FileCache(max_bytes=10, max_file_size=10)
+        a, a_stat = self.write("a", b"aaaa")
+        b, b_stat = self.write("b", b"bbbb")
+        c, c_stat = self.write("c", b"cccc")
+        cache.put(a, a_stat, b"aaaa")
+        cache.put(b, b_stat, b"bbbb")
+        cache.get(a, a_stat)
+        cache.put(c, c_stat, b"cccc")
+
+        self.assertEqual(cache.get(a, a_stat), b"aaaa")
+        self.assertIsNone(cache.get(b, b_stat))
+        self.assertEqual(cache.get(c, c_stat), b"cccc")
+        self.assertEqual(cache.size, 8)
+
+    def test_skips_large_files(self):
+        cache = FileCache(max_file_size=2)
+        path, stat = self.write("a", b"aaaa")
+        cache.put(path, stat, b"aaaa")
+        self.assertIsNone(cache.get(path, stat))
+
+    def test_changed_mtime_invalidates(self):
+        cache = FileCache()
+        path, stat = self.write("a", b"aaaa", mtime=1000)
+        cache.put(path, stat, b"aaaa")
+        _, new_stat = self.write("a", b"bbbb", mtime=2000)
+
+        self.assertIsNone(cache.get(path, new_stat))
+        self.assertEqual(cache.size, 0)
+
+
+class ServerTestCase(unittest.TestCase):
+    handler = QuietHandler
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write_files()
+        # As `ssg serve --prod` does, from the manifests present at startup.
+        handler_class = type("Handler", (self.handler,), {"immutable": load_immutable_paths(self.root)})
+        handler = functools.partial(handler_class, directory=self.root)
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(
+            target=self.httpd.serve_forever, kwargs={"poll_interval": 0.01}, daemon=True
+        ).start()
+        self.connection = http.client.HTTPConnection("127.0.0.1", self.httpd.server_address[1])
+
+    def tearDown(self):
+        self.connection.close()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+        self.tmp.cleanup()
+
+    def write_files(self):
+        pass
+
+    def write(self, rel_path, data, mtime=1_700_000_000):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def get(self, path, headers=None, method="GET"):
+        self.connection.request(method, path, headers=headers or {})
+        response = self.connection.getresponse()
+        return response, response.read()
+
+
+class TestStaticHandler(ServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("file.txt", b"0123456789")
+        self.etag = make_etag(os.stat(os.path.join(self.root, "file.txt")))
+
+    def test_get(self):
+        response, body = self.get("/file.txt")
+        self.assertEqual(response.status, 200)
+        self.assertEqual(body, b"0123456789")
+        self.assertEqual(response.getheader("ETag"), self.etag)
+        self.assertEqual(response.getheader("Content-Length"), "10")
+        self.assertEqual(response.getheader("Accept-Ranges"), "bytes")
+
+    def test_keep_alive(self):
+        self.get("/file.txt")
+        sock = self.connection.sock
+        response, body = self.get("/file.txt", method="HEAD")
+        self.assertIs(self.connection.sock, sock)
+        self.assertEqual((response.status, body), (200, b""))
+
+    def test_range(self):
+        response, body = self.get("/file.txt", {"Range": "bytes=2-4"})
+        self.assertEqual(response.status, 206)
+        self.assertEqual(body, b"234")
+        self.assertEqual(response.getheader("Content-Range"), "bytes 2-4/10")
+
+    def test_unsatisfiable_range(self):
+        response, body = self.get("/file.txt", {"Range": "bytes=10-"})
+        self.assertEqual(response.status, 416)
+        self.assertEqual(body, b"")
+        self.assertEqual(response.getheader("Content-Range"), "bytes */10")
+
+    def test_multi_range_sends_whole_file(self):
+        response, body = self.get("/file.txt", {"Range": "bytes=0-1,4-5"})
+        self.assertEqual((response.status, body), (200, b"0123456789"))
+
+    def test_if_range_mismatch_sends_whole_file(self):
+        response, body = self.get("/file.txt", {"Range": "bytes=0-1", "If-Range": '"stale"'})
+        self.assertEqual((response.status, body), (200, b"0123456789"))
+        response, body = self.get("/file.txt", {"Range": "bytes=0-1", "If-Range": self.etag})
+        self.assertEqual((response.status, body), (206, b"01"))
+
+    def test_if_none_match(self):
+        response, body = self.get("/file.txt", {"If-None-Match": self.etag})
+        self.assertEqual((response.status, body), (304, b""))
+        self.assertEqual(response.getheader("ETag"), self.etag)
+
+    def test_if_modified_since(self):
+        response, _ = self.get("/file.txt", {"If-Modified-Since": formatdate(1_700_000_000, usegmt=True)})
+        self.assertEqual(response.status, 304)
+        response, _ = self.get("/file.txt", {"If-Modified-Since": formatdate(1_600_000_000, usegmt=True)})
+        self.assertEqual(response.status, 200)
+
+    def test_changed_file_is_not_served_from_cache(self):
+        self.get("/file.txt")
+        self.write("file.txt", b"new", mtime=1_700_000_100)
+        response, body = self.get("/file.txt")
+        self.assertEqual(body, b"new")
+
+    def test_directory_index(self):
+        self.write(os.path.join("blog", "index.html"), b"<p>blog</p>")
+        response, body = self.get("/blog/")
+        self.assertEqual((response.status, body), (200, b"<p>blog</p>"))
+        response, _ = self.get("/blog")
+        self.assertEqual(response.status, 301)
+        self.assertEqual(response.getheader("Location"), "/blog/")
+
+    def test_missing_file(self):
+        response, _ = self.get("/missing.txt")
+        self.assertEqual(response.status, 404)
+
+
+class TestPrecompressedServing(ServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.write("app.js", b"plain")
+        self.write("app.js.gz", b"gzipped")
+        self.write("app.js.br", b"brotli")
+
+    def test_prefers_brotli(self):
+        response, body = self.get("/app.js", {"Accept-Encoding": "gzip, br"})
+        self.assertEqual(body, b"brotli")
+        self.assertEqual(response.getheader("Content-Encoding"), "br")
+        self.assertEqual(response.getheader("Vary"), "Accept-Encoding")
+
+    def test_honours_refused_encoding(self):
+        response, body = self.get("/app.js", {"Accept-Encoding": "gzip, br;q=0"})
+        self.assertEqual(body, b"gzipped")
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+
+    def test_identity(self):
+        response, body = self.get("/app.js")
+        self.assertEqual(body, b"plain")
+        self.assertIsNone(response.getheader("Content-Encoding"))
+        self.assertEqual(response.getheader("Vary"), "Accept-Encoding")
+
+    def test_ignores_stale_sibling(self):
+        self.write("app.js.br", b"old brotli", mtime=1_600_000_000)
+        response, body = self.get("/app.js", {"Accept-Encoding": "br, gzip"})
+        self.assertEqual(body, b"gzipped")
+        self.assertEqual(response.getheader("Content-Encoding"), "gzip")
+
+
+class TestCacheControl(ServerTestCase):
+    def write_files(self):
+        self.write("asset-manifest.json", b'{"static.css": "static.3f9a1c2b.css"}')
+        self.write("image-manifest.json", b'{"images": {}, "variants": ["images/a.0123abcd.w480.png"]}')
+        self.write("static.3f9a1c2b.css", b"body {}")
+        self.write("report.20240101.pdf", b"%PDF")
+
+    def test_load_immutable_paths(self):
+        immutable = load_immutable_paths(self.root)
+        self.assertEqual(immutable, {"static.3f9a1c2b.css", "images/a.0123abcd.w480.png"})
+        self.assertEqual(cache_control("static.3f9a1c2b.css", immutable), "public, max-age=31536000, immutable")
+        self.assertEqual(cache_control("report.20240101.pdf", immutable), "no-cache")
+        self.assertEqual(load_immutable_paths(os.path.join(self.root, "missing")), set())
+
+    def test_only_recorded_files_are_immutable(self):
+        response, _ = self.get("/static.3f9a1c2b.css")
+        self.assertIn("immutable", response.getheader("Cache-Control"))
+        response, _ = self.get("/report.20240101.pdf")
+        self.assertEqual(response.getheader("Cache-Control"), "no-cache")
+
+
+class TestFileIndex(unittest.TestCase):
+    def test_scan(self):
+        with tempfile.TemporaryDirectory() as root:
+            for rel_path in ("index.html", "index.html.gz", os.path.join("blog", "index.html"),
+                             ".secret", os.path.join(".git", "config")):
+                os.makedirs(os.path.join(root, os.path.dirname(rel_path)), exist_ok=True)
+                with open(os.path.join(root, rel_path), "w") as f:
+                    f.write("x")
+            os.utime(os.path.join(root, "index.html"), (1000, 1000))
+            os.utime(os.path.join(root, "index.html.gz"), (1000, 1000))
+
+            index = FileIndex(root)
+
+            self.assertEqual(index.lookup("/")[0]["encodings"], [("gzip", os.path.join(root, "index.html.gz"))])
+            self.assertEqual(index.lookup("/blog"), (None, "/blog/"))
+            self.assertEqual(index.lookup("/.secret"), (None, None))
+            self.assertEqual(index.lookup("/.git/config"), (None, None))
+
+
+class TestAsyncServer(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.write("file.txt", b"x" * 100)
+        self.write(os.path.join("blog", "index.html"), b"<p>blog</p>")
+        self.write(".secret", b"hidden")
+        self.servers = []
+        self.clients = []
+        self.port = await self.start_server()
+
+    async def asyncTearDown(self):
+        for writer in self.clients:
+            writer.close()
+        for server, stamp_task in self.servers:
+            stamp_task.cancel()
+            await server.shutdown()
+        self.tmp.cleanup()
+
+    def write(self, rel_path, data, mtime=None):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as f:
+            f.write(data)
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+
+    async def start_server(self, **kwargs):
+        server = AsyncServer(self.root, stamp_interval=0.01, **kwargs)
+        await server.start("127.0.0.1", 0)
+        self.servers.append((server, asyncio.create_task(server.watch_stamp())))
+        return server.server.sockets[0].getsockname()[1]
+
+    async def connect(self, port=None):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port or self.port)
+        self.clients.append(writer)
+        return reader, writer
+
+    async def read_response(self, reader):
+        head = await reader.readuntil(b"\r\n\r\n")
+        status_line, *lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+        headers = dict(line.split(": ", 1) for line in lines)
+        body = await reader.readexactly(int(headers.get("Content-Length", 0)))
+        return int(status_line.split()[1]), headers, body
+
+    async def get(self, path, headers="", connection=None):
+        reader, writer = connection or await self.connect()
+        writer.write(f"GET {path} HTTP/1.1\r\nHost: test\r\n{headers}\r\n".encode())
+        return await self.read_response(reader)
+
+    async def test_pipelined_keep_alive(self):
+        reader, writer = await self.connect()
+        writer.write(b"GET /file.txt HTTP/1.1\r\n\r\nHEAD /blog/ HTTP/1.1\r\n\r\n")
+
+        status, headers, body = await self.read_response(reader)
+        self.assertEqual((status, body), (200, b"x" * 100))
+        self.assertEqual(headers["Connection"], "keep-alive")
+        head = await reader.readuntil(b"\r\n\r\n")
+        self.assertTrue(head.startswith(b"HTTP/1.1 200 OK\r\n"))
+        self.assertIn(b"Content-Length: 11\r\n", head)
+
+        status, _, body = await self.get("/blog/", connection=(reader, writer))
+        self.assertEqual((status, body), (200, b"<p>blog</p>"))
+
+    async def test_directory_redirect(self):
+        status, headers, _ = await self.get("/blog")
+        self.assertEqual(status, 301)
+        self.assertEqual(headers["Location"], "/blog/")
+
+    async def test_dotfiles_are_hidden(self):
+        status, _, _ = await self.get("/.secret")
+        self.assertEqual(status, 404)
+
+    async def test_index_rebuilt_on_build_stamp(self):
+        self.write("new.txt", b"new")
+        self.assertEqual((await self.get("/new.txt"))[0], 404)
+
+        self.write(BUILD_STAMP, b"")
+        for _ in range(100):
+            await asyncio.sleep(0.01)
+            status, _, body = await self.get("/new.txt")
+            if status == 200:
+                break
+        self.assertEqual((status, body), (200, b"new"))
+
+    async def test_rewritten_file_is_served_as_it_is_now(self):
+        connection = await self.connect()
+        await self.get("/file.txt", connection=connection)
+        # Rewritten in place, before the index is rebuilt.
+        self.write("file.txt", b"y" * 10, mtime=1_700_000_000)
+
+        status, headers, body = await self.get("/file.txt", connection=connection)
+        self.assertEqual((status, headers["Content-Length"], body), (200, "10", b"y" * 10))
+        self.assertEqual((await self.get("/blog/", connection=connection))[2], b"<p>blog</p>")
+
+    async def test_deleted_file_is_not_found(self):
+        connection = await self.connect()
+        os.remove(os.path.join(self.root, "file.txt"))
+
+        self.assertEqual((await self.get("/file.txt", connection=connection))[0], 404)
+        self.assertEqual((await self.get("/blog/", connection=connection))[0], 200)
+
+    async def test_malformed_content_length(self):
+        reader, _ = connection = await self.connect()
+        status, headers, _ = await self.get("/file.txt", "Content-Length: abc\r\n", connection)
+        self.assertEqual((status, headers["Connection"]), (400, "close"))
+        self.assertEqual(await reader.read(), b"")
+
+    async def test_chunked_body_is_rejected(self):
+        status, headers, _ = await self.get("/file.txt", "Transfer-Encoding: chunked\r\n")
+        self.assertEqual((status, headers["Connection"]), (501, "close"))
+
+    async def test_connection_cap(self):
+        port = await self.start_server(max_connections=1)
+        first = await self.connect(port)
+        self.assertEqual((await self.get("/file.txt", connection=first))[0], 200)
+
+        second = await self.connect(port)
+        waiting = asyncio.create_task(self.get("/file.txt", connection=second))
+        await asyncio.sleep(0.1)
+        self.assertFalse(waiting.done())
+
+        first[1].close()
+        status, _, _ = await asyncio.wait_for(waiting, 5)
+        self.assertEqual(status, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
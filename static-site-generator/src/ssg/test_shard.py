@@ -0,0 +1,124 @@
+import json
+import os
+import tempfile
+import unittest
+
+from .pages import find_pages, generate_pages
+from .shard import (
+    SHARD_MANIFEST,
+    merge_shards,
+    parse_shard,
+    plan_merge,
+    shard_name,
+    shard_of,
+    write_shard_manifest,
+)
+
+
+def manifest(index, count, files, pages=()):
+    return {"shard": index, "count": count, "files": files, "pages": list(pages), "graph": {}}
+
+
+class TestSharding(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual(parse_shard("2/4"), (2, 4))
+        for spec in ("0/4", "5/4", "2", "a/b", "1/0"):
+            with self.assertRaises(ValueError):
+                parse_shard(spec)
+
+    def test_shard_of_is_stable_and_spreads(self):
+        self.assertEqual(shard_of("blog/post.md", 4), shard_of("blog/post.md", 4))
+        counts = [0] * 4
+        for i in range(400):
+            counts[shard_of(f"page{i}.md", 4) - 1] += 1
+        self.assertTrue(all(60 < count < 140 for count in counts), counts)
+
+    def test_plan_merge_checks_shards(self):
+        with self.assertRaisesRegex(ValueError, "Expected shards 1..3"):
+            plan_merge([("a", manifest(1, 3, {})), ("b", manifest(3, 3, {}))])
+        with self.assertRaisesRegex(ValueError, "different splits"):
+            plan_merge([("a", manifest(1, 2, {})), ("b", manifest(2, 3, {}))])
+
+    def test_plan_merge_collisions(self):
+        same = {"static.css": "aa", "a.html": "11"}
+        sources = plan_merge([
+            ("one", manifest(1, 2, same, ["a.html"])),
+            ("two", manifest(2, 2, {"static.css": "aa", "b.html": "22"}, ["b.html"])),
+        ])
+        self.assertEqual(sources, {"static.css": "one", "a.html": "one", "b.html": "two"})
+
+        with self.assertRaisesRegex(ValueError, "static.css: differs"):
+            plan_merge([
+                ("one", manifest(1, 2, {"static.css": "aa"})),
+                ("two", manifest(2, 2, {"static.css": "bb"})),
+            ])
+        with self.assertRaisesRegex(ValueError, "about.html: page in one but a static file in two"):
+            plan_merge([
+                ("one", manifest(1, 2, {"about.html": "11"}, ["about.html"])),
+                ("two", manifest(2, 2, {"about.html": "11"})),
+            ])
+
+
+class TestShardBuild(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.content = os.path.join(self.root, "content")
+        self.template = os.path.join(self.root, "template.html")
+        self.shards = os.path.join(self.root, "shards")
+        self.public = os.path.join(self.root, "public")
+        os.makedirs(os.path.join(self.content, "blog"))
+        with open(self.template, "w") as f:
+            f.write("{{ Content }}")
+        for i in range(20):
+            with open(os.path.join(self.content, "blog", f"post{i}.md"), "w") as f:
+                f.write(f"# Post {i}")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def build_shard(self, index, count):
+        dest = os.path.join(self.shards, shard_name(index, count))
+        os.makedirs(dest)
+        with open(os.path.join(dest, "static.css"), "w") as f:
+            f.write("body {}")
+        pages = generate_pages(self.content, self.template, dest, workers=1, shard=(index, count))
+        write_shard_manifest(dest, (index, count), pages, {})
+        return pages
+
+    def test_shards_partition_pages_and_merge(self):
+        pages = [self.build_shard(index, 3) for index in (1, 2, 3)]
+        self.assertEqual(sum(len(shard) for shard in pages), 20)
+        self.assertTrue(all(pages))
+
+        os.makedirs(self.public)
+        with open(os.path.join(self.public, "stale.html"), "w") as f:
+            f.write("old")
+        result = merge_shards(self.shards, self.public)
+
+        self.assertEqual(result["files"], 21)
+        self.assertEqual(
+            sorted(os.listdir(os.path.join(self.public, "blog"))),
+            sorted(os.path.basename(dest) for _, dest in find_pages(self.content, self.public)),
+        )
+        self.assertFalse(os.path.exists(os.path.join(self.public, "stale.html")))
+        self.assertFalse(os.path.exists(os.path.join(self.public, SHARD_MANIFEST)))
+
+    def test_failed_merge_leaves_dest_alone(self):
+        self.build_shard(1, 2)
+        self.build_shard(2, 2)
+        path = os.path.join(self.shards, shard_name(2, 2), SHARD_MANIFEST)
+        with open(path) as f:
+            data = json.load(f)
+        data["files"]["static.css"] = "0" * 64
+        with open(path, "w") as f:
+            json.dump(data, f)
+
+        os.makedirs(self.public)
+        with self.assertRaises(ValueError):
+            merge_shards(self.shards, self.public)
+        self.assertEqual(os.listdir(self.public), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
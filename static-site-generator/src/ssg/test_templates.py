@@ -0,0 +1,81 @@
+import io
+import os
+import tempfile
+import unittest
+
+from .htmlnode import LeafNode, ParentNode
+from .templates import compile_string, compile_template, load_template
+
+
+class TestTemplates(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_compiles_to_literals_and_slots(self):
+        template = compile_string("<title>{{ Title }}</title><main>{{Content}}</main>")
+        self.assertEqual(template.literals, ("<title>", "</title><main>", "</main>"))
+        self.assertEqual([name for name, _ in template.slots], ["Title", "Content"])
+
+    def test_render_streams_nodes(self):
+        template = compile_string("<main>{{ Content }}</main>{{ Missing }}")
+        node = ParentNode("div", [LeafNode("hi", "p")])
+        self.assertEqual(template.render({"Content": node}), "<main><div><p>hi</p></div></main>{{ Missing }}")
+
+        buffer = io.StringIO()
+        template.write(buffer, {"Content": node})
+        self.assertEqual(buffer.getvalue(), template.render({"Content": node}))
+
+    def test_include_and_extends(self):
+        self.write("base.html", '<html>{% include "partials/head.html" %}'
+                   "{% block body %}<p>default</p>{% endblock %}{% block foot %}<footer>{% endblock %}</html>")
+        self.write("partials/head.html", '<title>{{ Title }}</title>{% include "meta.html" %}')
+        self.write("partials/meta.html", "<meta charset=utf-8>")
+        path = self.write("page.html", '{% extends "base.html" %}\n'
+                          "{% block body %}<main>{{ Content }}</main>{% endblock %}")
+
+        template = compile_template(path)
+
+        self.assertEqual(
+            template.render({"Title": "T", "Content": "C"}),
+            "<html><title>T</title><meta charset=utf-8><main>C</main><footer></html>",
+        )
+        self.assertEqual(template.fragments, tuple(
+            os.path.join(self.root, name) for name in ("base.html", "partials/head.html", "partials/meta.html")
+        ))
+
+    def test_errors(self):
+        for source in ("{% block a %}", "{% endblock %}", "{% unknown %}", "x{% extends 'a.html' %}"):
+            with self.assertRaises(ValueError, msg=source):
+                compile_string(source)
+        loop = self.write("loop.html", '{% include "loop.html" %}')
+        with self.assertRaisesRegex(ValueError, "includes or extends itself"):
+            compile_template(loop)
+        with self.assertRaisesRegex(ValueError, "Template not found"):
+            compile_string('{% include "missing.html" %}', self.root)
+
+    def test_load_template_caches_by_content(self):
+        path = self.write("layout.html", '{% include "part.html" %}{{ Content }}')
+        self.write("part.html", "v1")
+        template = load_template(path)
+        self.assertIs(load_template(path), template)
+
+        self.write("part.html", "v2")
+        reloaded = load_template(path)
+        self.assertIsNot(reloaded, template)
+        self.assertEqual(reloaded.render({"Content": ""}), "v2")
+        self.assertNotEqual(reloaded.digest, template.digest)
+
+
+if __name__ == "__main__":
+    unittest.main()
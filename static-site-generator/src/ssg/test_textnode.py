@@ -1,6 +1,6 @@
 import unittest
 
-from textnode import TextNode
+from .textnode import TextNode
 
 
 class TestTextNode(unittest.TestCase):
@@ -22,6 +22,11 @@ class TestTextNode(unittest.TestCase):
         node1 = TextNode("", "italic")
         node2 = TextNode("", "italic")
         self.assertEqual(node1, node2)
+    def test_no_instance_dict(self):
+        node = TextNode("test", "bold")
+        self.assertFalse(hasattr(node, "__dict__"))
+        with self.assertRaises(AttributeError):
+            node.extra = 1
 
 
 if __name__ == "__main__":
@@ -0,0 +1,219 @@
+import os
+import tempfile
+import threading
+import unittest
+
+from .watch import (
+    InotifyWatcher,
+    PollingWatcher,
+    Rebuilder,
+    ReloadNotifier,
+    inject_livereload,
+    LIVERELOAD_SCRIPT,
+)
+
+
+class WatchTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = self.tmp.name
+        self.static = os.path.join(self.root, "static")
+        self.content = os.path.join(self.root, "content")
+        self.public = os.path.join(self.root, "public")
+        self.template = os.path.join(self.root, "template.html")
+        os.makedirs(self.static)
+        os.makedirs(os.path.join(self.content, "blog"))
+        self.write(self.template, "<title>{{ Title }}</title>{{ Content }}")
+        self.write(os.path.join(self.static, "static.css"), "body {}")
+        self.write(os.path.join(self.content, "index.md"), "# Home")
+        self.write(os.path.join(self.content, "blog", "post.md"), "# Post")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, path, text):
+        with open(path, "w") as f:
+            f.write(text)
+
+    def read(self, path):
+        with open(path) as f:
+            return f.read()
+
+
+class TestWatchers(WatchTestCase):
+    def check_watcher(self, watcher):
+        try:
+            self.assertEqual(watcher.wait(0.05), set())
+
+            page = os.path.join(self.content, "index.md")
+            self.write(page, "# Changed")
+            self.assertIn(page, watcher.wait(1))
+
+            new_dir = os.path.join(self.content, "new")
+            os.makedirs(new_dir)
+            new_page = os.path.join(new_dir, "page.md")
+            self.write(new_page, "# New")
+            changed = set()
+            while new_page not in changed:
+                more = watcher.wait(1)
+                self.assertTrue(more)
+                changed |= more
+
+            # Other files and directories next to a single watched file are
+            # ignored.
+            drafts = os.path.join(self.root, "drafts")
+            os.makedirs(drafts)
+            self.write(os.path.join(drafts, "draft.md"), "# Draft")
+            self.write(os.path.join(self.root, "notes.txt"), "scratch")
+            self.write(self.template, "{{ Content }}")
+            changed = watcher.wait(1)
+            self.assertIn(self.template, {os.path.normpath(path) for path in changed})
+            self.assertNotIn(os.path.join(self.root, "notes.txt"), changed)
+            self.assertNotIn(os.path.join(drafts, "draft.md"), changed)
+            if isinstance(watcher, InotifyWatcher):
+                self.assertNotIn(drafts, watcher.watches.values())
+        finally:
+            watcher.close()
+
+    def test_polling_watcher(self):
+        self.check_watcher(PollingWatcher([self.static, self.content, self.template], interval=0.01))
+
+    @unittest.skipUnless(hasattr(os, "uname") and os.uname().sysname == "Linux", "inotify is Linux-only")
+    def test_inotify_watcher(self):
+        self.check_watcher(InotifyWatcher([self.static, self.content, self.template]))
+
+
+class TestRebuilder(WatchTestCase):
+    def setUp(self):
+        super().setUp()
+        self.rebuilder = Rebuilder(
+            self.static, self.content, self.template, self.public,
+            os.path.join(self.root, "manifest.json"),
+        )
+        self.rebuilder.rebuild({self.template, os.path.join(self.static, "static.css")})
+
+    def test_initial_rebuild(self):
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "<title>Home</title><div><h1 id=home >Home</h1></div>")
+        self.assertTrue(os.path.exists(os.path.join(self.public, "blog", "post.html")))
+        self.assertTrue(os.path.exists(os.path.join(self.public, "static.css")))
+
+    def test_only_changed_page_is_rebuilt(self):
+        page = os.path.join(self.content, "blog", "post.md")
+        self.write(page, "# Edited")
+
+        rebuilt = self.rebuilder.rebuild({page})
+
+        self.assertEqual(rebuilt, [os.path.join(self.public, "blog", "post.html")])
+        self.assertIn("Edited", self.read(rebuilt[0]))
+
+    def test_deleted_page_is_removed(self):
+        page = os.path.join(self.content, "index.md")
+        os.remove(page)
+        self.rebuilder.rebuild({page})
+        self.assertFalse(os.path.exists(os.path.join(self.public, "index.html")))
+
+    def test_template_change_rebuilds_all_pages(self):
+        self.write(self.template, "<h1>{{ Title }}</h1>")
+        rebuilt = self.rebuilder.rebuild({self.template})
+        self.assertEqual(len(rebuilt), 2)
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "<h1>Home</h1>")
+
+    def test_partial_change_rebuilds_all_pages(self):
+        partial = os.path.join(self.root, "partials", "nav.html")
+        os.makedirs(os.path.dirname(partial))
+        self.write(partial, "<nav>v1</nav>")
+        self.write(self.template, '{% include "partials/nav.html" %}{{ Content }}')
+        self.rebuilder.rebuild({self.template})
+
+        self.write(partial, "<nav>v2</nav>")
+        rebuilt = self.rebuilder.rebuild({partial})
+
+        self.assertEqual(len(rebuilt), 2)
+        self.assertEqual(self.read(os.path.join(self.public, "index.html")), "<nav>v2</nav><div><h1 id=home >Home</h1></div>")
+
+    def test_added_and_removed_pages_rebuild_linking_pages(self):
+        index = os.path.join(self.content, "index.md")
+        new_page = os.path.join(self.content, "blog", "new.md")
+        self.write(index, "# Home\n\n[New](/blog/new.html)")
+        self.rebuilder.rebuild({index})
+
+        self.write(new_page, "# New")
+        rebuilt = self.rebuilder.rebuild({new_page})
+        self.assertEqual(
+            rebuilt,
+            [os.path.join(self.public, "blog", "new.html"), os.path.join(self.public, "index.html")],
+        )
+
+        os.remove(new_page)
+        rebuilt = self.rebuilder.rebuild({new_page})
+        self.assertEqual(len(rebuilt), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.public, "blog", "new.html")))
+
+    def test_removed_static_file_rebuilds_referencing_pages(self):
+        post = os.path.join(self.content, "blog", "post.md")
+        self.write(post, "# Post\n\n![css](../static.css)")
+        self.rebuilder.rebuild({post})
+
+        css = os.path.join(self.static, "static.css")
+        os.remove(css)
+        rebuilt = self.rebuilder.rebuild({css})
+        self.assertEqual(rebuilt, ["static.css", os.path.join(self.public, "blog", "post.html")])
+
+    def test_graph_is_persisted(self):
+        graph_path = os.path.join(self.root, "depgraph.json")
+        rebuilder = Rebuilder(
+            self.static, self.content, self.template, self.public,
+            os.path.join(self.root, "manifest.json"), graph_path=graph_path,
+        )
+        rebuilder.rebuild({self.template})
+
+        restarted = Rebuilder(
+            self.static, self.content, self.template, self.public,
+            os.path.join(self.root, "manifest.json"), graph_path=graph_path,
+        )
+        page = os.path.join(self.content, "index.md")
+        self.assertEqual(restarted.rebuild({page}), [os.path.join(self.public, "index.html")])
+
+    def test_changed_asset_rebuilds_pages_with_new_fingerprint(self):
+        self.write(self.template, '<link href="/static.css">{{ Content }}')
+        rebuilder = Rebuilder(
+            self.static, self.content, self.template, self.public,
+            os.path.join(self.root, "fingerprint-manifest.json"), fingerprint=True,
+            image_cache_dir=os.path.join(self.root, "images"),
+        )
+        css = os.path.join(self.static, "static.css")
+        rebuilder.rebuild({self.template, css})
+        first = self.read(os.path.join(self.public, "index.html"))
+        self.assertRegex(first, r'href="/static\.[0-9a-f]{8}\.css"')
+
+        self.write(css, "body { margin: 0 }")
+        rebuilt = rebuilder.rebuild({css})
+
+        self.assertEqual(len(rebuilt), 3)
+        second = self.read(os.path.join(self.public, "index.html"))
+        self.assertRegex(second, r'href="/static\.[0-9a-f]{8}\.css"')
+        self.assertNotEqual(first, second)
+
+    def test_broken_page_does_not_stop_rebuild(self):
+        page = os.path.join(self.content, "index.md")
+        self.write(page, "an `unclosed")
+        self.assertEqual(self.rebuilder.rebuild({page}), [])
+
+
+class TestLiveReload(unittest.TestCase):
+    def test_inject_before_body_end(self):
+        body = inject_livereload(b"<body><p>x</p></body></html>")
+        self.assertEqual(body, b"<body><p>x</p>" + LIVERELOAD_SCRIPT + b"</body></html>")
+
+    def test_inject_without_body(self):
+        self.assertEqual(inject_livereload(b"<p>x</p>"), b"<p>x</p>" + LIVERELOAD_SCRIPT)
+
+    def test_notifier_wakes_waiters(self):
+        notifier = ReloadNotifier()
+        threading.Timer(0.01, notifier.notify).start()
+        self.assertEqual(notifier.wait(0, timeout=1), 1)
+        self.assertEqual(notifier.wait(1, timeout=0.01), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,33 @@
+import sys
+
+TEXT_TYPE_TEXT = sys.intern("text")
+TEXT_TYPE_BOLD = sys.intern("bold")
+TEXT_TYPE_ITALIC = sys.intern("italic")
+TEXT_TYPE_CODE = sys.intern("code")
+TEXT_TYPE_LINK = sys.intern("link")
+TEXT_TYPE_IMAGE = sys.intern("image")
+
+
+class TextNode:
+    # children holds the nodes inside an emphasis span that contains more
+    # than plain text, e.g. the italic and link in "**a *b* [c](/d)**".
+    __slots__ = ("text", "text_type", "url", "children")
+
+    def __init__(self, text, text_type, url=None, children=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+        self.children = children
+
+    def __repr__(self):
+        if self.children:
+            return f'TextNode("{self.text}", "{self.text_type}", "{self.url}", {self.children!r})'
+        return f'TextNode("{self.text}", "{self.text_type}", "{self.url}")'
+
+    def __eq__(self, other):
+        if isinstance(other, TextNode):
+            return (self.text == other.text and 
+                    self.text_type == other.text_type and 
+                    self.url == other.url and
+                    self.children == other.children)
+        return False
@@ -0,0 +1,411 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from .blockcache import BlockCache
+from .depgraph import DepGraph, site_path
+from .fingerprint import AssetRewriter, fingerprint_assets
+from .images import ImageRewriter, process_images
+from .manifest import load_manifest, sync_directory
+from .pages import (
+    TransformChain,
+    build_page,
+    find_pages,
+    page_dest_path,
+    remove_output,
+    write_build_stamp,
+)
+from .parsecache import ParseCache
+from .templates import load_template
+
+LIVERELOAD_PATH = "/__livereload"
+LIVERELOAD_SCRIPT = (
+    b'<script>new EventSource("' + LIVERELOAD_PATH.encode()
+    + b'").onmessage = function () { location.reload(); };</script>'
+)
+
+# Wait this long after the last change before rebuilding, so an editor's
+# save (write, rename, chmod...) turns into a single rebuild.
+DEBOUNCE_SECONDS = 0.02
+POLL_INTERVAL = 0.05
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+INOTIFY_MASK = (
+    IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+    | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+)
+INOTIFY_EVENT = struct.Struct("iIII")
+
+
+def is_under(path, directory):
+    directory = os.path.abspath(directory)
+    return os.path.commonpath([os.path.abspath(path), directory]) == directory
+
+
+def snapshot(paths):
+    state = {}
+    for path in paths:
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            state[path] = (stat.st_mtime_ns, stat.st_size)
+        elif os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in files:
+                    file_path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(file_path)
+                    except FileNotFoundError:
+                        continue
+                    state[file_path] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+
+class PollingWatcher:
+    def __init__(self, paths, interval=POLL_INTERVAL):
+        self.paths = paths
+        self.interval = interval
+        self.state = snapshot(paths)
+
+    def poll(self):
+        new_state = snapshot(self.paths)
+        changed = {
+            path for path in self.state.keys() | new_state.keys()
+            if self.state.get(path) != new_state.get(path)
+        }
+        self.state = new_state
+        return changed
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            changed = self.poll()
+            if changed:
+                return changed
+            if deadline is not None and time.monotonic() >= deadline:
+                return set()
+            time.sleep(self.interval)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    def __init__(self, paths):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self.libc = libc
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.watches = {}
+        self.tree_dirs = set()
+        # Single files are watched through their directory, and only events
+        # for the files themselves are reported.
+        self.files = set()
+        for path in paths:
+            if os.path.isdir(path):
+                self.add_tree(path)
+            else:
+                self.files.add(os.path.normpath(path))
+                self.add_watch(os.path.dirname(path) or ".")
+
+    def add_watch(self, directory):
+        wd = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), INOTIFY_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self.watches[wd] = directory
+
+    def add_tree(self, directory):
+        changed = set()
+        for root, _, files in os.walk(directory):
+            self.add_watch(root)
+            self.tree_dirs.add(root)
+            changed.update(os.path.join(root, name) for name in files)
+        return changed
+
+    def read_events(self):
+        changed = set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return changed
+
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+            offset += INOTIFY_EVENT.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            directory = self.watches.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self.watches[wd]
+                self.tree_dirs.discard(directory)
+                continue
+
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            if mask & IN_ISDIR:
+                # Only a watched tree grows; a directory created next to a
+                # single watched file is ignored like any other neighbour.
+                if directory in self.tree_dirs and mask & (IN_CREATE | IN_MOVED_TO):
+                    # Files may land in a new directory before its watch
+                    # exists, so report whatever is already in there.
+                    changed.update(self.add_tree(path))
+                continue
+            if directory not in self.tree_dirs and os.path.normpath(path) not in self.files:
+                continue
+            changed.add(path)
+        return changed
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0, deadline - time.monotonic())
+            ready, _, _ = select.select([self.fd], [], [], remaining)
+            if not ready:
+                return set()
+            changed = self.read_events()
+            if changed:
+                return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def make_watcher(paths):
+    try:
+        return InotifyWatcher(paths)
+    except (OSError, AttributeError):
+        # No inotify (not Linux, or out of watches): fall back to polling.
+        return PollingWatcher(paths)
+
+
+def wait_for_changes(watcher, debounce=DEBOUNCE_SECONDS):
+    changed = watcher.wait()
+    while True:
+        more = watcher.wait(debounce)
+        if not more:
+            return changed
+        changed |= more
+
+
+class Rebuilder:
+    def __init__(
+        self, static_dir, content_dir, template_path, public_dir, manifest_path,
+        cache_path=None, graph_path=None, fingerprint=False, image_cache_dir=None,
+        parse_cache_path=None,
+    ):
+        self.static_dir = static_dir
+        self.content_dir = content_dir
+        self.template_path = template_path
+        self.public_dir = public_dir
+        self.manifest_path = manifest_path
+        self.cache = BlockCache(path=cache_path) if cache_path else BlockCache()
+        self.graph = DepGraph(graph_path)
+        # Loaded from the last build and kept in memory, like the block cache.
+        self.parse_cache = ParseCache(parse_cache_path) if parse_cache_path else None
+        self.template = load_template(template_path)
+        self.fingerprint = fingerprint
+        self.image_cache_dir = image_cache_dir
+        self.transform = None
+        if fingerprint or image_cache_dir:
+            self.refresh_assets()
+
+    def template_files(self):
+        return [self.template_path, *self.template.fragments]
+
+    def refresh_assets(self):
+        # The same fingerprint and image stages as a full build, against
+        # what the static copy's manifest currently records.
+        files = load_manifest(self.manifest_path, self.static_dir, self.public_dir)
+        hashes = {rel_path: entry["hash"] for rel_path, entry in files.items()}
+        transforms = []
+        assets = {}
+        if self.fingerprint:
+            assets = fingerprint_assets(self.public_dir, hashes)["assets"]
+            transforms.append(AssetRewriter(assets))
+        if self.image_cache_dir:
+            result = process_images(self.public_dir, hashes, self.image_cache_dir, assets)
+            transforms.insert(0, ImageRewriter(result["images"]))
+        self.transform = TransformChain(transforms)
+
+    def page_output(self, from_path):
+        return site_path(page_dest_path(from_path, self.content_dir, self.public_dir), self.public_dir)
+
+    def rebuild(self, changed):
+        rebuilt = []
+        # Site paths that appeared or disappeared; pages linking to them
+        # are rebuilt along with the pages whose own inputs changed.
+        outputs = set()
+
+        if any(is_under(path, self.static_dir) for path in changed):
+            result = sync_directory(self.static_dir, self.public_dir, self.manifest_path)
+            rebuilt.extend(result["copied"] + result["removed"])
+            outputs.update(result["added"] + result["removed"])
+            if self.transform is not None:
+                # A changed asset gets a new fingerprinted name or new
+                # dimensions, so pages referencing it change too.
+                outputs.update(result["copied"])
+                self.refresh_assets()
+
+        template_files = {os.path.normpath(path) for path in self.template_files()}
+        if any(os.path.normpath(path) in template_files for path in changed):
+            self.template = load_template(self.template_path)
+
+        if not self.graph:
+            # Nothing recorded yet, so every page's dependencies are unknown.
+            sources = {from_path for from_path, _ in find_pages(self.content_dir, self.public_dir)}
+        else:
+            sources = {
+                os.path.normpath(path) for path in changed
+                if path.endswith(".md") and is_under(path, self.content_dir)
+            }
+            for from_path in sources:
+                if os.path.exists(from_path) != (from_path in self.graph):
+                    outputs.add(self.page_output(from_path))
+            sources |= self.graph.affected(changed, outputs)
+
+        for from_path in sorted(sources):
+            dest_path = page_dest_path(from_path, self.content_dir, self.public_dir)
+            if os.path.exists(from_path):
+                try:
+                    links, _ = build_page(
+                        from_path, self.template, dest_path, self.public_dir, self.cache,
+                        transform=self.transform, parse_cache=self.parse_cache,
+                    )
+                except ValueError as e:
+                    # Keep watching; the page is rebuilt once the markdown is fixed.
+                    print(e)
+                    continue
+                self.graph.record(
+                    from_path, site_path(dest_path, self.public_dir), self.template_path, links,
+                    self.template.fragments,
+                )
+            else:
+                self.graph.remove(from_path)
+                remove_output(dest_path)
+            rebuilt.append(dest_path)
+
+        if self.graph.path:
+            self.graph.save()
+        if rebuilt:
+            write_build_stamp(self.public_dir)
+        return rebuilt
+
+
+class ReloadNotifier:
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+def inject_livereload(body):
+    index = body.rfind(b"</body>")
+    if index == -1:
+        return body + LIVERELOAD_SCRIPT
+    return body[:index] + LIVERELOAD_SCRIPT + body[index:]
+
+
+class LiveReloadHandler(SimpleHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == LIVERELOAD_PATH:
+            self.stream_reloads()
+            return
+
+        path = self.translate_path(self.path)
+        if self.path.split("?", 1)[0].endswith("/") and os.path.isdir(path):
+            path = os.path.join(path, "index.html")
+        if path.endswith(".html") and os.path.isfile(path):
+            with open(path, "rb") as f:
+                body = inject_livereload(f.read())
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        super().do_GET()
+
+    def stream_reloads(self):
+        notifier = self.server.notifier
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+
+        version = notifier.version
+        try:
+            while True:
+                new_version = notifier.wait(version, timeout=15)
+                if new_version == version:
+                    self.wfile.write(b": ping\n\n")
+                else:
+                    version = new_version
+                    self.wfile.write(b"data: reload\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_server(directory, port, notifier):
+    def handler(*args, **kwargs):
+        return LiveReloadHandler(*args, directory=directory, **kwargs)
+
+    httpd = ThreadingHTTPServer(("", port), handler)
+    httpd.daemon_threads = True
+    httpd.notifier = notifier
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    return httpd
+
+
+def watch(rebuilder, port=8888):
+    notifier = ReloadNotifier()
+    httpd = start_server(rebuilder.public_dir, port, notifier)
+    # Partials and parent layouts are watched as they were at startup.
+    watcher = make_watcher([rebuilder.static_dir, rebuilder.content_dir, *rebuilder.template_files()])
+    print(f"Watching for changes, serving on http://localhost:{httpd.server_address[1]}")
+
+    try:
+        while True:
+            changed = wait_for_changes(watcher)
+            start = time.perf_counter()
+            rebuilt = rebuilder.rebuild(changed)
+            if rebuilt:
+                notifier.notify()
+                print(f"Rebuilt {len(rebuilt)} files in {(time.perf_counter() - start) * 1000:.1f}ms")
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        httpd.shutdown()
@@ -1,15 +0,0 @@
-class TextNode:
-    def __init__(self, text, text_type, url=None):
-        self.text = text
-        self.text_type = text_type
-        self.url = url
-
-    def __repr__(self):
-        return f'TextNode("{self.text}", "{self.text_type}", "{self.url}")'
-
-    def __eq__(self, other):
-        if isinstance(other, TextNode):
-            return (self.text == other.text and 
-                    self.text_type == other.text_type and 
-                    self.url == other.url)
-        return False
\ No newline at end of file
@@ -1 +1 @@
-python -m unittest discover -s src
\ No newline at end of file
+python -m unittest discover -s src -t src
\ No newline at end of file